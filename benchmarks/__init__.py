@@ -0,0 +1,7 @@
+"""
+Benchmarks de rendimiento del CRM.
+
+- `datos_sinteticos`: genera bases de datos de 10k / 100k / 1M clientes
+- `ejecutar`: mide operaciones del repositorio y endpoints (ASGI en proceso)
+- `comparar`: compara dos resultados JSON y marca regresiones
+"""
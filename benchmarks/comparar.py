@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# =====================================================
+# 📊 SyntexIA CRM — Comparar Resultados de Benchmarks
+# =====================================================
+"""
+Compara dos ficheros de resultados de `benchmarks.ejecutar` y marca las
+operaciones cuya p50 empeora más que el umbral.
+
+Ejecutar: python -m benchmarks.comparar base.json nuevo.json --umbral 10
+Sale con código 1 si hay alguna regresión (útil en CI).
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+
+def cargar(ruta: Path) -> Dict[str, Any]:
+    return json.loads(ruta.read_text())
+
+
+def comparar(base: Dict[str, Any], nuevo: Dict[str, Any], umbral: float) -> List[Dict[str, Any]]:
+    """Variación de p50 y p95 (%) de cada operación presente en ambos"""
+    filas = []
+    for nombre, actual in nuevo["resultados"].items():
+        anterior = base["resultados"].get(nombre)
+        if not anterior:
+            continue
+
+        def variacion(clave: str) -> float:
+            return (actual[clave] - anterior[clave]) / anterior[clave] * 100 if anterior[clave] else 0.0
+
+        filas.append({
+            "operacion": nombre,
+            "p50_antes": anterior["p50_ms"],
+            "p50_ahora": actual["p50_ms"],
+            "p50_var": variacion("p50_ms"),
+            "p95_var": variacion("p95_ms"),
+            "regresion": variacion("p50_ms") > umbral,
+        })
+    return filas
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Comparar dos resultados de benchmarks")
+    parser.add_argument("base", type=Path)
+    parser.add_argument("nuevo", type=Path)
+    parser.add_argument("--umbral", type=float, default=10.0, help="Empeoramiento de p50 (%%) que cuenta como regresión")
+    args = parser.parse_args()
+
+    base, nuevo = cargar(args.base), cargar(args.nuevo)
+    for clave in ("escala", "semilla"):
+        if base["metadatos"].get(clave) != nuevo["metadatos"].get(clave):
+            print(f"⚠️  {clave} distinta: {base['metadatos'].get(clave)} vs {nuevo['metadatos'].get(clave)}")
+
+    print(f"\n{base['metadatos'].get('commit')} → {nuevo['metadatos'].get('commit')} ({nuevo['metadatos'].get('escala')})")
+    print(f"{'Operación':<45} {'p50 antes':>10} {'p50 ahora':>10} {'Δp50':>8} {'Δp95':>8}")
+
+    filas = comparar(base, nuevo, args.umbral)
+    for fila in filas:
+        marca = "  ❌" if fila["regresion"] else ""
+        print(
+            f"{fila['operacion']:<45} {fila['p50_antes']:>10.3f} {fila['p50_ahora']:>10.3f} "
+            f"{fila['p50_var']:>+7.1f}% {fila['p95_var']:>+7.1f}%{marca}"
+        )
+
+    regresiones = [fila for fila in filas if fila["regresion"]]
+    if regresiones:
+        print(f"\n❌ {len(regresiones)} regresiones por encima del {args.umbral}%")
+        return 1
+
+    print("\n✅ Sin regresiones")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
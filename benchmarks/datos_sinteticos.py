@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# =====================================================
+# 🧬 SyntexIA CRM — Datos Sintéticos para Benchmarks
+# =====================================================
+"""
+Generador reproducible de bases de datos CRM de prueba.
+
+Con la misma escala y semilla produce siempre los mismos datos. Las
+distribuciones imitan un CRM real: la mayoría de clientes tiene pocas
+actividades y un 1% concentra cientos; la mitad no tiene oportunidades.
+
+Ejecutar: python -m benchmarks.datos_sinteticos --escala 100k
+"""
+
+import argparse
+import json
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+from src.repositories.crm_repository import (
+    CRMRepository, SQL_INSERTAR_ACTIVIDAD, SQL_INSERTAR_CONTACTO
+)
+
+ESCALAS = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+DIRECTORIO_DATOS = Path(__file__).parent / "datos"
+
+# Fechas relativas a un día fijo: mismas filas en cualquier momento
+FECHA_REFERENCIA = datetime(2025, 1, 1)
+
+# Clientes por transacción al generar
+TAMANO_LOTE = 5_000
+
+NOMBRES = ["Ana", "Luis", "María", "Jorge", "Lucía", "Pablo", "Elena", "Sergio", "Carmen", "Javier"]
+APELLIDOS = ["García", "Martínez", "López", "Sánchez", "Pérez", "Gómez", "Fernández", "Ruiz", "Díaz", "Moreno"]
+SUFIJOS_EMPRESA = ["S.L.", "S.A.", "Consulting", "Tecnologías", "Distribuciones", "Servicios"]
+SECTORES = ["tecnologia", "retail", "industria", "salud", "hosteleria", "logistica", "educacion", None]
+SEGMENTOS = ["pyme", "enterprise", "autonomo", "startup", None]
+
+ESTADOS_CLIENTE = (["prospecto", "activo", "inactivo", "bloqueado"], [30, 50, 15, 5])
+ESTADOS_OPORTUNIDAD = (
+    ["inicial", "contacto", "propuesta", "negociacion", "ganada", "perdida"], [20, 20, 15, 10, 20, 15]
+)
+TIPOS_ACTIVIDAD = (["llamada", "email", "reunion", "tarea", "nota", "venta"], [30, 35, 10, 10, 10, 5])
+TIPOS_CONTACTO = ["email", "telefono", "movil", "direccion"]
+
+# Número de filas hijas por cliente: (valores, pesos)
+CONTACTOS_POR_CLIENTE = ([0, 1, 2, 3, 4], [10, 40, 30, 15, 5])
+OPORTUNIDADES_POR_CLIENTE = ([0, 1, 2, 3, 5], [50, 25, 15, 7, 3])
+
+SQL_CLIENTE = """
+INSERT INTO clientes (
+    id, nombre_completo, razon_social, tipo_cliente, email, cif_nif, estado, segmento,
+    sector_industria, website, notas, credito_disponible, total_facturado, numero_facturas,
+    promedio_venta, tasa_pagos_a_tiempo, dias_desde_ultimo_contacto, fecha_creacion, fecha_actualizacion
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+SQL_OPORTUNIDAD = """
+INSERT INTO oportunidades (
+    id, cliente_id, titulo, descripcion, estado, valor_estimado, probabilidad_cierre,
+    fecha_cierre_esperada, productos, notas, fecha_creacion, fecha_actualizacion
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def ruta_dataset(escala: str, semilla: int) -> Path:
+    """Ruta del fichero de la base de datos sintética de una escala"""
+    return DIRECTORIO_DATOS / f"crm_{escala}_s{semilla}.db"
+
+
+def numero_actividades(rng: random.Random) -> int:
+    """Cola larga: media ~8 y un 1% de clientes con cientos de actividades"""
+    if rng.random() < 0.01:
+        return rng.randint(100, 500)
+    return min(int(rng.expovariate(1 / 8)), 100)
+
+
+def _fecha(rng: random.Random, dias_max: int) -> datetime:
+    return FECHA_REFERENCIA - timedelta(days=rng.uniform(0, dias_max))
+
+
+def _filas_lote(rng: random.Random, inicio: int, fin: int) -> Dict[str, List[tuple]]:
+    """Filas de los clientes [inicio, fin) y de sus contactos, actividades y oportunidades"""
+    filas = {"clientes": [], "contactos": [], "actividades": [], "oportunidades": []}
+
+    for i in range(inicio, fin):
+        cliente_id = f"cli_{i:012x}"
+        empresa = rng.random() < 0.7
+        nombre = f"{rng.choice(NOMBRES)} {rng.choice(APELLIDOS)}"
+        razon_social = f"{rng.choice(APELLIDOS)} {rng.choice(SUFIJOS_EMPRESA)}" if empresa else None
+        fecha_creacion = _fecha(rng, 3 * 365)
+        fecha_actualizacion = min(fecha_creacion + timedelta(days=rng.expovariate(1 / 90)), FECHA_REFERENCIA)
+        numero_facturas = int(rng.expovariate(1 / 12))
+        total_facturado = round(rng.lognormvariate(8, 1.2), 2) if numero_facturas else 0.0
+
+        filas["clientes"].append((
+            cliente_id, razon_social or nombre, razon_social, "empresa" if empresa else "particular",
+            f"cliente{i}@empresa{i % 5000}.es", f"B{i:08d}",
+            rng.choices(*ESTADOS_CLIENTE)[0], rng.choice(SEGMENTOS), rng.choice(SECTORES),
+            f"https://empresa{i}.es" if empresa else None, None,
+            round(rng.uniform(0, 50_000), 2), total_facturado, numero_facturas,
+            round(total_facturado / numero_facturas, 2) if numero_facturas else 0.0,
+            round(rng.uniform(40, 100), 1) if numero_facturas else None,
+            rng.randint(0, 365), fecha_creacion, fecha_actualizacion
+        ))
+
+        for j in range(rng.choices(*CONTACTOS_POR_CLIENTE)[0]):
+            tipo = rng.choice(TIPOS_CONTACTO)
+            filas["contactos"].append((
+                f"cont_{i:09x}{j:03x}", cliente_id, tipo, f"{tipo}-{i}-{j}",
+                j == 0, rng.random() < 0.6, fecha_creacion
+            ))
+
+        for j in range(numero_actividades(rng)):
+            tipo = rng.choices(*TIPOS_ACTIVIDAD)[0]
+            fecha = fecha_creacion + (FECHA_REFERENCIA - fecha_creacion) * rng.random()
+            filas["actividades"].append((
+                f"act_{i:09x}{j:03x}", cliente_id, tipo, f"{tipo.capitalize()} {j}", None,
+                fecha, rng.random() < 0.8, rng.choice(NOMBRES), None
+            ))
+
+        for j in range(rng.choices(*OPORTUNIDADES_POR_CLIENTE)[0]):
+            fecha = fecha_creacion + (FECHA_REFERENCIA - fecha_creacion) * rng.random()
+            filas["oportunidades"].append((
+                f"opp_{i:09x}{j:03x}", cliente_id, f"Oportunidad {j}", None,
+                rng.choices(*ESTADOS_OPORTUNIDAD)[0], round(rng.lognormvariate(8.5, 1), 2),
+                rng.randint(5, 95), fecha + timedelta(days=rng.randint(7, 180)),
+                json.dumps(["licencia", "soporte"][:rng.randint(1, 2)]), None, fecha, fecha
+            ))
+
+    return filas
+
+
+def generar_dataset(escala: str, semilla: int = 42, regenerar: bool = False) -> Path:
+    """
+    Crear (o reutilizar) la base de datos sintética de `escala`.
+
+    El esquema lo crea `CRMRepository` (migraciones); las filas se insertan
+    con los triggers activos, así FTS, resumen y versiones quedan al día.
+
+    Returns:
+        Path: Ruta de la base de datos
+    """
+    ruta = ruta_dataset(escala, semilla)
+    if ruta.exists() and not regenerar:
+        return ruta
+
+    # Se genera con otro nombre: un dataset a medias nunca se reutiliza
+    parcial = ruta.with_name(ruta.name + ".parcial")
+    DIRECTORIO_DATOS.mkdir(parents=True, exist_ok=True)
+    for sufijo in ("", "-wal", "-shm"):
+        Path(f"{parcial}{sufijo}").unlink(missing_ok=True)
+
+    CRMRepository(db_path=str(parcial), pool_size=1).cerrar()
+
+    total = ESCALAS[escala]
+    rng = random.Random(semilla)
+    conn = sqlite3.connect(parcial)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    inicio_reloj = time.perf_counter()
+
+    try:
+        for inicio in range(0, total, TAMANO_LOTE):
+            filas = _filas_lote(rng, inicio, min(inicio + TAMANO_LOTE, total))
+            conn.executemany(SQL_CLIENTE, filas["clientes"])
+            conn.executemany(SQL_INSERTAR_CONTACTO, filas["contactos"])
+            conn.executemany(SQL_INSERTAR_ACTIVIDAD, filas["actividades"])
+            conn.executemany(SQL_OPORTUNIDAD, filas["oportunidades"])
+            conn.commit()
+            print(f"   {min(inicio + TAMANO_LOTE, total):>9,} / {total:,} clientes", end="\r", flush=True)
+
+        conn.execute("ANALYZE")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.commit()
+    finally:
+        conn.close()
+
+    parcial.replace(ruta)
+    print(f"\n✅ Dataset {escala} generado en {time.perf_counter() - inicio_reloj:.1f}s: {ruta}")
+    return ruta
+
+
+def muestra_clientes(ruta: Path, n: int, semilla: int) -> List[sqlite3.Row]:
+    """`n` clientes al azar (reproducible) con id, email y cif_nif"""
+    conn = sqlite3.connect(ruta)
+    conn.row_factory = sqlite3.Row
+    try:
+        maximo = conn.execute("SELECT MAX(rowid) FROM clientes").fetchone()[0]
+        rng = random.Random(semilla)
+        return [
+            conn.execute("SELECT id, email, cif_nif FROM clientes WHERE rowid = ?", (rng.randint(1, maximo),)).fetchone()
+            for _ in range(n)
+        ]
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generar base de datos CRM sintética")
+    parser.add_argument("--escala", choices=ESCALAS, default="10k")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--regenerar", action="store_true", help="Regenerar aunque ya exista")
+    args = parser.parse_args()
+    generar_dataset(args.escala, args.semilla, args.regenerar)
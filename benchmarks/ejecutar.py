@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+# =====================================================
+# ⏱️ SyntexIA CRM — Benchmarks de Rendimiento
+# =====================================================
+"""
+Mide latencia y rendimiento de cada operación de `CRMRepository` y de
+los endpoints principales (en proceso, con un cliente ASGI de httpx)
+sobre una copia de la base de datos sintética de la escala elegida.
+
+Los resultados se guardan en JSON (con commit, versiones y escala) para
+compararlos entre commits con `python -m benchmarks.comparar`.
+
+Los endpoints necesitan httpx (`pip install -r requirements-dev.txt`); sin él se omiten.
+
+Ejecutar: python -m benchmarks.ejecutar --escala 10k
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.datos_sinteticos import ESCALAS, generar_dataset, muestra_clientes
+from src.repositories.crm_repository import CRMRepository
+from src.models.crm_models import (
+    ActividadSchema, ClienteCreate, ClienteUpdate, ContactoSchema, OportunidadSchema
+)
+
+DIRECTORIO_RESULTADOS = Path(__file__).parent / "resultados"
+
+
+# =====================================================
+# MEDICIÓN
+# =====================================================
+
+def percentil(ordenados: List[float], p: float) -> float:
+    """Percentil por rango más cercano de una lista ya ordenada"""
+    return ordenados[max(math.ceil(p / 100 * len(ordenados)) - 1, 0)]
+
+
+def resumir(tiempos_s: List[float], duracion_s: float, **extra: Any) -> Dict[str, Any]:
+    """Estadísticas de latencia (ms) y operaciones por segundo"""
+    ordenados = sorted(tiempos_s)
+    return {
+        "n": len(ordenados),
+        "media_ms": round(sum(ordenados) / len(ordenados) * 1000, 4),
+        "p50_ms": round(percentil(ordenados, 50) * 1000, 4),
+        "p95_ms": round(percentil(ordenados, 95) * 1000, 4),
+        "p99_ms": round(percentil(ordenados, 99) * 1000, 4),
+        "min_ms": round(ordenados[0] * 1000, 4),
+        "max_ms": round(ordenados[-1] * 1000, 4),
+        "ops_s": round(len(ordenados) / duracion_s, 2) if duracion_s else None,
+        **extra,
+    }
+
+
+def medir(funcion: Callable, entradas: List[tuple], calentamiento: int = 5) -> Dict[str, Any]:
+    """
+    Ejecutar `funcion(*entrada)` para cada entrada y medir cada llamada.
+
+    Las primeras `calentamiento` entradas se ejecutan sin medir (y no se
+    repiten: las escrituras con claves únicas no chocan).
+    """
+    for entrada in entradas[:calentamiento]:
+        funcion(*entrada)
+
+    tiempos = []
+    inicio = time.perf_counter()
+    for entrada in entradas[calentamiento:]:
+        t0 = time.perf_counter()
+        funcion(*entrada)
+        tiempos.append(time.perf_counter() - t0)
+    return resumir(tiempos, time.perf_counter() - inicio)
+
+
+async def medir_async(
+    funcion: Callable,
+    entradas: List[tuple],
+    concurrencia: int,
+    calentamiento: int = 5
+) -> Dict[str, Any]:
+    """Como `medir`, con hasta `concurrencia` llamadas en vuelo"""
+    for entrada in entradas[:calentamiento]:
+        await funcion(*entrada)
+    entradas = entradas[calentamiento:]
+
+    semaforo = asyncio.Semaphore(concurrencia)
+    tiempos = []
+
+    async def una(entrada: tuple):
+        async with semaforo:
+            t0 = time.perf_counter()
+            await funcion(*entrada)
+            tiempos.append(time.perf_counter() - t0)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(una(entrada) for entrada in entradas))
+    return resumir(tiempos, time.perf_counter() - inicio, concurrencia=concurrencia)
+
+
+def copiar_base_datos(origen: Path, destino: Path):
+    """Copia consistente (API de backup de SQLite): las escrituras no tocan el dataset"""
+    with sqlite3.connect(origen) as fuente, sqlite3.connect(destino) as copia:
+        fuente.backup(copia)
+
+
+def metadatos(args: argparse.Namespace) -> Dict[str, Any]:
+    """Commit, versiones y parámetros de la ejecución"""
+    def git(*comando: str) -> Optional[str]:
+        try:
+            return subprocess.run(
+                ["git", *comando], capture_output=True, text=True, check=True, cwd=Path(__file__).parent
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "commit": git("rev-parse", "--short", "HEAD"),
+        "cambios_sin_commit": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "plataforma": platform.platform(),
+        "escala": args.escala,
+        "clientes": ESCALAS[args.escala],
+        "semilla": args.semilla,
+        "repeticiones": args.repeticiones,
+        "concurrencia": args.concurrencia,
+    }
+
+
+# =====================================================
+# BENCHMARKS DEL REPOSITORIO
+# =====================================================
+
+def benchmarks_repositorio(db_path: Path, muestra: List[sqlite3.Row], n: int) -> Dict[str, Dict[str, Any]]:
+    """Cada operación pública de CRMRepository sobre clientes al azar"""
+    repo = CRMRepository(db_path=str(db_path), cache_clientes=0)
+    repo_cache = CRMRepository(db_path=str(db_path))
+    ids = [(row["id"],) for row in muestra]
+    resultados = {}
+
+    def ejecutar(nombre: str, funcion: Callable, entradas: List[tuple], **kwargs):
+        print(f"   repositorio.{nombre}", flush=True)
+        resultados[f"repositorio.{nombre}"] = medir(funcion, entradas, **kwargs)
+
+    try:
+        # Lecturas puntuales
+        ejecutar("obtener_cliente", repo.obtener_cliente, ids)
+        ejecutar("obtener_cliente[cache]", repo_cache.obtener_cliente, ids[:10] * (n // 10))
+        ejecutar("obtener_cliente_parcial", lambda cid: repo.obtener_cliente_parcial(
+            cid, ["nombre_completo", "estado"], []), ids)
+        ejecutar("obtener_cliente_por_email", repo.obtener_cliente_por_email, [(row["email"],) for row in muestra])
+        ejecutar("obtener_cliente_por_cif", repo.obtener_cliente_por_cif, [(row["cif_nif"],) for row in muestra])
+        ejecutar("etag_cliente", repo.etag_cliente, ids)
+        ejecutar("obtener_actividades", lambda cid: repo._obtener_actividades(cid, limit=20), ids)
+        ejecutar("obtener_resumen_crm", repo.obtener_resumen_crm, [()] * n)
+
+        # Listados
+        ejecutar("listar_clientes", lambda: repo.listar_clientes(limit=50), [()] * n)
+        ejecutar("listar_clientes[sin_conteo]", lambda: repo.listar_clientes(limit=50, contar="no"), [()] * n)
+        ejecutar("listar_clientes[fields]", lambda: repo.listar_clientes(
+            limit=50, contar="no", campos=["nombre_completo", "estado"]), [()] * n)
+        ejecutar("listar_clientes[estado]", lambda: repo.listar_clientes(
+            limit=50, estado="activo"), [()] * n)
+        ejecutar("listar_clientes[buscar]", lambda: repo.listar_clientes(
+            limit=50, buscar="garcia"), [()] * n)
+
+        # Página profunda: por cursor frente a OFFSET equivalente
+        _, total, _ = repo.listar_clientes(limit=1, contar="estimado")
+        cursor_pagina, paginas = None, max(min(20, total // 100), 1)
+        for _ in range(paginas):
+            _, _, cursor_pagina = repo.listar_clientes(limit=50, contar="no", cursor_pagina=cursor_pagina)
+        ejecutar(f"listar_clientes[cursor_p{paginas}]", lambda: repo.listar_clientes(
+            limit=50, contar="no", cursor_pagina=cursor_pagina), [()] * n)
+        ejecutar(f"listar_clientes[offset_p{paginas}]", lambda: repo.listar_clientes(
+            skip=50 * paginas, limit=50, contar="no"), [()] * n)
+
+        # Escrituras
+        ejecutar("crear_cliente", lambda: repo.crear_cliente(ClienteCreate(
+            nombre_completo="Bench", email=f"bench_{uuid.uuid4().hex}@bench.es",
+            contactos=[ContactoSchema(tipo="telefono", valor="600000000")]
+        )), [()] * n)
+        ejecutar("actualizar_cliente", lambda cid: repo.actualizar_cliente(
+            cid, ClienteUpdate(notas=uuid.uuid4().hex)), ids)
+        ejecutar("crear_contacto", lambda cid: repo.crear_contacto(
+            cid, ContactoSchema(tipo="email", valor="bench@bench.es")), ids)
+        ejecutar("crear_actividad", lambda cid: repo.crear_actividad(
+            cid, ActividadSchema(tipo="llamada", titulo="Bench")), ids)
+        ejecutar("crear_oportunidad", lambda cid: repo.crear_oportunidad(cid, OportunidadSchema(
+            titulo="Bench", valor_estimado=1000, probabilidad_cierre=50, fecha_cierre_esperada=datetime(2030, 1, 1)
+        )), ids)
+        lotes = max(n // 20, 3)
+        ejecutar("crear_actividades_lote[100]", lambda: repo.crear_actividades_lote([
+            (cid, ActividadSchema(tipo="email", titulo="Bench")) for (cid,) in ids[:100]
+        ]), [()] * (lotes + 1), calentamiento=1)
+        ejecutar("importar_clientes[1000]", lambda: repo.importar_clientes([
+            ClienteCreate(nombre_completo="Bench", email=f"imp_{uuid.uuid4().hex}@bench.es") for _ in range(1000)
+        ]), [()] * (lotes + 1), calentamiento=1)
+
+        # Exportación completa (pocas repeticiones)
+        def exportar_clientes() -> int:
+            _, filas = repo.exportar("clientes")
+            return sum(len(lote) for lote in filas)
+
+        print("   repositorio.exportar[clientes]", flush=True)
+        filas = exportar_clientes()
+        resultado = medir(exportar_clientes, [()] * 3, calentamiento=0)
+        resultado["filas_s"] = round(filas / (resultado["media_ms"] / 1000), 1)
+        resultados["repositorio.exportar[clientes]"] = resultado
+    finally:
+        repo.cerrar()
+        repo_cache.cerrar()
+
+    return resultados
+
+
+# =====================================================
+# BENCHMARKS DE ENDPOINTS
+# =====================================================
+
+async def benchmarks_endpoints(
+    db_path: Path,
+    muestra: List[sqlite3.Row],
+    n: int,
+    concurrencia: int
+) -> Dict[str, Dict[str, Any]]:
+    """Endpoints principales a través de la app ASGI completa (middleware incluido)"""
+    try:
+        import httpx
+    except ImportError:
+        print("⚠️  httpx no está instalado: se omiten los endpoints (pip install -r requirements-dev.txt)")
+        return {}
+
+    # El router crea su repositorio al importarse: apuntarlo a la copia
+    os.environ["DATABASE_PATH"] = str(db_path)
+    from main import app
+    from src.interface.crm_api import crm_repo_async
+
+    resultados = {}
+    transporte = httpx.ASGITransport(app=app)
+
+    try:
+        async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+            async def peticion(metodo: str, url: str, esperado: int, opciones: Optional[dict] = None):
+                response = await cliente.request(metodo, url, **(opciones or {}))
+                if response.status_code != esperado:
+                    raise RuntimeError(f"{metodo} {url}: {response.status_code} (esperado {esperado})")
+
+            async def ejecutar(nombre: str, entradas: List[tuple], calentamiento: int = 5):
+                print(f"   endpoint.{nombre}", flush=True)
+                resultados[f"endpoint.{nombre}"] = await medir_async(
+                    peticion, entradas, concurrencia, calentamiento=calentamiento
+                )
+
+            ids = [row["id"] for row in muestra]
+            etags = {}
+            for cliente_id in set(ids):
+                etags[cliente_id] = (await cliente.get(f"/api/crm/clientes/{cliente_id}")).headers["etag"]
+
+            await ejecutar("GET /health", [("GET", "/health", 200)] * n)
+            await ejecutar("GET /clientes", [("GET", "/api/crm/clientes?limit=50", 200)] * n)
+            await ejecutar("GET /clientes?fields", [
+                ("GET", "/api/crm/clientes?limit=50&contar=no&fields=id,nombre_completo,estado", 200)
+            ] * n)
+            await ejecutar("GET /clientes/{id}", [("GET", f"/api/crm/clientes/{cid}", 200) for cid in ids])
+            await ejecutar("GET /clientes/{id}[304]", [
+                ("GET", f"/api/crm/clientes/{cid}", 304, {"headers": {"If-None-Match": etags[cid]}})
+                for cid in ids
+            ])
+            await ejecutar("GET /clientes/buscar/email", [
+                ("GET", f"/api/crm/clientes/buscar/email/{row['email']}", 200) for row in muestra
+            ])
+            await ejecutar("GET /resumen", [("GET", "/api/crm/resumen", 200)] * n)
+            await ejecutar("POST /clientes", [
+                ("POST", "/api/crm/clientes", 201,
+                 {"json": {"nombre_completo": "Bench", "email": f"api_{uuid.uuid4().hex}@bench.es"}})
+                for _ in range(n)
+            ])
+            await ejecutar("POST /clientes/{id}/actividades", [
+                ("POST", f"/api/crm/clientes/{cid}/actividades", 201, {"json": {"tipo": "llamada", "titulo": "Bench"}})
+                for cid in ids
+            ])
+            await ejecutar("GET /export/clientes", [("GET", "/api/crm/export/clientes", 200)] * 4, calentamiento=1)
+    finally:
+        crm_repo_async.cerrar()
+
+    return resultados
+
+
+# =====================================================
+# CLI
+# =====================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de rendimiento del CRM")
+    parser.add_argument("--escala", choices=ESCALAS, default="10k")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--repeticiones", type=int, default=200, help="Llamadas medidas por operación")
+    parser.add_argument("--concurrencia", type=int, default=1, help="Peticiones en vuelo en los endpoints")
+    parser.add_argument("--solo", choices=("repositorio", "endpoints"), help="Medir solo una parte")
+    parser.add_argument("--salida", type=Path, help="Fichero JSON de resultados")
+    args = parser.parse_args()
+
+    print(f"\n🧬 Dataset {args.escala} (semilla {args.semilla})")
+    dataset = generar_dataset(args.escala, args.semilla)
+    muestra = muestra_clientes(dataset, args.repeticiones, args.semilla)
+
+    resultados = {}
+    directorio_temporal = Path(tempfile.mkdtemp(prefix="crm_bench_"))
+    try:
+        if args.solo != "endpoints":
+            print("\n⏱️  Repositorio")
+            copia = directorio_temporal / "repositorio.db"
+            copiar_base_datos(dataset, copia)
+            resultados.update(benchmarks_repositorio(copia, muestra, args.repeticiones))
+
+        if args.solo != "repositorio":
+            print("\n⏱️  Endpoints")
+            copia = directorio_temporal / "endpoints.db"
+            copiar_base_datos(dataset, copia)
+            resultados.update(asyncio.run(
+                benchmarks_endpoints(copia, muestra, args.repeticiones, args.concurrencia)
+            ))
+    finally:
+        shutil.rmtree(directorio_temporal, ignore_errors=True)
+
+    informe = {"metadatos": metadatos(args), "resultados": resultados}
+    salida = args.salida or DIRECTORIO_RESULTADOS / (
+        f"{datetime.now():%Y%m%d_%H%M%S}_{informe['metadatos']['commit'] or 'sin_git'}_{args.escala}.json"
+    )
+    salida.parent.mkdir(parents=True, exist_ok=True)
+    salida.write_text(json.dumps(informe, indent=2, ensure_ascii=False))
+
+    print(f"\n{'Operación':<45} {'p50 ms':>10} {'p95 ms':>10} {'ops/s':>10}")
+    for nombre, r in resultados.items():
+        print(f"{nombre:<45} {r['p50_ms']:>10.3f} {r['p95_ms']:>10.3f} {r['ops_s'] or 0:>10.1f}")
+    print(f"\n✅ Resultados guardados en {salida}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,14 +7,80 @@ Servidor FastAPI standalone para SyntexIA CRM.
 Ejecutar con: python main.py
 """
 
+import asyncio
+import os
 import uvicorn
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from src.interface.crm_api import router as crm_router
-from src.config.logger import get_logger
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from src.interface.crm_api import router as crm_router, crm_repo_async, trazador_sql
+from src.interface.middleware_metricas import MiddlewareMetricas
+from src.interface.middleware_trazas_sql import MiddlewareTrazasSQL, router_trazas_sql
+from src.config.metricas import registro as registro_metricas, METRICAS_ACTIVAS
+from src.config.logger import get_logger, iniciar_logging, detener_logging
 
 logger = get_logger("Main")
 
+# Cada cuánto se recalculan desde cero los contadores de /api/crm/resumen y las estadísticas por cliente
+RESUMEN_RECONCILIACION_SEGUNDOS = int(os.getenv("RESUMEN_RECONCILIACION_SEGUNDOS", "3600"))
+
+# Cada cuánto se puntúa la salud de todos los clientes (0 = nunca; también: python -m src.repositories.salud_clientes)
+SALUD_INTERVALO_SEGUNDOS = int(os.getenv("SALUD_INTERVALO_SEGUNDOS", "86400"))
+
+# Comprimir con gzip las respuestas de al menos N bytes (0 = sin compresión)
+GZIP_MIN_BYTES = int(os.getenv("GZIP_MIN_BYTES", "0"))
+GZIP_NIVEL = int(os.getenv("GZIP_NIVEL", "5"))
+
+# =====================================================
+# TAREAS EN SEGUNDO PLANO
+# =====================================================
+
+async def reconciliar_resumen_periodicamente():
+    """Corregir la deriva de los contadores incrementales (resumen y estadísticas por cliente)"""
+    while True:
+        await asyncio.sleep(RESUMEN_RECONCILIACION_SEGUNDOS)
+        try:
+            await crm_repo_async.recalcular_resumen()
+            await crm_repo_async.recalcular_estadisticas_clientes()
+        except Exception as e:
+            logger.error(f"❌ Error recalculando resumen: {e}")
+
+
+async def puntuar_salud_periodicamente():
+    """Puntuar la salud de los clientes y refrescar sus días sin contacto"""
+    while True:
+        await asyncio.sleep(SALUD_INTERVALO_SEGUNDOS)
+        try:
+            await crm_repo_async.puntuar_salud_clientes()
+        except Exception as e:
+            logger.error(f"❌ Error puntuando la salud de los clientes: {e}")
+
+
+# =====================================================
+# CICLO DE VIDA
+# =====================================================
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Arranque y apagado del servidor"""
+    iniciar_logging()
+    logger.info("🚀 SyntexIA CRM Standalone iniciado")
+    logger.info("📍 Documentación disponible en: http://localhost:8000/docs")
+    tareas = [asyncio.create_task(reconciliar_resumen_periodicamente())]
+    if SALUD_INTERVALO_SEGUNDOS > 0:
+        tareas.append(asyncio.create_task(puntuar_salud_periodicamente()))
+    yield
+    for tarea in tareas:
+        tarea.cancel()
+    # Esperar a las operaciones en curso y cerrar las conexiones SQLite
+    crm_repo_async.cerrar()
+    logger.info("🛑 SyntexIA CRM Standalone detenido")
+    # Volcar al fichero los registros aún en la cola
+    detener_logging()
+
+
 # =====================================================
 # CONFIGURACIÓN FASTAPI
 # =====================================================
@@ -24,7 +90,8 @@ app = FastAPI(
     description="📊 Sistema de Gestión de Relaciones con Clientes (CRM) - Independiente",
     version="1.0.0",
     docs_url="/docs",
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    lifespan=lifespan
 )
 
 # =====================================================
@@ -39,6 +106,47 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# =====================================================
+# MIDDLEWARE GZIP
+# =====================================================
+
+# Solo si el cliente envía Accept-Encoding: gzip; niveles altos cuestan mucha CPU
+if GZIP_MIN_BYTES > 0:
+    app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_BYTES, compresslevel=GZIP_NIVEL)
+
+# =====================================================
+# MIDDLEWARE TRAZAS SQL Y MÉTRICAS
+# =====================================================
+
+# Trazas SQL por petición (SQL_TRAZAS=1 y cabecera X-Trazar-SQL: 1)
+if trazador_sql and trazador_sql.trazas_peticion:
+    app.add_middleware(MiddlewareTrazasSQL, trazador=trazador_sql)
+
+# Se añade el último: es el más externo y mide también CORS
+if METRICAS_ACTIVAS:
+    app.add_middleware(MiddlewareMetricas)
+
+# Estado de caché, pool y cola de actividades, leído al exportar
+registro_metricas.recolector(
+    "crm_cache_clientes_eventos_total", "counter", "Eventos de la caché de clientes",
+    lambda: [
+        ({"evento": evento}, valor) for evento, valor in crm_repo_async.estadisticas_cache().items()
+        if evento in ("hits", "misses", "desalojos", "expiradas", "invalidaciones")
+    ]
+)
+registro_metricas.recolector(
+    "crm_pool_conexiones", "gauge", "Conexiones SQLite del pool",
+    lambda: [
+        ({"estado": "abiertas"}, crm_repo_async.sync.estadisticas_pool()["conexiones_abiertas"]),
+        ({"estado": "libres"}, crm_repo_async.sync.estadisticas_pool()["conexiones_libres"]),
+    ]
+)
+if crm_repo_async.cola_actividades:
+    registro_metricas.recolector(
+        "crm_cola_actividades_pendientes", "gauge", "Actividades encoladas pendientes de escribir",
+        lambda: [({}, crm_repo_async.cola_actividades.estadisticas()["pendientes"])]
+    )
+
 # =====================================================
 # REGISTRO DE ROUTERS
 # =====================================================
@@ -61,32 +169,34 @@ def root():
 
 
 @app.get("/health", tags=["Health"])
-def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy", "service": "SyntexIA CRM"}
+async def health_check():
+    """Health check endpoint (incluye el estado del pool de conexiones)"""
+    try:
+        database = await crm_repo_async.verificar_salud()
+    except Exception as e:
+        logger.error(f"❌ Health check de base de datos fallido: {e}")
+        return JSONResponse(
+            status_code=503,
+            content={"status": "unhealthy", "service": "SyntexIA CRM", "database": {"saludable": False}}
+        )
 
+    return {"status": "healthy", "service": "SyntexIA CRM", "database": database}
 
-@app.get("/api/version", tags=["Info"])
-def get_version():
-    """Obtener versión del servidor"""
-    return {"version": "1.0.0", "name": "SyntexIA CRM Standalone"}
 
+@app.get("/metrics", tags=["Health"], response_class=PlainTextResponse)
+def metricas():
+    """Métricas en formato de texto de Prometheus (latencias por ruta y por método del repositorio)"""
+    return PlainTextResponse(registro_metricas.exportar(), media_type="text/plain; version=0.0.4")
 
-# =====================================================
-# EVENT HANDLERS
-# =====================================================
 
-@app.on_event("startup")
-async def startup_event():
-    """Ejecutar al iniciar el servidor"""
-    logger.info("🚀 SyntexIA CRM Standalone iniciado")
-    logger.info("📍 Documentación disponible en: http://localhost:8000/docs")
+if trazador_sql and trazador_sql.trazas_peticion:
+    app.include_router(router_trazas_sql(trazador_sql))
 
 
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Ejecutar al detener el servidor"""
-    logger.info("🛑 SyntexIA CRM Standalone detenido")
+@app.get("/api/version", tags=["Info"])
+def get_version():
+    """Obtener versión del servidor"""
+    return {"version": "1.0.0", "name": "SyntexIA CRM Standalone"}
 
 
 # =====================================================
@@ -1,28 +1,121 @@
+import atexit
+import json
 import logging
-from logging.handlers import RotatingFileHandler
 import os
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
 # 📁 Asegura que exista el directorio de logs
 base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
 log_dir = os.path.join(base_dir, "logs")
 os.makedirs(log_dir, exist_ok=True)
 
-# 📄 Archivo principal de log
-log_file = os.path.join(log_dir, "crm.log")
+# 📄 Archivo principal de log (LOG_FILE relativo a la raíz del proyecto)
+log_file = os.path.join(base_dir, os.getenv("LOG_FILE", os.path.join("logs", "crm.log")))
+os.makedirs(os.path.dirname(log_file), exist_ok=True)
 
-# ⚙️ Configuración de logging rotativo
-logger = logging.getLogger("SyntexIA-CRM")
-logger.setLevel(logging.INFO)
+# ⚙️ Niveles: LOG_LEVEL global y LOG_NIVELES por logger ("CRM-Repository=WARNING,SQL-Trazas=INFO")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_NIVELES = os.getenv("LOG_NIVELES", "")
 
-handler = RotatingFileHandler(log_file, maxBytes=2_000_000, backupCount=5)
-formatter = logging.Formatter(
+# 🎲 De los mensajes "[OK] ..." (uno por petición) se escribe 1 de cada N
+LOG_MUESTREO_OK = max(int(os.getenv("LOG_MUESTREO_OK", "1")), 1)
+
+# 🧾 Formato del fichero: "texto" o "json" (una línea JSON por registro)
+LOG_FORMATO = os.getenv("LOG_FORMATO", "texto")
+
+
+class FormateadorJSON(logging.Formatter):
+    """Un objeto JSON por línea, para ingestión en herramientas de logs"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        datos = {
+            "fecha": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensaje": record.getMessage(),
+        }
+        if record.exc_info:
+            datos["excepcion"] = self.formatException(record.exc_info)
+        return json.dumps(datos, ensure_ascii=False)
+
+
+class FiltroMuestreo(logging.Filter):
+    """Deja pasar 1 de cada `cada` mensajes "[OK]"; el resto de mensajes, siempre"""
+
+    def __init__(self, cada: int):
+        super().__init__()
+        self.cada = cada
+        self._vistos = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.cada == 1 or record.levelno > logging.INFO or not str(record.msg).startswith("[OK]"):
+            return True
+        # Contador sin lock: un desfase ocasional entre hilos solo altera la muestra
+        self._vistos += 1
+        return self._vistos % self.cada == 1
+
+
+class ManejadorCola(QueueHandler):
+    """
+    QueueHandler que no formatea en el hilo que registra.
+
+    El QueueHandler estándar formatea el mensaje antes de encolarlo (pensado
+    para colas entre procesos). Aquí la cola es en memoria, así que el
+    registro viaja tal cual y se formatea en el hilo del QueueListener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+formatter = FormateadorJSON() if LOG_FORMATO == "json" else logging.Formatter(
     "%(asctime)s — [%(levelname)s] — %(name)s — %(message)s",
     datefmt="%Y-%m-%d %H:%M:%S",
 )
+
+handler = RotatingFileHandler(log_file, maxBytes=2_000_000, backupCount=5)
 handler.setFormatter(formatter)
 
+# 🧵 El fichero se escribe (y rota) en un hilo aparte; las peticiones solo encolan
+log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+listener = QueueListener(log_queue, handler, respect_handler_level=True)
+
+logger = logging.getLogger("SyntexIA-CRM")
+logger.setLevel(LOG_LEVEL)
+
 if not logger.handlers:
-    logger.addHandler(handler)
+    queue_handler = ManejadorCola(log_queue)
+    queue_handler.addFilter(FiltroMuestreo(LOG_MUESTREO_OK))
+    logger.addHandler(queue_handler)
+
+for ajuste in filter(None, (parte.strip() for parte in LOG_NIVELES.split(","))):
+    nombre, _, nivel = ajuste.partition("=")
+    logger.getChild(nombre.strip()).setLevel(nivel.strip().upper())
+
+
+_escritor_activo = False
+
+
+def iniciar_logging():
+    """Arrancar el hilo escritor (idempotente; también se arranca al importar)"""
+    global _escritor_activo
+    if not _escritor_activo:
+        listener.start()
+        _escritor_activo = True
+
+
+def detener_logging():
+    """Escribir los registros pendientes y parar el hilo escritor"""
+    global _escritor_activo
+    if _escritor_activo:
+        listener.stop()
+        _escritor_activo = False
+
+
+iniciar_logging()
+atexit.register(detener_logging)
+
 
 def get_logger(name="SyntexIA-CRM"):
     return logger.getChild(name)
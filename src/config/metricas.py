@@ -0,0 +1,252 @@
+# =====================================================
+# 📈 SyntexIA CRM — Métricas en Formato Prometheus
+# =====================================================
+"""
+Registro de métricas en proceso (contadores, indicadores e histogramas)
+exportable en el formato de texto de Prometheus (`GET /metrics`).
+
+Los histogramas usan buckets fijos: observar un valor es una búsqueda
+binaria y tres sumas bajo un lock, sin reservar memoria en el camino
+caliente. Los percentiles (p50/p95/p99) se calculan en Prometheus con
+`histogram_quantile` sobre los buckets.
+"""
+
+import functools
+import inspect
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+# METRICAS_ACTIVAS=0 desactiva el middleware y los temporizadores del repositorio
+METRICAS_ACTIVAS = os.getenv("METRICAS_ACTIVAS", "1") == "1"
+
+# Latencias (segundos): de 0,25 ms a 10 s
+BUCKETS_SEGUNDOS = (
+    0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+# Tamaños de respuesta (bytes): de 256 B a 16 MB
+BUCKETS_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# Muestras de un recolector: [(etiquetas, valor)]
+Muestras = List[Tuple[Dict[str, str], float]]
+
+
+def _escapar(valor: Any) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _formatear_etiquetas(nombres: Sequence[str], valores: Sequence[Any], extra: str = "") -> str:
+    partes = [f'{nombre}="{_escapar(valor)}"' for nombre, valor in zip(nombres, valores)]
+    if extra:
+        partes.append(extra)
+    return "{" + ",".join(partes) + "}" if partes else ""
+
+
+def _formatear_numero(valor: float) -> str:
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class _Metrica:
+    """Base: nombre, ayuda, nombres de etiquetas y valores por combinación de etiquetas"""
+
+    tipo = ""
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores: Dict[tuple, Any] = {}
+        self._lock = threading.Lock()
+
+    def _cabecera(self) -> List[str]:
+        return [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+
+    def exportar(self) -> List[str]:
+        with self._lock:
+            valores = list(self._valores.items())
+        return self._cabecera() + [
+            f"{self.nombre}{_formatear_etiquetas(self.etiquetas, clave)} {_formatear_numero(valor)}"
+            for clave, valor in valores
+        ]
+
+
+class Contador(_Metrica):
+    """Valor que solo crece (peticiones, errores)"""
+
+    tipo = "counter"
+
+    def incrementar(self, *etiquetas: Any, valor: float = 1):
+        with self._lock:
+            self._valores[etiquetas] = self._valores.get(etiquetas, 0) + valor
+
+
+class Indicador(_Metrica):
+    """Valor que sube y baja (peticiones en vuelo)"""
+
+    tipo = "gauge"
+
+    def sumar(self, delta: float, *etiquetas: Any):
+        with self._lock:
+            self._valores[etiquetas] = self._valores.get(etiquetas, 0) + delta
+
+
+class Histograma(_Metrica):
+    """Distribución en buckets fijos, con suma y número de observaciones"""
+
+    tipo = "histogram"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = (), buckets: Sequence[float] = BUCKETS_SEGUNDOS):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.buckets = tuple(sorted(buckets))
+
+    def observar(self, valor: float, *etiquetas: Any):
+        # Índice del primer bucket con límite >= valor (el último es +Inf)
+        indice = bisect_left(self.buckets, valor)
+        with self._lock:
+            estado = self._valores.get(etiquetas)
+            if estado is None:
+                estado = self._valores[etiquetas] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            estado[0][indice] += 1
+            estado[1] += valor
+            estado[2] += 1
+
+    def exportar(self) -> List[str]:
+        with self._lock:
+            valores = [(clave, (list(cuentas), suma, n)) for clave, (cuentas, suma, n) in self._valores.items()]
+
+        lineas = self._cabecera()
+        for clave, (cuentas, suma, n) in valores:
+            acumulado = 0
+            for limite, cuenta in zip(self.buckets + (float("inf"),), cuentas):
+                acumulado += cuenta
+                le = f'le="{_formatear_numero(float(limite))}"'
+                lineas.append(f"{self.nombre}_bucket{_formatear_etiquetas(self.etiquetas, clave, le)} {acumulado}")
+            etiquetas = _formatear_etiquetas(self.etiquetas, clave)
+            lineas.append(f"{self.nombre}_sum{etiquetas} {_formatear_numero(suma)}")
+            lineas.append(f"{self.nombre}_count{etiquetas} {n}")
+        return lineas
+
+
+class RegistroMetricas:
+    """Conjunto de métricas de la aplicación y de recolectores evaluados al exportar"""
+
+    def __init__(self):
+        self._metricas: Dict[str, _Metrica] = {}
+        self._recolectores: List[Tuple[str, str, str, Callable[[], Muestras]]] = []
+        self._lock = threading.Lock()
+
+    def _registrar(self, metrica: _Metrica) -> Any:
+        with self._lock:
+            existente = self._metricas.get(metrica.nombre)
+            if existente is not None:
+                # Registrar dos veces devuelve la misma métrica (reimportaciones)
+                return existente
+            self._metricas[metrica.nombre] = metrica
+            return metrica
+
+    def contador(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()) -> Contador:
+        return self._registrar(Contador(nombre, ayuda, etiquetas))
+
+    def indicador(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()) -> Indicador:
+        return self._registrar(Indicador(nombre, ayuda, etiquetas))
+
+    def histograma(
+        self, nombre: str, ayuda: str, etiquetas: Sequence[str] = (), buckets: Sequence[float] = BUCKETS_SEGUNDOS
+    ) -> Histograma:
+        return self._registrar(Histograma(nombre, ayuda, etiquetas, buckets))
+
+    def recolector(self, nombre: str, tipo: str, ayuda: str, funcion: Callable[[], Muestras]):
+        """
+        Métrica calculada al exportar (estado de caché, cola, pool...).
+
+        Args:
+            funcion: Devuelve [(etiquetas, valor)]; si falla, la métrica se omite
+        """
+        with self._lock:
+            self._recolectores = [r for r in self._recolectores if r[0] != nombre]
+            self._recolectores.append((nombre, tipo, ayuda, funcion))
+
+    def exportar(self) -> str:
+        """Todas las métricas en formato de texto de Prometheus"""
+        with self._lock:
+            metricas = list(self._metricas.values())
+            recolectores = list(self._recolectores)
+
+        lineas: List[str] = []
+        for metrica in metricas:
+            lineas.extend(metrica.exportar())
+
+        for nombre, tipo, ayuda, funcion in recolectores:
+            try:
+                muestras = funcion()
+            except Exception:
+                continue
+            lineas.append(f"# HELP {nombre} {ayuda}")
+            lineas.append(f"# TYPE {nombre} {tipo}")
+            for etiquetas, valor in muestras:
+                lineas.append(
+                    f"{nombre}{_formatear_etiquetas(list(etiquetas), list(etiquetas.values()))} {_formatear_numero(valor)}"
+                )
+
+        return "\n".join(lineas) + "\n"
+
+
+# Registro global de la aplicación
+registro = RegistroMetricas()
+
+# =====================================================
+# TEMPORIZADORES DEL REPOSITORIO
+# =====================================================
+
+duracion_repositorio = registro.histograma(
+    "crm_repositorio_duracion_segundos",
+    "Duración de los métodos de CRMRepository",
+    ["metodo"],
+)
+errores_repositorio = registro.contador(
+    "crm_repositorio_errores_total",
+    "Excepciones lanzadas por los métodos de CRMRepository",
+    ["metodo", "excepcion"],
+)
+
+
+def _temporizado(nombre: str, funcion: Callable) -> Callable:
+    @functools.wraps(funcion)
+    def envoltorio(*args: Any, **kwargs: Any) -> Any:
+        inicio = time.perf_counter()
+        try:
+            return funcion(*args, **kwargs)
+        except Exception as e:
+            errores_repositorio.incrementar(nombre, type(e).__name__)
+            raise
+        finally:
+            duracion_repositorio.observar(time.perf_counter() - inicio, nombre)
+
+    return envoltorio
+
+
+def instrumentado(excluir: Iterable[str] = ()) -> Callable[[type], type]:
+    """
+    Decorador de clase: mide cada método público definido en la clase.
+
+    Las llamadas anidadas (un método que llama a otro) se miden cada una
+    por separado. Para los métodos que devuelven un iterador perezoso
+    solo se mide la preparación, no el consumo.
+    """
+    excluir = set(excluir)
+
+    def decorar(cls: type) -> type:
+        if not METRICAS_ACTIVAS:
+            return cls
+        for nombre, valor in list(vars(cls).items()):
+            if nombre.startswith("_") or nombre in excluir or not inspect.isfunction(valor):
+                continue
+            setattr(cls, nombre, _temporizado(nombre, valor))
+        return cls
+
+    return decorar
@@ -10,29 +10,142 @@ Endpoints completos para gestión de CRM:
 - Estadísticas
 """
 
-from fastapi import APIRouter, HTTPException, Query, Depends
-from typing import Optional, List
+import csv
+import io
+import json
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import APIRouter, HTTPException, Query, Body, Depends, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from typing import Optional, List, AsyncIterator, Any, Union
 from src.repositories.crm_repository import CRMRepository
+from src.repositories.async_crm_repository import AsyncCRMRepository
+from src.repositories.cola_actividades import ColaActividades, ColaLlena
+from src.repositories.trazas_sql import TrazadorSQL
+from src.interface.respuestas import RespuestaJSON, respuesta_json
 from src.models.crm_models import (
-    Cliente, ClienteCreate, ClienteUpdate, ContactoSchema,
-    ActividadSchema, OportunidadSchema, ResumenCRM
+    Cliente, ClienteCreate, ClienteUpdate, ClienteParcial, ContactoSchema,
+    ActividadSchema, OportunidadSchema, ResumenCRM, ListaClientes,
+    ListaOportunidades, PipelineOportunidades, EstadisticasCliente, ListaActividades
 )
 from src.config.logger import get_logger
 
 logger = get_logger("CRM-API")
 
+# Actividades por lectura al enviar el historial completo en NDJSON
+TAMANO_PAGINA_HISTORIAL = 1000
+
 # Inicializar router y repositorio
-router = APIRouter(prefix="/api/crm", tags=["CRM"])
-crm_repo = CRMRepository(db_path="crm.db")
+# Las respuestas se serializan con pydantic-core (ver src/interface/respuestas.py)
+router = APIRouter(prefix="/api/crm", tags=["CRM"], default_response_class=RespuestaJSON)
+# Instrumentación SQL (opcional): log de sentencias lentas y trazas por petición
+trazador_sql = TrazadorSQL(
+    umbral_lenta_ms=float(os.getenv("SQL_LENTA_MS", "0")),
+    trazas_peticion=os.getenv("SQL_TRAZAS", "0") == "1"
+) if float(os.getenv("SQL_LENTA_MS", "0")) > 0 or os.getenv("SQL_TRAZAS", "0") == "1" else None
+crm_repo = CRMRepository(
+    db_path=os.getenv("DATABASE_PATH", "crm.db"),
+    pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+    cache_clientes=int(os.getenv("CACHE_CLIENTES", "1000")),
+    cache_ttl=float(os.getenv("CACHE_CLIENTES_TTL", "30")),
+    cache_pipeline_ttl=float(os.getenv("CACHE_PIPELINE_TTL", "10")),
+    trazador=trazador_sql
+)
+# Ingesta de actividades con commits agrupados (opcional)
+cola_actividades = ColaActividades(
+    crm_repo,
+    max_lote=int(os.getenv("ACTIVIDADES_LOTE_MAX", "500")),
+    max_espera_ms=float(os.getenv("ACTIVIDADES_ESPERA_MS", "2"))
+) if os.getenv("ACTIVIDADES_GROUP_COMMIT", "0") == "1" else None
+# Operaciones de base de datos simultáneas (por defecto, DB_POOL_SIZE)
+crm_repo_async = AsyncCRMRepository(
+    crm_repo,
+    max_en_vuelo=int(os.getenv("DB_MAX_EN_VUELO", "0")) or None,
+    cola_actividades=cola_actividades
+)
 
 
 # =====================================================
 # UTILIDADES
 # =====================================================
 
-def get_crm_repo():
-    """Inyector de dependencia para repositorio"""
-    return crm_repo
+async def get_crm_repo():
+    """Inyector de dependencia para repositorio (async: no pasa por el threadpool)"""
+    return crm_repo_async
+
+
+def lista_parametro(valor: Optional[str]) -> Optional[List[str]]:
+    """`"a, b"` -> `["a", "b"]`; sin parámetro -> None; vacío -> []"""
+    if valor is None:
+        return None
+    return [parte.strip() for parte in valor.split(",") if parte.strip()]
+
+
+def etag_coincide(if_none_match: Optional[str], etag: str) -> bool:
+    """¿Alguna etiqueta de `If-None-Match` coincide con `etag`? (comparación débil)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (etiqueta.strip().removeprefix("W/") for etiqueta in if_none_match.split(","))
+
+
+def no_modificado_desde(if_modified_since: Optional[str], ultima_modificacion: datetime) -> bool:
+    """¿`ultima_modificacion` (UTC) es anterior o igual a `If-Modified-Since`?"""
+    if not if_modified_since:
+        return False
+    try:
+        fecha = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if fecha.tzinfo is None:
+        fecha = fecha.replace(tzinfo=timezone.utc)
+    # Las fechas HTTP no tienen fracciones de segundo
+    return ultima_modificacion.replace(tzinfo=timezone.utc, microsecond=0) <= fecha
+
+
+async def leer_registros_json(request: Request) -> AsyncIterator[tuple[int, Any]]:
+    """
+    Iterar los registros de un cuerpo JSON (array) o NDJSON (uno por línea).
+
+    El NDJSON se procesa según llega, sin cargar el cuerpo entero en memoria.
+    Cada registro se entrega como (índice, objeto); una línea que no es JSON
+    válido se entrega como (índice, ValueError).
+    """
+    content_type = request.headers.get("content-type", "")
+
+    if "ndjson" not in content_type and "jsonlines" not in content_type:
+        try:
+            datos = json.loads(await request.body())
+        except ValueError:
+            raise HTTPException(status_code=400, detail="El cuerpo no es JSON válido")
+        if not isinstance(datos, list):
+            raise HTTPException(status_code=400, detail="Se esperaba un array JSON de clientes")
+        for indice, registro in enumerate(datos):
+            yield indice, registro
+        return
+
+    indice = 0
+    pendiente = b""
+    async for trozo in request.stream():
+        pendiente += trozo
+        *lineas, pendiente = pendiente.split(b"\n")
+        for linea in lineas:
+            if not linea.strip():
+                continue
+            try:
+                yield indice, json.loads(linea)
+            except ValueError as e:
+                yield indice, e
+            indice += 1
+
+    if pendiente.strip():
+        try:
+            yield indice, json.loads(pendiente)
+        except ValueError as e:
+            yield indice, e
 
 
 # =====================================================
@@ -40,7 +153,7 @@ def get_crm_repo():
 # =====================================================
 
 @router.post("/clientes", response_model=Cliente, status_code=201)
-def crear_cliente(cliente_data: ClienteCreate, repo: CRMRepository = Depends(get_crm_repo)):
+async def crear_cliente(cliente_data: ClienteCreate, repo: AsyncCRMRepository = Depends(get_crm_repo)):
     """
     Crear nuevo cliente
     
@@ -53,7 +166,7 @@ def crear_cliente(cliente_data: ClienteCreate, repo: CRMRepository = Depends(get
     **Respuesta:** Cliente creado con ID
     """
     try:
-        return repo.crear_cliente(cliente_data)
+        return respuesta_json(await repo.crear_cliente(cliente_data), status_code=201)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -61,14 +174,79 @@ def crear_cliente(cliente_data: ClienteCreate, repo: CRMRepository = Depends(get
         raise HTTPException(status_code=500, detail="Error al crear cliente")
 
 
-@router.get("/clientes", response_model=dict)
-def listar_clientes(
+@router.post("/clientes/bulk", response_model=dict)
+async def importar_clientes(
+    request: Request,
+    tamano_lote: int = Query(1000, ge=1, le=10000),
+    repo: AsyncCRMRepository = Depends(get_crm_repo)
+):
+    """
+    Importación masiva de clientes
+    
+    Acepta un array JSON de `ClienteCreate` o NDJSON (`Content-Type:
+    application/x-ndjson`, un cliente por línea). Los clientes se insertan
+    en lotes de `tamano_lote` por transacción.
+    
+    **Respuesta:** Número de clientes creados y errores por registro
+    (validación, email/CIF duplicado) sin abortar el resto
+    """
+    total = 0
+    creados = 0
+    errores = []
+    lote = []
+
+    async def insertar_lote():
+        nonlocal creados
+        creados_lote, errores_lote = await repo.importar_clientes(
+            [cliente for _, cliente in lote], tamano_lote
+        )
+        creados += creados_lote
+        # Traducir el índice dentro del lote al índice del registro en la petición
+        errores.extend(
+            {"indice": lote[error["indice"]][0], "error": error["error"]} for error in errores_lote
+        )
+        lote.clear()
+
+    try:
+        async for indice, registro in leer_registros_json(request):
+            total += 1
+            if isinstance(registro, Exception):
+                errores.append({"indice": indice, "error": f"JSON no válido: {registro}"})
+                continue
+            try:
+                lote.append((indice, ClienteCreate.model_validate(registro)))
+            except ValidationError as e:
+                errores.append({"indice": indice, "error": str(e)})
+                continue
+
+            if len(lote) >= tamano_lote:
+                await insertar_lote()
+
+        if lote:
+            await insertar_lote()
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Error importando clientes: {e}")
+        raise HTTPException(status_code=500, detail="Error al importar clientes")
+
+    errores.sort(key=lambda error: error["indice"])
+    return respuesta_json({"total": total, "creados": creados, "errores": errores})
+
+
+@router.get("/clientes", response_model=ListaClientes)
+async def listar_clientes(
+    request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
     estado: Optional[str] = Query(None),
     segmento: Optional[str] = Query(None),
     buscar: Optional[str] = Query(None),
-    repo: CRMRepository = Depends(get_crm_repo)
+    cursor: Optional[str] = Query(None),
+    contar: str = Query("exacto", pattern="^(exacto|estimado|no)$"),
+    fields: Optional[str] = Query(None, description="Columnas separadas por comas (id siempre incluido)"),
+    expand: Optional[str] = Query(None, description="Relaciones a incluir: contactos, actividades_recientes, oportunidades"),
+    repo: AsyncCRMRepository = Depends(get_crm_repo)
 ):
     """
     Listar clientes con paginación y filtros
@@ -78,41 +256,105 @@ def listar_clientes(
     - `limit`: Máximo registros a devolver
     - `estado`: Filtrar por estado (prospecto, activo, inactivo, bloqueado)
     - `segmento`: Filtrar por segmento
-    - `buscar`: Buscar por nombre, email o razón social
+    - `buscar`: Buscar por nombre, email o razón social (por prefijo, sin acentos, ordenado por relevancia)
+    - `cursor`: Valor `next_cursor` de la página anterior (paginación por cursor)
+    - `contar`: `exacto`, `estimado` o `no` (omitir el total)
+    - `fields`: Solo estas columnas, p. ej. `id,nombre_completo,estado`
+    - `expand`: Solo estas relaciones (vacío = ninguna); con `fields` y sin
+      `expand` no se carga ninguna relación
     
-    **Respuesta:** Lista de clientes + total
+    **Respuesta:** Lista de clientes + total + `next_cursor`. Admite
+    `If-None-Match` / `If-Modified-Since` (304 si ningún cliente cambió)
     """
     try:
-        clientes, total = repo.listar_clientes(skip, limit, estado, segmento, buscar)
-        return {
+        etag, ultima_modificacion = await repo.version_clientes()
+        cabeceras = {
+            "ETag": etag,
+            "Last-Modified": format_datetime(ultima_modificacion.replace(tzinfo=timezone.utc), usegmt=True),
+            "Cache-Control": "no-cache"
+        }
+        # If-Modified-Since solo cuenta si no hay If-None-Match (RFC 9110)
+        if_none_match = request.headers.get("if-none-match")
+        if etag_coincide(if_none_match, etag) or (
+            if_none_match is None
+            and no_modificado_desde(request.headers.get("if-modified-since"), ultima_modificacion)
+        ):
+            return Response(status_code=304, headers=cabeceras)
+
+        campos = lista_parametro(fields)
+        expandir = lista_parametro(expand)
+        if campos is not None and expandir is None:
+            expandir = []
+
+        clientes, total, next_cursor = await repo.listar_clientes(
+            skip, limit, estado, segmento, buscar, cursor_pagina=cursor, contar=contar,
+            campos=campos, expandir=expandir
+        )
+        if campos is not None or expandir is not None:
+            clientes = [cliente.model_dump(exclude_unset=True) for cliente in clientes]
+        return respuesta_json({
             "clientes": clientes,
             "total": total,
             "skip": skip,
-            "limit": limit
-        }
+            "limit": limit,
+            "next_cursor": next_cursor
+        }, headers=cabeceras)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"❌ Error listando clientes: {e}")
         raise HTTPException(status_code=500, detail="Error al listar clientes")
 
 
-@router.get("/clientes/{cliente_id}", response_model=Cliente)
-def obtener_cliente(cliente_id: str, repo: CRMRepository = Depends(get_crm_repo)):
+@router.get("/clientes/{cliente_id}", response_model=Union[Cliente, ClienteParcial])
+async def obtener_cliente(
+    cliente_id: str,
+    request: Request,
+    fields: Optional[str] = Query(None, description="Columnas separadas por comas (id siempre incluido)"),
+    expand: Optional[str] = Query(None, description="Relaciones a incluir: contactos, actividades_recientes, oportunidades"),
+    repo: AsyncCRMRepository = Depends(get_crm_repo)
+):
     """
     Obtener cliente por ID con todos sus datos relacionados
     
-    Incluye: contactos, actividades recientes, oportunidades
+    Incluye: contactos, actividades recientes, oportunidades. Devuelve
+    `ETag`; con `If-None-Match` responde 304 sin cargar el cliente.
+    Con `fields` / `expand` devuelve solo las columnas y relaciones pedidas
+    (mismas reglas que el listado)
     """
-    cliente = repo.obtener_cliente(cliente_id)
+    etag = await repo.etag_cliente(cliente_id)
+    if etag is None:
+        raise HTTPException(status_code=404, detail="Cliente no encontrado")
+
+    cabeceras = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_coincide(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=cabeceras)
+
+    campos = lista_parametro(fields)
+    expandir = lista_parametro(expand)
+    if campos is not None or expandir is not None:
+        try:
+            parcial = await repo.obtener_cliente_parcial(
+                cliente_id, campos, [] if campos is not None and expandir is None else expandir
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if not parcial:
+            raise HTTPException(status_code=404, detail="Cliente no encontrado")
+        return respuesta_json(parcial.model_dump(exclude_unset=True), headers=cabeceras)
+
+    # El ETag de la respuesta es el del cuerpo servido (puede venir de la caché)
+    cliente, etag = await repo.obtener_cliente_con_etag(cliente_id)
     if not cliente:
         raise HTTPException(status_code=404, detail="Cliente no encontrado")
-    return cliente
+    return respuesta_json(cliente, headers={**cabeceras, "ETag": etag})
 
 
 @router.put("/clientes/{cliente_id}", response_model=Cliente)
-def actualizar_cliente(
+async def actualizar_cliente(
     cliente_id: str,
     cliente_data: ClienteUpdate,
-    repo: CRMRepository = Depends(get_crm_repo)
+    repo: AsyncCRMRepository = Depends(get_crm_repo)
 ):
     """
     Actualizar datos del cliente
@@ -120,39 +362,41 @@ def actualizar_cliente(
     Solo actualiza los campos proporcionados (parcial)
     """
     try:
-        cliente = repo.obtener_cliente(cliente_id)
+        cliente = await repo.obtener_cliente(cliente_id)
         if not cliente:
             raise HTTPException(status_code=404, detail="Cliente no encontrado")
         
-        return repo.actualizar_cliente(cliente_id, cliente_data)
+        return respuesta_json(await repo.actualizar_cliente(cliente_id, cliente_data))
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Error actualizando cliente: {e}")
         raise HTTPException(status_code=500, detail="Error al actualizar cliente")
 
 
 @router.delete("/clientes/{cliente_id}", status_code=204)
-def eliminar_cliente(cliente_id: str, repo: CRMRepository = Depends(get_crm_repo)):
+async def eliminar_cliente(cliente_id: str, repo: AsyncCRMRepository = Depends(get_crm_repo)):
     """
     Eliminar cliente (y sus datos relacionados)
     
     **Advertencia:** Esta acción es irreversible
     """
-    cliente = repo.obtener_cliente(cliente_id)
+    cliente = await repo.obtener_cliente(cliente_id)
     if not cliente:
         raise HTTPException(status_code=404, detail="Cliente no encontrado")
     
-    repo.eliminar_cliente(cliente_id)
+    await repo.eliminar_cliente(cliente_id)
 
 
 # =====================================================
 # ENDPOINTS CONTACTOS
 # =====================================================
 
-@router.post("/clientes/{cliente_id}/contactos", status_code=201)
-def agregar_contacto(
+@router.post("/clientes/{cliente_id}/contactos", response_model=ContactoSchema, status_code=201)
+async def agregar_contacto(
     cliente_id: str,
     contacto: ContactoSchema,
-    repo: CRMRepository = Depends(get_crm_repo)
+    repo: AsyncCRMRepository = Depends(get_crm_repo)
 ):
     """
     Agregar contacto a un cliente
@@ -160,79 +404,137 @@ def agregar_contacto(
     **Tipos de contacto:** email, telefono, movil, direccion
     """
     try:
-        cliente = repo.obtener_cliente(cliente_id)
-        if not cliente:
+        creado = await repo.crear_contacto(cliente_id, contacto)
+        if not creado:
             raise HTTPException(status_code=404, detail="Cliente no encontrado")
-        
-        # Usar el repositorio para crear el contacto
-        repo._crear_contacto(cliente_id, contacto)
-        
-        # Obtener el contacto creado
-        contactos = repo._obtener_contactos(cliente_id)
-        if contactos:
-            return contactos[-1]  # Retornar el último contacto creado
-        
-        return {"status": "ok", "message": "Contacto agregado"}
+        return respuesta_json(creado, status_code=201)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"[ERROR] Error agregando contacto: {e}")
         raise HTTPException(status_code=500, detail=f"Error al agregar contacto: {str(e)}")
 
 
 @router.get("/clientes/{cliente_id}/contactos", response_model=List[ContactoSchema])
-def listar_contactos(cliente_id: str, repo: CRMRepository = Depends(get_crm_repo)):
+async def listar_contactos(cliente_id: str, repo: AsyncCRMRepository = Depends(get_crm_repo)):
     """Obtener todos los contactos de un cliente"""
-    cliente = repo.obtener_cliente(cliente_id)
+    cliente = await repo.obtener_cliente(cliente_id)
     if not cliente:
         raise HTTPException(status_code=404, detail="Cliente no encontrado")
     
-    return repo._obtener_contactos(cliente_id)
+    return respuesta_json(await repo.obtener_contactos(cliente_id))
 
 
 # =====================================================
 # ENDPOINTS ACTIVIDADES
 # =====================================================
 
-@router.post("/clientes/{cliente_id}/actividades", response_model=ActividadSchema)
-def crear_actividad(
+@router.post("/clientes/{cliente_id}/actividades", response_model=ActividadSchema, status_code=201)
+async def crear_actividad(
     cliente_id: str,
     actividad: ActividadSchema,
-    repo: CRMRepository = Depends(get_crm_repo)
+    confirmacion: str = Query("commit", pattern="^(commit|cola)$"),
+    repo: AsyncCRMRepository = Depends(get_crm_repo)
 ):
     """
     Crear actividad/interacción para un cliente
     
     **Tipos de actividad:** llamada, email, reunion, tarea, nota, venta
+    
+    Con `ACTIVIDADES_GROUP_COMMIT=1` las actividades se escriben en lotes:
+    - `confirmacion=commit`: responde 201 tras el commit de su lote
+    - `confirmacion=cola`: responde 202 al encolarla (sin comprobar el
+      cliente; se pierde si el proceso cae antes del volcado)
     """
     try:
-        cliente = repo.obtener_cliente(cliente_id)
-        if not cliente:
+        esperar_commit = confirmacion == "commit" or repo.cola_actividades is None
+        creada = await repo.crear_actividad(cliente_id, actividad, esperar_commit=esperar_commit)
+        if not creada:
             raise HTTPException(status_code=404, detail="Cliente no encontrado")
-        
-        return repo.crear_actividad(cliente_id, actividad)
+        return respuesta_json(creada, status_code=201 if esperar_commit else 202)
+    except ColaLlena as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Error creando actividad: {e}")
         raise HTTPException(status_code=500, detail="Error al crear actividad")
 
 
 @router.get("/clientes/{cliente_id}/actividades", response_model=List[ActividadSchema])
-def listar_actividades(cliente_id: str, repo: CRMRepository = Depends(get_crm_repo)):
+async def listar_actividades(cliente_id: str, repo: AsyncCRMRepository = Depends(get_crm_repo)):
     """Obtener actividades recientes de un cliente"""
-    cliente = repo.obtener_cliente(cliente_id)
+    cliente = await repo.obtener_cliente(cliente_id)
     if not cliente:
         raise HTTPException(status_code=404, detail="Cliente no encontrado")
     
-    return repo._obtener_actividades(cliente_id, limit=20)
+    return respuesta_json(await repo.obtener_actividades(cliente_id, limit=20))
+
+
+@router.get("/clientes/{cliente_id}/actividades/historial", response_model=ListaActividades)
+async def historial_actividades(
+    cliente_id: str,
+    limit: int = Query(50, ge=1, le=500),
+    tipo: Optional[str] = Query(None, description="Tipos separados por comas"),
+    completada: Optional[bool] = Query(None),
+    responsable: Optional[str] = Query(None),
+    desde: Optional[datetime] = Query(None, description="Fecha desde (inclusive)"),
+    hasta: Optional[datetime] = Query(None, description="Fecha hasta (exclusiva)"),
+    cursor: Optional[str] = Query(None),
+    formato: str = Query("json", pattern="^(json|ndjson)$"),
+    repo: AsyncCRMRepository = Depends(get_crm_repo)
+):
+    """
+    Historial de actividades de un cliente (más recientes primero)
+    
+    **Filtros:** `tipo`, `completada`, `responsable`, `desde` / `hasta`
+    
+    - `formato=json`: página de `limit` actividades + `next_cursor` para
+      pedir la siguiente con `cursor`
+    - `formato=ndjson`: todas las actividades que cumplen los filtros
+      (desde `cursor` si se indica), una por línea, en streaming
+    """
+    if await repo.etag_cliente(cliente_id) is None:
+        raise HTTPException(status_code=404, detail="Cliente no encontrado")
+
+    filtros = {
+        "tipos": lista_parametro(tipo), "completada": completada,
+        "responsable": responsable, "desde": desde, "hasta": hasta
+    }
+    try:
+        actividades, next_cursor = await repo.listar_actividades(
+            cliente_id, TAMANO_PAGINA_HISTORIAL if formato == "ndjson" else limit,
+            cursor_pagina=cursor, **filtros
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if formato == "json":
+        return respuesta_json({"actividades": actividades, "limit": limit, "next_cursor": next_cursor})
+
+    async def lineas() -> AsyncIterator[bytes]:
+        # Una lectura corta por página: no se retiene una conexión durante la descarga
+        pagina, siguiente = actividades, next_cursor
+        while True:
+            yield b"".join(actividad.model_dump_json().encode() + b"\n" for actividad in pagina)
+            if siguiente is None:
+                break
+            pagina, siguiente = await repo.listar_actividades(
+                cliente_id, TAMANO_PAGINA_HISTORIAL, cursor_pagina=siguiente, **filtros
+            )
+
+    return StreamingResponse(lineas(), media_type="application/x-ndjson")
 
 
 # =====================================================
 # ENDPOINTS OPORTUNIDADES
 # =====================================================
 
-@router.post("/clientes/{cliente_id}/oportunidades", response_model=OportunidadSchema)
-def crear_oportunidad(
+@router.post("/clientes/{cliente_id}/oportunidades", response_model=OportunidadSchema, status_code=201)
+async def crear_oportunidad(
     cliente_id: str,
     oportunidad: OportunidadSchema,
-    repo: CRMRepository = Depends(get_crm_repo)
+    repo: AsyncCRMRepository = Depends(get_crm_repo)
 ):
     """
     Crear oportunidad de venta para un cliente
@@ -240,24 +542,85 @@ def crear_oportunidad(
     **Estados:** inicial, contacto, propuesta, negociacion, ganada, perdida
     """
     try:
-        cliente = repo.obtener_cliente(cliente_id)
-        if not cliente:
+        creada = await repo.crear_oportunidad(cliente_id, oportunidad)
+        if not creada:
             raise HTTPException(status_code=404, detail="Cliente no encontrado")
-        
-        return repo.crear_oportunidad(cliente_id, oportunidad)
+        return respuesta_json(creada, status_code=201)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Error creando oportunidad: {e}")
         raise HTTPException(status_code=500, detail="Error al crear oportunidad")
 
 
 @router.get("/clientes/{cliente_id}/oportunidades", response_model=List[OportunidadSchema])
-def listar_oportunidades(cliente_id: str, repo: CRMRepository = Depends(get_crm_repo)):
+async def listar_oportunidades(cliente_id: str, repo: AsyncCRMRepository = Depends(get_crm_repo)):
     """Obtener oportunidades abiertas de un cliente"""
-    cliente = repo.obtener_cliente(cliente_id)
+    cliente = await repo.obtener_cliente(cliente_id)
     if not cliente:
         raise HTTPException(status_code=404, detail="Cliente no encontrado")
     
-    return repo._obtener_oportunidades(cliente_id)
+    return respuesta_json(await repo.obtener_oportunidades(cliente_id))
+
+
+@router.get("/oportunidades", response_model=ListaOportunidades)
+async def listar_oportunidades_pipeline(
+    limit: int = Query(50, ge=1, le=100),
+    estado: Optional[str] = Query(None, description="Estados separados por comas"),
+    cierre_desde: Optional[datetime] = Query(None, description="Fecha de cierre esperada desde (inclusive)"),
+    cierre_hasta: Optional[datetime] = Query(None, description="Fecha de cierre esperada hasta (exclusiva)"),
+    valor_minimo: Optional[float] = Query(None, ge=0),
+    segmento: Optional[str] = Query(None, description="Segmento del cliente"),
+    cursor: Optional[str] = Query(None),
+    repo: AsyncCRMRepository = Depends(get_crm_repo)
+):
+    """
+    Oportunidades de todos los clientes (tablero del pipeline)
+    
+    Ordenadas por fecha de cierre esperada. Se pagina con `cursor`
+    (valor `next_cursor` de la página anterior): cada página cuesta lo mismo.
+    
+    **Respuesta:** Oportunidades con su `cliente_id` + `next_cursor`
+    """
+    try:
+        oportunidades, next_cursor = await repo.listar_oportunidades(
+            limit, lista_parametro(estado), cierre_desde, cierre_hasta, valor_minimo, segmento,
+            cursor_pagina=cursor
+        )
+        return respuesta_json({"oportunidades": oportunidades, "limit": limit, "next_cursor": next_cursor})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"❌ Error listando oportunidades: {e}")
+        raise HTTPException(status_code=500, detail="Error al listar oportunidades")
+
+
+@router.get("/pipeline", response_model=PipelineOportunidades)
+async def obtener_pipeline(
+    estado: Optional[str] = Query(None, description="Estados separados por comas"),
+    cierre_desde: Optional[datetime] = Query(None, description="Fecha de cierre esperada desde (inclusive)"),
+    cierre_hasta: Optional[datetime] = Query(None, description="Fecha de cierre esperada hasta (exclusiva)"),
+    valor_minimo: Optional[float] = Query(None, ge=0),
+    segmento: Optional[str] = Query(None, description="Segmento del cliente"),
+    repo: AsyncCRMRepository = Depends(get_crm_repo)
+):
+    """
+    Resumen del pipeline de ventas
+    
+    Número de oportunidades, valor estimado total y valor ponderado por
+    probabilidad de cierre, por estado y por mes de cierre esperado. Mismos
+    filtros que `/oportunidades`. Calculado en SQLite y cacheado hasta la
+    siguiente escritura (como mucho `CACHE_PIPELINE_TTL` segundos)
+    """
+    try:
+        return respuesta_json(await repo.pipeline_oportunidades(
+            lista_parametro(estado), cierre_desde, cierre_hasta, valor_minimo, segmento
+        ))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"❌ Error obteniendo pipeline: {e}")
+        raise HTTPException(status_code=500, detail="Error al obtener el pipeline")
 
 
 # =====================================================
@@ -265,7 +628,7 @@ def listar_oportunidades(cliente_id: str, repo: CRMRepository = Depends(get_crm_
 # =====================================================
 
 @router.get("/resumen", response_model=ResumenCRM)
-def obtener_resumen_crm(repo: CRMRepository = Depends(get_crm_repo)):
+async def obtener_resumen_crm(repo: AsyncCRMRepository = Depends(get_crm_repo)):
     """
     Obtener resumen ejecutivo del CRM
     
@@ -276,20 +639,124 @@ def obtener_resumen_crm(repo: CRMRepository = Depends(get_crm_repo)):
     - Alertas (clientes morosos, vencimientos próximos)
     """
     try:
-        return repo.obtener_resumen_crm()
+        return respuesta_json(await repo.obtener_resumen_crm())
     except Exception as e:
         logger.error(f"❌ Error obteniendo resumen: {e}")
         raise HTTPException(status_code=500, detail="Error al obtener resumen")
 
 
+@router.get("/clientes/{cliente_id}/estadisticas", response_model=EstadisticasCliente)
+async def obtener_estadisticas_cliente(cliente_id: str, repo: AsyncCRMRepository = Depends(get_crm_repo)):
+    """
+    Estadísticas de un cliente
+    
+    Facturación, oportunidades abiertas, actividades, días desde el primer
+    y el último contacto y `salud_cliente` (buena, atencion, en_riesgo).
+    Se mantienen al escribir actividades y oportunidades: leerlas es una
+    consulta por clave primaria
+    """
+    estadisticas = await repo.obtener_estadisticas_cliente(cliente_id)
+    if not estadisticas:
+        raise HTTPException(status_code=404, detail="Cliente no encontrado")
+    return respuesta_json(estadisticas)
+
+
+@router.post("/clientes/estadisticas", response_model=List[EstadisticasCliente])
+async def obtener_estadisticas_clientes(
+    cliente_ids: List[str] = Body(..., max_length=1000, description="IDs de cliente (máximo 1000)"),
+    repo: AsyncCRMRepository = Depends(get_crm_repo)
+):
+    """
+    Estadísticas de varios clientes a la vez
+    
+    **Cuerpo:** array JSON de IDs. La respuesta sigue el mismo orden y
+    omite los clientes que no existen
+    """
+    return respuesta_json(await repo.obtener_estadisticas_clientes(cliente_ids))
+
+
+@router.get("/cache/estadisticas")
+async def estadisticas_cache(repo: AsyncCRMRepository = Depends(get_crm_repo)):
+    """Aciertos, fallos, desalojos e invalidaciones de la caché de clientes"""
+    return respuesta_json(repo.estadisticas_cache())
+
+
 # =====================================================
 # ENDPOINTS BÚSQUEDA AVANZADA
 # =====================================================
 
-@router.get("/clientes/buscar/email/{email}")
-def buscar_por_email(email: str, repo: CRMRepository = Depends(get_crm_repo)):
-    """Buscar cliente por email exacto"""
-    clientes, _ = repo.listar_clientes(buscar=email)
-    if not clientes:
+@router.get("/clientes/buscar/email/{email}", response_model=Cliente)
+async def buscar_por_email(email: str, repo: AsyncCRMRepository = Depends(get_crm_repo)):
+    """Buscar cliente por email exacto (sin distinguir mayúsculas)"""
+    cliente = await repo.obtener_cliente_por_email(email)
+    if not cliente:
+        raise HTTPException(status_code=404, detail="Cliente no encontrado")
+    return respuesta_json(cliente)
+
+
+@router.get("/clientes/buscar/cif/{cif_nif}", response_model=Cliente)
+async def buscar_por_cif(cif_nif: str, repo: AsyncCRMRepository = Depends(get_crm_repo)):
+    """Buscar cliente por CIF/NIF exacto (sin distinguir mayúsculas)"""
+    cliente = await repo.obtener_cliente_por_cif(cif_nif)
+    if not cliente:
         raise HTTPException(status_code=404, detail="Cliente no encontrado")
-    return clientes[0]
+    return respuesta_json(cliente)
+
+
+# =====================================================
+# ENDPOINTS EXPORTACIÓN
+# =====================================================
+
+async def _lotes_ndjson(columnas: List[str], lotes: AsyncIterator[List[tuple]]) -> AsyncIterator[str]:
+    """Un bloque NDJSON (una línea por fila) por cada lote"""
+    async for lote in lotes:
+        yield "".join(
+            json.dumps(dict(zip(columnas, fila)), ensure_ascii=False, default=str) + "\n"
+            for fila in lote
+        )
+
+
+async def _lotes_csv(columnas: List[str], lotes: AsyncIterator[List[tuple]]) -> AsyncIterator[str]:
+    """Cabecera CSV y un bloque CSV por cada lote"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columnas)
+    yield buffer.getvalue()
+
+    async for lote in lotes:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(lote)
+        yield buffer.getvalue()
+
+
+@router.get("/export/{tabla}")
+async def exportar(
+    tabla: str,
+    formato: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    repo: AsyncCRMRepository = Depends(get_crm_repo)
+):
+    """
+    Exportar una tabla completa en streaming
+    
+    **Tablas:** clientes, contactos, actividades, oportunidades
+    
+    **Formatos:** `ndjson` (un objeto JSON por línea) o `csv`. La memoria
+    usada es constante: las filas se leen por lotes y se envían según se
+    generan.
+    """
+    try:
+        columnas, lotes = await repo.exportar(tabla)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    if formato == "csv":
+        contenido, media_type = _lotes_csv(columnas, lotes), "text/csv"
+    else:
+        contenido, media_type = _lotes_ndjson(columnas, lotes), "application/x-ndjson"
+
+    return StreamingResponse(
+        contenido,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{tabla}.{formato}"'}
+    )
@@ -0,0 +1,81 @@
+# =====================================================
+# ⏱️ SyntexIA CRM — Middleware de Métricas HTTP
+# =====================================================
+"""
+Middleware ASGI que registra, por ruta, la latencia, el tamaño de la
+respuesta y el código de estado, más las peticiones en vuelo.
+
+La ruta es la plantilla (`/api/crm/clientes/{cliente_id}`), no la URL:
+así el número de series no crece con los ids. Las peticiones que no
+coinciden con ninguna ruta se agrupan bajo `RUTA_DESCONOCIDA`, y los
+métodos HTTP fuera de `METODOS_CONOCIDOS` (cualquier cliente puede
+inventarlos) bajo `METODO_OTRO`.
+"""
+
+import time
+
+from src.config.metricas import registro, BUCKETS_BYTES
+
+RUTA_DESCONOCIDA = "<sin_ruta>"
+METODO_OTRO = "OTHER"
+METODOS_CONOCIDOS = frozenset({"GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"})
+
+duracion_http = registro.histograma(
+    "crm_http_duracion_segundos",
+    "Latencia de las peticiones HTTP hasta el último byte de la respuesta",
+    ["metodo", "ruta"],
+)
+tamano_respuesta = registro.histograma(
+    "crm_http_respuesta_bytes",
+    "Tamaño del cuerpo de las respuestas HTTP",
+    ["metodo", "ruta"],
+    buckets=BUCKETS_BYTES,
+)
+peticiones_http = registro.contador(
+    "crm_http_peticiones_total",
+    "Peticiones HTTP atendidas por ruta y código de estado",
+    ["metodo", "ruta", "estado"],
+)
+en_vuelo_http = registro.indicador(
+    "crm_http_en_vuelo",
+    "Peticiones HTTP en curso",
+    ["metodo"],
+)
+
+
+class MiddlewareMetricas:
+    """Middleware ASGI puro (sin BaseHTTPMiddleware: no envuelve el cuerpo en otra tarea)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metodo = scope["method"] if scope["method"] in METODOS_CONOCIDOS else METODO_OTRO
+        estado = 500
+        tamano = 0
+
+        async def enviar(mensaje):
+            nonlocal estado, tamano
+            if mensaje["type"] == "http.response.start":
+                estado = mensaje["status"]
+            elif mensaje["type"] == "http.response.body":
+                tamano += len(mensaje.get("body", b""))
+            await send(mensaje)
+
+        en_vuelo_http.sumar(1, metodo)
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            duracion = time.perf_counter() - inicio
+            en_vuelo_http.sumar(-1, metodo)
+
+            # El router de FastAPI deja la ruta resuelta en el scope
+            ruta = getattr(scope.get("route"), "path", RUTA_DESCONOCIDA)
+            duracion_http.observar(duracion, metodo, ruta)
+            tamano_respuesta.observar(tamano, metodo, ruta)
+            peticiones_http.incrementar(metodo, ruta, estado)
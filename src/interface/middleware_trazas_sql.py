@@ -0,0 +1,80 @@
+# =====================================================
+# 🔬 SyntexIA CRM — Middleware de Trazas SQL por Petición
+# =====================================================
+"""
+Las peticiones con la cabecera `X-Trazar-SQL: 1` recogen todas las
+sentencias SQL que ejecutan. La respuesta lleva un resumen en
+`Server-Timing` (visible en las DevTools del navegador) y el id de la
+traza en `X-Traza-SQL`; la traza completa se consulta en `/debug/sql`.
+"""
+
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from src.repositories.trazas_sql import TrazadorSQL, iniciar_traza, finalizar_traza
+
+CABECERA_TRAZA = b"x-trazar-sql"
+
+
+class MiddlewareTrazasSQL:
+    """Middleware ASGI puro: solo actúa en las peticiones que piden traza"""
+
+    def __init__(self, app, trazador: TrazadorSQL):
+        self.app = app
+        self.trazador = trazador
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (CABECERA_TRAZA, b"1") not in scope["headers"]:
+            await self.app(scope, receive, send)
+            return
+
+        traza_id = uuid.uuid4().hex[:12]
+        sentencias = iniciar_traza()
+        inicio = time.perf_counter()
+
+        async def enviar(mensaje):
+            if mensaje["type"] == "http.response.start":
+                # Sentencias ejecutadas hasta las cabeceras (no las de un cuerpo en streaming)
+                total_ms = sum(sentencia["duracion_ms"] for sentencia in sentencias)
+                mensaje["headers"] = list(mensaje.get("headers", [])) + [
+                    (b"server-timing", f'sql;dur={total_ms:.3f};desc="{len(sentencias)} sentencias"'.encode()),
+                    (b"x-traza-sql", traza_id.encode()),
+                ]
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            finalizar_traza()
+            self.trazador.recientes.append({
+                "id": traza_id,
+                "metodo": scope["method"],
+                "ruta": scope["path"],
+                "fecha": datetime.now(timezone.utc).isoformat(),
+                "duracion_ms": round((time.perf_counter() - inicio) * 1000, 3),
+                "sql_ms": round(sum(sentencia["duracion_ms"] for sentencia in sentencias), 3),
+                "sentencias": sentencias,
+            })
+
+
+def router_trazas_sql(trazador: TrazadorSQL) -> APIRouter:
+    """Router con `/debug/sql` para consultar las trazas de `trazador`"""
+    router = APIRouter(tags=["Health"])
+
+    @router.get("/debug/sql")
+    def trazas_sql(traza_id: Optional[str] = None):
+        """Últimas peticiones trazadas con sus sentencias SQL (o una concreta por id)"""
+        trazas = list(trazador.recientes)
+        if traza_id is None:
+            return trazas
+        for traza in trazas:
+            if traza["id"] == traza_id:
+                return traza
+        return JSONResponse(status_code=404, content={"detail": "Traza no encontrada"})
+
+    return router
@@ -0,0 +1,45 @@
+# =====================================================
+# 📦 SyntexIA CRM — Respuestas JSON Rápidas
+# =====================================================
+"""
+Serialización de respuestas con pydantic-core (Rust), directa a bytes.
+
+`RespuestaJSON` es la clase de respuesta por defecto del router: lo que
+FastAPI ya ha validado se codifica sin pasar por `json.dumps`. Los
+endpoints de lectura y escritura más usados devuelven además la
+respuesta ya construida con `respuesta_json(modelos)`, lo que evita
+también la revalidación contra `response_model` y el recorrido de
+`jsonable_encoder`: los modelos se serializan una sola vez.
+
+El JSON resultante es el mismo que el de `JSONResponse` tras
+`jsonable_encoder`, byte a byte salvo en dos casos que no cambian el valor
+leído: los float en notación exponencial (`1e16` en vez de `1e+16`) y las
+fechas UTC sueltas, fuera de un modelo (`Z` en vez de `+00:00`). NaN e
+infinito se escriben como `null`; `JSONResponse` los rechazaba con un 500.
+"""
+
+from typing import Any, Dict, Optional
+
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+
+class RespuestaJSON(JSONResponse):
+    """JSONResponse que acepta modelos Pydantic y los serializa en Rust"""
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content, inf_nan_mode="null")
+
+
+def respuesta_json(
+    contenido: Any,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None
+) -> RespuestaJSON:
+    """
+    Respuesta final para devolver desde un endpoint.
+
+    FastAPI no aplica `response_model` ni `status_code` del decorador a una
+    `Response`: el código y las cabeceras se indican aquí.
+    """
+    return RespuestaJSON(contenido, status_code=status_code, headers=headers)
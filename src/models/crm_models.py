@@ -7,7 +7,7 @@ oportunidades y actividades del sistema CRM.
 """
 
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Union
 from datetime import datetime
 from enum import Enum
 
@@ -64,6 +64,13 @@ class ActividadSchema(BaseModel):
     notas: Optional[str] = None
 
 
+class ListaActividades(BaseModel):
+    """Página del historial de actividades de un cliente (más recientes primero)"""
+    actividades: List[ActividadSchema]
+    limit: int
+    next_cursor: Optional[str] = None
+
+
 class OportunidadSchema(BaseModel):
     id: Optional[str] = None
     titulo: str
@@ -78,6 +85,35 @@ class OportunidadSchema(BaseModel):
     fecha_actualizacion: Optional[datetime] = None
 
 
+class OportunidadCliente(OportunidadSchema):
+    """Oportunidad en los listados de todo el CRM (pipeline): indica su cliente"""
+    cliente_id: str
+
+
+class ListaOportunidades(BaseModel):
+    """Página de oportunidades de todos los clientes"""
+    oportunidades: List[OportunidadCliente]
+    limit: int
+    next_cursor: Optional[str] = None
+
+
+class GrupoPipeline(BaseModel):
+    """Agregado de un estado o de un mes de cierre (`YYYY-MM`; None = sin fecha)"""
+    grupo: Optional[str] = None
+    oportunidades: int
+    valor_total: float
+    valor_ponderado: float
+
+
+class PipelineOportunidades(BaseModel):
+    """Totales del pipeline; el valor ponderado pesa cada oportunidad por su probabilidad de cierre"""
+    oportunidades: int
+    valor_total: float
+    valor_ponderado: float
+    por_estado: List[GrupoPipeline]
+    por_mes: List[GrupoPipeline]
+
+
 class ClienteBase(BaseModel):
     nombre_completo: str
     razon_social: Optional[str] = None
@@ -124,15 +160,54 @@ class Cliente(ClienteBase):
     tasa_pagos_a_tiempo: Optional[float] = None
 
 
+class ClienteParcial(BaseModel):
+    """Cliente proyectado (`fields` / `expand`): solo trae los campos pedidos"""
+    id: str
+    nombre_completo: Optional[str] = None
+    razon_social: Optional[str] = None
+    tipo_cliente: Optional[str] = None
+    email: Optional[str] = None
+    cif_nif: Optional[str] = None
+    estado: Optional[EstadoCliente] = None
+    segmento: Optional[str] = None
+    sector_industria: Optional[str] = None
+    website: Optional[str] = None
+    notas: Optional[str] = None
+    credito_disponible: Optional[float] = None
+    fecha_creacion: Optional[datetime] = None
+    fecha_actualizacion: Optional[datetime] = None
+    contactos: Optional[List[ContactoSchema]] = None
+    oportunidades: Optional[List[OportunidadSchema]] = None
+    actividades_recientes: Optional[List[ActividadSchema]] = None
+    total_facturado: Optional[float] = None
+    numero_facturas: Optional[int] = None
+    promedio_venta: Optional[float] = None
+    dias_desde_ultimo_contacto: Optional[int] = None
+    tasa_pagos_a_tiempo: Optional[float] = None
+
+
+class ListaClientes(BaseModel):
+    """Página de clientes; con `fields` / `expand` cada cliente solo trae los campos pedidos"""
+    clientes: List[Union[Cliente, ClienteParcial]]
+    total: Optional[int] = None
+    skip: int
+    limit: int
+    next_cursor: Optional[str] = None
+
+
 class EstadisticasCliente(BaseModel):
     cliente_id: str
     total_facturado: float
     numero_facturas: int
     promedio_venta: float
-    tasa_pagos_a_tiempo: float
+    tasa_pagos_a_tiempo: Optional[float] = None
     valor_oportunidades_abiertas: float
+    oportunidades_abiertas: int = 0
+    actividades: int = 0
+    actividades_pendientes: int = 0
     dias_desde_primer_contacto: int
     dias_desde_ultimo_contacto: int
+    puntuacion_salud: Optional[float] = None
     salud_cliente: str
 
 
@@ -0,0 +1,214 @@
+# =====================================================
+# ⚡ SyntexIA CRM — Repositorio Asíncrono
+# =====================================================
+"""
+Fachada asíncrona sobre CRMRepository.
+
+Las operaciones de base de datos se ejecutan en un executor propio
+(no en el threadpool por defecto de Starlette) y un semáforo limita
+cuántas hay en vuelo a la vez. Las peticiones que superan el límite
+esperan en el event loop sin ocupar hilos.
+"""
+
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, TypeVar
+
+from src.repositories.crm_repository import CRMRepository
+from src.repositories.cola_actividades import ColaActividades
+from src.models.crm_models import (
+    Cliente, ClienteCreate, ClienteUpdate, ClienteParcial, ContactoSchema,
+    ActividadSchema, OportunidadSchema, OportunidadCliente, PipelineOportunidades,
+    EstadisticasCliente, ResumenCRM
+)
+from src.config.logger import get_logger
+
+logger = get_logger("CRM-Async-Repository")
+
+T = TypeVar("T")
+
+
+class AsyncCRMRepository:
+    """Repositorio CRM con API `async` y concurrencia acotada"""
+
+    def __init__(
+        self,
+        repo: CRMRepository,
+        max_en_vuelo: Optional[int] = None,
+        cola_actividades: Optional[ColaActividades] = None
+    ):
+        """
+        Args:
+            repo: Repositorio síncrono subyacente
+            max_en_vuelo: Operaciones de base de datos simultáneas. Por
+                defecto, el tamaño del pool de conexiones del repositorio
+                (más hilos solo esperarían por una conexión).
+            cola_actividades: Si se indica, `crear_actividad` escribe a
+                través de ella (commits agrupados)
+        """
+        self.sync = repo
+        self.cola_actividades = cola_actividades
+        self.max_en_vuelo = max_en_vuelo or repo.pool_size
+        self._executor = ThreadPoolExecutor(max_workers=self.max_en_vuelo, thread_name_prefix="crm-db")
+        self._semaforo: Optional[asyncio.Semaphore] = None
+
+    async def _ejecutar(self, funcion: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Ejecutar una operación síncrona del repositorio en el executor"""
+        # Se crea al primer uso, dentro del event loop que sirve las peticiones
+        if self._semaforo is None:
+            self._semaforo = asyncio.Semaphore(self.max_en_vuelo)
+
+        async with self._semaforo:
+            loop = asyncio.get_running_loop()
+            # Copiar el contexto (como asyncio.to_thread): la traza SQL de la petición llega al hilo
+            contexto = contextvars.copy_context()
+            return await loop.run_in_executor(self._executor, partial(contexto.run, funcion, *args, **kwargs))
+
+    def cerrar(self):
+        """Volcar la cola de actividades, esperar a las operaciones en curso y cerrar executor y pool"""
+        if self.cola_actividades:
+            self.cola_actividades.cerrar()
+        self._executor.shutdown(wait=True)
+        self.sync.cerrar()
+        logger.info("[OK] Repositorio asíncrono cerrado")
+
+    # =====================================================
+    # CLIENTES
+    # =====================================================
+
+    async def crear_cliente(self, cliente_data: ClienteCreate) -> Cliente:
+        return await self._ejecutar(self.sync.crear_cliente, cliente_data)
+
+    async def importar_clientes(self, clientes: List[ClienteCreate], tamano_lote: int) -> tuple[int, List[Dict[str, Any]]]:
+        return await self._ejecutar(self.sync.importar_clientes, clientes, tamano_lote)
+
+    async def obtener_cliente(self, cliente_id: str) -> Optional[Cliente]:
+        return await self._ejecutar(self.sync.obtener_cliente, cliente_id)
+
+    async def obtener_cliente_con_etag(self, cliente_id: str) -> tuple[Optional[Cliente], Optional[str]]:
+        return await self._ejecutar(self.sync.obtener_cliente_con_etag, cliente_id)
+
+    async def obtener_cliente_parcial(self, cliente_id: str, *args: Any, **kwargs: Any) -> Optional[ClienteParcial]:
+        return await self._ejecutar(self.sync.obtener_cliente_parcial, cliente_id, *args, **kwargs)
+
+    async def etag_cliente(self, cliente_id: str) -> Optional[str]:
+        return await self._ejecutar(self.sync.etag_cliente, cliente_id)
+
+    async def version_clientes(self) -> tuple[str, datetime]:
+        return await self._ejecutar(self.sync.version_clientes)
+
+    async def obtener_cliente_por_email(self, email: str) -> Optional[Cliente]:
+        return await self._ejecutar(self.sync.obtener_cliente_por_email, email)
+
+    async def obtener_cliente_por_cif(self, cif_nif: str) -> Optional[Cliente]:
+        return await self._ejecutar(self.sync.obtener_cliente_por_cif, cif_nif)
+
+    async def listar_clientes(self, *args: Any, **kwargs: Any) -> tuple[List[Cliente], Optional[int], Optional[str]]:
+        return await self._ejecutar(self.sync.listar_clientes, *args, **kwargs)
+
+    async def actualizar_cliente(self, cliente_id: str, cliente_data: ClienteUpdate) -> Cliente:
+        return await self._ejecutar(self.sync.actualizar_cliente, cliente_id, cliente_data)
+
+    async def eliminar_cliente(self, cliente_id: str) -> bool:
+        return await self._ejecutar(self.sync.eliminar_cliente, cliente_id)
+
+    # =====================================================
+    # CONTACTOS, ACTIVIDADES Y OPORTUNIDADES
+    # =====================================================
+
+    async def crear_contacto(self, cliente_id: str, contacto: ContactoSchema) -> Optional[ContactoSchema]:
+        return await self._ejecutar(self.sync.crear_contacto, cliente_id, contacto)
+
+    async def obtener_contactos(self, cliente_id: str) -> List[ContactoSchema]:
+        return await self._ejecutar(self.sync._obtener_contactos, cliente_id)
+
+    async def crear_actividad(
+        self,
+        cliente_id: str,
+        actividad: ActividadSchema,
+        esperar_commit: bool = True
+    ) -> Optional[ActividadSchema]:
+        """
+        Crear una actividad, por la cola de commits agrupados si existe.
+
+        Con la cola y `esperar_commit=False` devuelve la actividad en cuanto
+        se encola, sin confirmar que el cliente exista ni que se haya escrito.
+
+        Raises:
+            ColaLlena: Si la cola de actividades está llena
+        """
+        if not self.cola_actividades:
+            return await self._ejecutar(self.sync.crear_actividad, cliente_id, actividad)
+
+        encolada, futuro = self.cola_actividades.encolar(cliente_id, actividad)
+        if not esperar_commit:
+            return encolada
+        # El Future lo resuelve el hilo escritor: se espera sin ocupar el executor
+        return await asyncio.wrap_future(futuro)
+
+    async def obtener_actividades(self, cliente_id: str, limit: int = 10) -> List[ActividadSchema]:
+        return await self._ejecutar(self.sync._obtener_actividades, cliente_id, limit=limit)
+
+    async def listar_actividades(self, cliente_id: str, *args: Any, **kwargs: Any) -> tuple[List[ActividadSchema], Optional[str]]:
+        return await self._ejecutar(self.sync.listar_actividades, cliente_id, *args, **kwargs)
+
+    async def crear_oportunidad(self, cliente_id: str, oportunidad: OportunidadSchema) -> Optional[OportunidadSchema]:
+        return await self._ejecutar(self.sync.crear_oportunidad, cliente_id, oportunidad)
+
+    async def obtener_oportunidades(self, cliente_id: str) -> List[OportunidadSchema]:
+        return await self._ejecutar(self.sync._obtener_oportunidades, cliente_id)
+
+    async def listar_oportunidades(self, *args: Any, **kwargs: Any) -> tuple[List[OportunidadCliente], Optional[str]]:
+        return await self._ejecutar(self.sync.listar_oportunidades, *args, **kwargs)
+
+    async def pipeline_oportunidades(self, *args: Any, **kwargs: Any) -> PipelineOportunidades:
+        return await self._ejecutar(self.sync.pipeline_oportunidades, *args, **kwargs)
+
+    # =====================================================
+    # ESTADÍSTICAS, EXPORTACIÓN Y SALUD
+    # =====================================================
+
+    async def obtener_resumen_crm(self) -> ResumenCRM:
+        return await self._ejecutar(self.sync.obtener_resumen_crm)
+
+    async def recalcular_resumen(self):
+        return await self._ejecutar(self.sync.recalcular_resumen)
+
+    async def obtener_estadisticas_cliente(self, cliente_id: str) -> Optional[EstadisticasCliente]:
+        return await self._ejecutar(self.sync.obtener_estadisticas_cliente, cliente_id)
+
+    async def obtener_estadisticas_clientes(self, cliente_ids: List[str]) -> List[EstadisticasCliente]:
+        return await self._ejecutar(self.sync.obtener_estadisticas_clientes, cliente_ids)
+
+    async def recalcular_estadisticas_clientes(self):
+        return await self._ejecutar(self.sync.recalcular_estadisticas_clientes)
+
+    async def puntuar_salud_clientes(self) -> Dict[str, Any]:
+        return await self._ejecutar(self.sync.puntuar_salud_clientes)
+
+    async def exportar(self, tabla: str) -> tuple[List[str], AsyncIterator[List[tuple]]]:
+        """Como `CRMRepository.exportar`, leyendo cada lote en el executor"""
+        columnas, lotes = await self._ejecutar(self.sync.exportar, tabla)
+
+        async def lotes_async() -> AsyncIterator[List[tuple]]:
+            try:
+                while True:
+                    lote = await self._ejecutar(next, lotes, None)
+                    if lote is None:
+                        break
+                    yield lote
+            finally:
+                # Cierra la conexión dedicada si el cliente corta la descarga
+                await self._ejecutar(lotes.close)
+
+        return columnas, lotes_async()
+
+    def estadisticas_cache(self) -> Dict[str, Any]:
+        # Solo lee contadores en memoria: no necesita el executor
+        return self.sync.estadisticas_cache()
+
+    async def verificar_salud(self) -> Dict[str, Any]:
+        return await self._ejecutar(self.sync.verificar_salud)
@@ -0,0 +1,154 @@
+# =====================================================
+# 📥 SyntexIA CRM — Cola de Escritura de Actividades
+# =====================================================
+"""
+Ingesta de actividades con commit agrupado (group commit).
+
+Las actividades se encolan en memoria y un hilo escritor las inserta en
+lotes de hasta `max_lote`, una transacción por lote. Mientras se escribe
+un lote se acumula el siguiente, así el rendimiento crece con el tamaño
+del lote en vez de quedar limitado a un commit por actividad.
+
+Quien encola recibe un Future que se resuelve tras el commit de su lote
+(con la actividad, o None si el cliente no existe). Puede esperarlo
+(confirmación tras commit) o no (confirmación al encolar: si el proceso
+muere antes del volcado, la actividad se pierde).
+"""
+
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import Any, Dict, Optional
+
+from src.repositories.crm_repository import CRMRepository
+from src.models.crm_models import ActividadSchema
+from src.config.logger import get_logger
+
+logger = get_logger("CRM-Cola-Actividades")
+
+
+class ColaLlena(Exception):
+    """Hay `max_pendientes` actividades esperando: el llamador debe reintentar"""
+
+
+class ColaActividades:
+    """Cola acotada con un hilo escritor que vuelca en commits agrupados"""
+
+    def __init__(
+        self,
+        repo: CRMRepository,
+        max_lote: int = 500,
+        max_espera_ms: float = 2.0,
+        max_pendientes: int = 10000
+    ):
+        """
+        Args:
+            repo: Repositorio síncrono (usa `crear_actividades_lote`)
+            max_lote: Actividades máximas por transacción
+            max_espera_ms: Tiempo máximo que un lote espera a llenarse
+            max_pendientes: Actividades en cola antes de rechazar (ColaLlena)
+        """
+        self.repo = repo
+        self.max_lote = max_lote
+        self.max_espera = max_espera_ms / 1000
+
+        self._cola: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=max_pendientes)
+        self._cerrada = False
+        # Comprobar `_cerrada` y encolar es atómico frente a `cerrar`: nada se
+        # encola detrás del centinela (su Future no se resolvería nunca)
+        self._lock_cierre = threading.Lock()
+        # El hilo escritor actualiza los contadores mientras otros hilos los leen
+        self._lock = threading.Lock()
+        self._stats = {"lotes": 0, "actividades": 0, "cliente_inexistente": 0, "errores": 0, "lote_maximo": 0}
+        self._hilo = threading.Thread(target=self._escribir, name="crm-group-commit", daemon=True)
+        self._hilo.start()
+
+    def encolar(self, cliente_id: str, actividad: ActividadSchema) -> tuple[ActividadSchema, Future]:
+        """
+        Encolar una actividad; devuelve (actividad con id, Future del commit).
+
+        Raises:
+            ColaLlena: Si la cola está llena
+            RuntimeError: Si la cola está cerrada
+        """
+        actividad = actividad.model_copy(update={"id": f"act_{uuid.uuid4().hex[:12]}"})
+        futuro: Future = Future()
+        with self._lock_cierre:
+            if self._cerrada:
+                raise RuntimeError("La cola de actividades está cerrada")
+            try:
+                self._cola.put_nowait((cliente_id, actividad, futuro))
+            except queue.Full:
+                raise ColaLlena(f"Cola de actividades llena ({self._cola.maxsize} pendientes)")
+        return actividad, futuro
+
+    def _escribir(self):
+        """Bucle del hilo escritor: un lote por iteración hasta recibir el centinela"""
+        terminar = False
+        while not terminar:
+            primera = self._cola.get()
+            if primera is None:
+                break
+
+            lote = [primera]
+            limite = time.monotonic() + self.max_espera
+            while len(lote) < self.max_lote:
+                try:
+                    siguiente = self._cola.get(timeout=max(limite - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if siguiente is None:
+                    terminar = True
+                    break
+                lote.append(siguiente)
+
+            self._volcar(lote)
+
+    def _volcar(self, lote: list):
+        """Insertar un lote en una transacción y resolver sus Futures"""
+        try:
+            creadas = self.repo.crear_actividades_lote([(cliente_id, actividad) for cliente_id, actividad, _ in lote])
+        except Exception as e:
+            with self._lock:
+                self._stats["errores"] += len(lote)
+            logger.error(f"[ERROR] Error volcando lote de {len(lote)} actividades: {e}")
+            for _, _, futuro in lote:
+                futuro.set_exception(e)
+            return
+
+        rechazadas = sum(creada is None for creada in creadas)
+        # Contadores antes de resolver los Futures: quien espera el commit ya los ve actualizados
+        with self._lock:
+            self._stats["lotes"] += 1
+            self._stats["actividades"] += len(lote) - rechazadas
+            self._stats["cliente_inexistente"] += rechazadas
+            self._stats["lote_maximo"] = max(self._stats["lote_maximo"], len(lote))
+
+        for (cliente_id, actividad, futuro), creada in zip(lote, creadas):
+            if creada is None:
+                logger.warning("[WARN] Actividad %s descartada: cliente %s no existe", actividad.id, cliente_id)
+            futuro.set_result(creada)
+
+    def estadisticas(self) -> Dict[str, Any]:
+        """Lotes volcados, actividades escritas y tamaño medio de lote"""
+        with self._lock:
+            stats = dict(self._stats)
+        lotes = stats["lotes"]
+        return {
+            **stats,
+            "pendientes": self._cola.qsize(),
+            "lote_medio": round(stats["actividades"] / lotes, 2) if lotes else 0.0,
+        }
+
+    def cerrar(self):
+        """Dejar de aceptar actividades y esperar a que se vuelquen las pendientes"""
+        with self._lock_cierre:
+            if self._cerrada:
+                return
+            self._cerrada = True
+            # Puede esperar a que el escritor libere sitio: el escritor no usa este lock
+            self._cola.put(None)
+        self._hilo.join()
+        logger.info("[OK] Cola de actividades vaciada y cerrada")
@@ -9,37 +9,255 @@ Utiliza SQLite (local).
 
 import sqlite3
 import json
+import base64
+import hashlib
+import re
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator
 from pathlib import Path
 import uuid
+from src.repositories.sqlite_pool import SQLiteConnectionPool
+from src.repositories.trazas_sql import TrazadorSQL
+from src.repositories.lru_cache import CacheLRU
+from src.repositories.migraciones import Migracion, aplicar_migraciones
+from src.repositories.mapeo_filas import MapeadorFilas
+from src.repositories.salud_clientes import TAMANO_LOTE_SALUD, puntuar_clientes
 from src.models.crm_models import (
-    Cliente, ClienteCreate, ClienteUpdate, ContactoSchema,
-    ActividadSchema, OportunidadSchema, EstadisticasCliente,
-    ResumenCRM, EstadoCliente, EstadoOportunidad
+    Cliente, ClienteCreate, ClienteUpdate, ClienteParcial, ContactoSchema,
+    ActividadSchema, OportunidadSchema, OportunidadCliente, EstadisticasCliente,
+    ResumenCRM, EstadoCliente, EstadoOportunidad, TipoActividad, GrupoPipeline, PipelineOportunidades
 )
 from src.config.logger import get_logger
+from src.config.metricas import instrumentado
 
 logger = get_logger("CRM-Repository")
 
+# Modos de conteo aceptados por listar_clientes
+MODOS_CONTEO = ("exacto", "estimado", "no")
 
+
+# Relaciones que se hidratan con un cliente (`expand`)
+RELACIONES_CLIENTE = ("contactos", "actividades_recientes", "oportunidades")
+
+# Columnas de `clientes` que se pueden proyectar (`fields`)
+COLUMNAS_CLIENTE = tuple(campo for campo in Cliente.model_fields if campo not in RELACIONES_CLIENTE)
+
+# Filas -> modelos sin revalidar (los datos ya se validaron al entrar por la API)
+MAPEO_CLIENTE = MapeadorFilas(Cliente)
+MAPEO_CLIENTE_PARCIAL = MapeadorFilas(ClienteParcial)
+MAPEO_CONTACTO = MapeadorFilas(ContactoSchema)
+MAPEO_ACTIVIDAD = MapeadorFilas(ActividadSchema)
+MAPEO_OPORTUNIDAD = MapeadorFilas(OportunidadSchema)
+MAPEO_OPORTUNIDAD_CLIENTE = MapeadorFilas(OportunidadCliente)
+
+# Tablas que se pueden exportar completas
+TABLAS_EXPORTABLES = ("clientes", "contactos", "actividades", "oportunidades")
+
+# Clientes por transacción en las importaciones masivas
+TAMANO_LOTE_IMPORTACION = 1000
+
+SQL_INSERTAR_CLIENTE = """
+INSERT INTO clientes (
+    id, nombre_completo, razon_social, tipo_cliente, email, cif_nif,
+    estado, segmento, sector_industria, website, notas, credito_disponible,
+    fecha_creacion, fecha_actualizacion
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+SQL_INSERTAR_CONTACTO = """
+INSERT INTO contactos (id, cliente_id, tipo, valor, principal, verificado, fecha_creacion)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+SQL_INSERTAR_ACTIVIDAD = """
+INSERT INTO actividades (id, cliente_id, tipo, titulo, descripcion, fecha, completada, responsable, notas)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Contadores del resumen por tabla: [(clave SQL, expresión del delta)] y las
+# columnas cuyo UPDATE los afecta. `{r}` es la fila `new` u `old` del trigger.
+CONTADORES_RESUMEN = {
+    "clientes": (
+        [
+            ("'total_clientes'", "1"),
+            ("'clientes_activos'", "{r}.estado = 'activo'"),
+            ("'valor_total_facturado'", "{r}.total_facturado"),
+            ("'dias_contacto_suma'", "{r}.dias_desde_ultimo_contacto"),
+            ("'dias_contacto_n'", "{r}.dias_desde_ultimo_contacto IS NOT NULL"),
+            ("'clientes_morosos'",
+             "{r}.estado = 'activo' AND {r}.tasa_pagos_a_tiempo IS NOT NULL AND {r}.tasa_pagos_a_tiempo < 80"),
+            ("'clientes_mes:' || strftime('%Y-%m', {r}.fecha_creacion)", "1"),
+        ],
+        ["estado", "total_facturado", "dias_desde_ultimo_contacto", "tasa_pagos_a_tiempo", "fecha_creacion"],
+    ),
+    "actividades": (
+        [("'actividades_pendientes'", "{r}.completada = 0")],
+        ["completada"],
+    ),
+    "oportunidades": (
+        [("'valor_oportunidades_abiertas'",
+          "CASE WHEN {r}.estado NOT IN ('ganada', 'perdida') THEN {r}.valor_estimado ELSE 0 END")],
+        ["estado", "valor_estimado"],
+    ),
+}
+
+
+# Fila de `versiones_clientes` que cambia con cualquier escritura (listados)
+VERSION_GLOBAL = "*"
+
+# Umbrales de `salud_cliente`: días sin contacto y % de pagos a tiempo
+SALUD_DIAS_ATENCION = 30
+SALUD_DIAS_RIESGO = 90
+SALUD_PAGOS_ATENCION = 95
+SALUD_PAGOS_RIESGO = 80
+
+# Oportunidad abierta (`{r}` es la fila `new` u `old` del trigger)
+SQL_OPORTUNIDAD_ABIERTA = "{r}.estado NOT IN ('ganada', 'perdida')"
+
+
+def calcular_etag(*partes: Any) -> str:
+    """ETag fuerte (entre comillas) a partir de los valores que versionan un recurso"""
+    huella = hashlib.sha1("|".join(str(parte) for parte in partes).encode()).hexdigest()[:20]
+    return f'"{huella}"'
+
+
+def codificar_cursor(*valores: Any) -> str:
+    """Codificar los valores de la última fila de una página como cursor opaco"""
+    crudo = json.dumps(valores, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(crudo).decode().rstrip("=")
+
+
+def consulta_fts(texto: str) -> str:
+    """
+    Convertir el texto libre de `buscar` en una consulta FTS5.
+
+    Cada palabra se busca como prefijo ("jos" encuentra "José") y todas
+    deben aparecer. Las palabras se entrecomillan para que la sintaxis
+    FTS5 del usuario (AND, NEAR, comillas, ...) no se interprete.
+    """
+    palabras = re.findall(r"[^\W_]+", texto)
+    if not palabras:
+        # Sin palabras indexables no hay coincidencias posibles
+        return '""'
+    return " ".join(f'"{palabra}"*' for palabra in palabras)
+
+
+def clasificar_salud(dias_sin_contacto: int, tasa_pagos_a_tiempo: Optional[float]) -> str:
+    """`buena`, `atencion` o `en_riesgo` según el último contacto y la puntualidad en los pagos"""
+    pagos = tasa_pagos_a_tiempo if tasa_pagos_a_tiempo is not None else 100
+    if dias_sin_contacto > SALUD_DIAS_RIESGO or pagos < SALUD_PAGOS_RIESGO:
+        return "en_riesgo"
+    if dias_sin_contacto > SALUD_DIAS_ATENCION or pagos < SALUD_PAGOS_ATENCION:
+        return "atencion"
+    return "buena"
+
+
+def decodificar_cursor(cursor: str) -> list:
+    """Decodificar un cursor generado por `codificar_cursor`"""
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+    except (ValueError, TypeError):
+        raise ValueError("Cursor de paginación no válido")
+
+    if not isinstance(valores, list):
+        raise ValueError("Cursor de paginación no válido")
+    return valores
+
+
+@instrumentado(excluir=("estadisticas_cache", "estadisticas_pool", "cerrar"))
 class CRMRepository:
     """Repositorio para todas las operaciones CRUD del CRM"""
 
-    def __init__(self, db_path: str = "crm.db"):
+    def __init__(
+        self,
+        db_path: str = "crm.db",
+        pool_size: int = 5,
+        cache_size_kb: int = 16000,
+        cache_clientes: int = 1000,
+        cache_ttl: float = 30.0,
+        cache_pipeline_ttl: float = 10.0,
+        trazador: Optional[TrazadorSQL] = None
+    ):
         self.db_path = db_path
         self.connection_string = f"sqlite:///{db_path}"
+        self.pool_size = pool_size
+        # Con trazador, las conexiones miden cada sentencia (log de consultas lentas)
+        self._pool = SQLiteConnectionPool(db_path, pool_size=pool_size, cache_size_kb=cache_size_kb, trazador=trazador)
+        # Clientes hidratados por id; las escrituras invalidan su entrada
+        self._cache_clientes = CacheLRU(max_entradas=cache_clientes, ttl_segundos=cache_ttl)
+        # Agregados del pipeline por (versión global, filtros): nunca sirven datos
+        # obsoletos, el TTL solo acota cuánto se conservan (0 = sin caché)
+        self._cache_pipeline = CacheLRU(
+            max_entradas=128 if cache_pipeline_ttl > 0 else 0, ttl_segundos=cache_pipeline_ttl
+        )
         self._init_db()
 
+    def estadisticas_cache(self) -> Dict[str, Any]:
+        """Aciertos, fallos y desalojos de la caché de clientes"""
+        return self._cache_clientes.estadisticas()
+
+    def estadisticas_pool(self) -> Dict[str, Any]:
+        """Conexiones abiertas y libres del pool"""
+        return self._pool.estadisticas()
+
+    def verificar_salud(self) -> Dict[str, Any]:
+        """Chequeo de salud de la base de datos y del pool de conexiones"""
+        return self._pool.verificar_salud()
+
+    def cerrar(self):
+        """Cerrar las conexiones del pool (apagado del servidor)"""
+        self._pool.cerrar()
+
     # =====================================================
     # INICIALIZACIÓN BASE DE DATOS
     # =====================================================
 
     def _init_db(self):
-        """Crea las tablas si no existen"""
-        conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
-        cursor = conn.cursor()
+        """Aplicar las migraciones de esquema pendientes"""
+        conn = self._pool.adquirir()
 
+        try:
+            version_inicial, version = aplicar_migraciones(conn, self._migraciones())
+            cursor = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'clientes_fts'")
+            self._fts_disponible = cursor.fetchone() is not None
+            # Con duplicados la migración deja los índices sin UNIQUE: se reintenta en cada arranque
+            if version_inicial == version and not self._identificadores_unicos(conn):
+                cursor = conn.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
+                try:
+                    self._init_identificadores_unicos(cursor)
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+        finally:
+            self._pool.liberar(conn)
+
+        # Bases de datos anteriores a las migraciones: poblar los contadores del resumen
+        if version_inicial == 0:
+            self.recalcular_resumen()
+        logger.info(f"[OK] Base de datos CRM inicializada (esquema v{version})")
+
+    def _migraciones(self) -> List[Migracion]:
+        """Migraciones en orden; añadir siempre al final, nunca modificar las aplicadas"""
+        return [
+            ("esquema inicial", self._migracion_esquema_inicial),
+            ("índices compuestos por cliente_id", self._migracion_indices_por_cliente),
+            ("índices del pipeline de oportunidades", self._migracion_indices_pipeline),
+            ("estadísticas incrementales por cliente", self._migracion_estadisticas_clientes),
+            ("puntuación de salud de clientes", self._migracion_puntuacion_salud),
+            ("índice del historial de actividades", self._migracion_indice_historial_actividades),
+            ("email y CIF/NIF únicos sin distinguir mayúsculas", self._init_identificadores_unicos),
+        ]
+
+    def _migracion_esquema_inicial(self, cursor: sqlite3.Cursor):
+        """
+        Tablas, índices, FTS y triggers de resumen y versiones.
+
+        Usa IF NOT EXISTS: las bases de datos creadas antes de las
+        migraciones (versión 0) ya tienen parte del esquema.
+        """
         # Tabla Clientes
         cursor.execute("""
         CREATE TABLE IF NOT EXISTS clientes (
@@ -115,14 +333,247 @@ class CRMRepository:
         """)
 
         # Índices para búsquedas rápidas
-        cursor.execute("""CREATE INDEX IF NOT EXISTS idx_cliente_email ON clientes(email)""")
+        self._init_indices_identificadores(cursor)
         cursor.execute("""CREATE INDEX IF NOT EXISTS idx_cliente_estado ON clientes(estado)""")
+        cursor.execute("""CREATE INDEX IF NOT EXISTS idx_cliente_actualizacion ON clientes(fecha_actualizacion, id)""")
         cursor.execute("""CREATE INDEX IF NOT EXISTS idx_actividades_fecha ON actividades(fecha)""")
         cursor.execute("""CREATE INDEX IF NOT EXISTS idx_oportunidades_estado ON oportunidades(estado)""")
 
-        conn.commit()
-        conn.close()
-        logger.info("[OK] Base de datos CRM inicializada")
+        # Índice de texto completo para `buscar`
+        self._init_busqueda(cursor)
+
+        # Contadores del resumen mantenidos por triggers
+        self._init_resumen(cursor)
+
+        # Versiones para ETag / Last-Modified
+        self._init_versiones(cursor)
+
+    def _migracion_indices_por_cliente(self, cursor: sqlite3.Cursor):
+        """Índices para las lecturas de detalle, que siempre filtran por cliente_id"""
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_contactos_cliente ON contactos(cliente_id)")
+        # Actividades recientes: búsqueda por cliente ya ordenada por fecha
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_actividades_cliente_fecha ON actividades(cliente_id, fecha)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_oportunidades_cliente_estado ON oportunidades(cliente_id, estado)")
+
+    def _migracion_indices_pipeline(self, cursor: sqlite3.Cursor):
+        """Índices de `listar_oportunidades` y `pipeline_oportunidades` (todos los clientes)"""
+        # Paginación por (fecha de cierre, id) sin filtro de estado
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_oportunidades_cierre ON oportunidades(fecha_cierre_esperada, id)")
+        # Por estado y fecha; cubre los agregados (no lee la tabla). Sustituye a idx_oportunidades_estado
+        cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_oportunidades_estado_cierre
+        ON oportunidades(estado, fecha_cierre_esperada, id, valor_estimado, probabilidad_cierre)
+        """)
+        cursor.execute("DROP INDEX IF EXISTS idx_oportunidades_estado")
+
+    def _migracion_estadisticas_clientes(self, cursor: sqlite3.Cursor):
+        """Tabla `estadisticas_clientes`, sus triggers y su contenido inicial"""
+        self._init_estadisticas_clientes(cursor)
+        self._poblar_estadisticas_clientes(cursor)
+
+    def _migracion_puntuacion_salud(self, cursor: sqlite3.Cursor):
+        """Columnas de `estadisticas_clientes` que escribe `puntuar_salud_clientes`"""
+        cursor.execute("ALTER TABLE estadisticas_clientes ADD COLUMN puntuacion_salud REAL")
+        cursor.execute("ALTER TABLE estadisticas_clientes ADD COLUMN salud_cliente TEXT")
+        cursor.execute("ALTER TABLE estadisticas_clientes ADD COLUMN fecha_puntuacion TIMESTAMP")
+
+    def _migracion_indice_historial_actividades(self, cursor: sqlite3.Cursor):
+        """
+        idx_actividades_cliente_fecha pasa a (cliente_id, fecha, id): el
+        historial pagina por (fecha, id) y así sale ordenado del índice,
+        sin ordenar aparte las actividades con la misma fecha.
+        """
+        cursor.execute("DROP INDEX IF EXISTS idx_actividades_cliente_fecha")
+        cursor.execute("CREATE INDEX idx_actividades_cliente_fecha ON actividades(cliente_id, fecha, id)")
+
+    def _init_indices_identificadores(self, cursor: sqlite3.Cursor):
+        """
+        Índices sin distinción de mayúsculas para email y CIF/NIF.
+
+        Las búsquedas exactas comparan con COLLATE NOCASE, que solo puede
+        usar un índice declarado con la misma colación. Las bases de datos
+        antiguas tienen idx_cliente_email binario: se recrea.
+        """
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'index' AND name = 'idx_cliente_email'")
+        row = cursor.fetchone()
+        if row and "NOCASE" not in row[0].upper():
+            cursor.execute("DROP INDEX idx_cliente_email")
+
+        cursor.execute("""CREATE INDEX IF NOT EXISTS idx_cliente_email ON clientes(email COLLATE NOCASE)""")
+        cursor.execute("""CREATE INDEX IF NOT EXISTS idx_cliente_cif ON clientes(cif_nif COLLATE NOCASE)""")
+
+    @staticmethod
+    def _identificadores_unicos(conn: sqlite3.Connection) -> bool:
+        """Si idx_cliente_email e idx_cliente_cif ya son UNIQUE"""
+        filas = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'index' AND name IN ('idx_cliente_email', 'idx_cliente_cif')"
+        ).fetchall()
+        return len(filas) == 2 and all(row[0].upper().startswith("CREATE UNIQUE") for row in filas)
+
+    def _init_identificadores_unicos(self, cursor: sqlite3.Cursor):
+        """
+        Recrear idx_cliente_email e idx_cliente_cif como UNIQUE sin distinguir mayúsculas.
+
+        La restricción UNIQUE de la tabla compara en binario: `a@x.com` y
+        `A@x.com` podían convivir y la búsqueda por email devolvía uno
+        cualquiera. Si ya existen valores así, el índice de esa columna se
+        deja como estaba y los duplicados se informan en el log para
+        corregirlos a mano; `_init_db` lo reintenta en cada arranque.
+        """
+        for indice, columna in (("idx_cliente_email", "email"), ("idx_cliente_cif", "cif_nif")):
+            cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'index' AND name = ?", (indice,))
+            row = cursor.fetchone()
+            if row and row[0].upper().startswith("CREATE UNIQUE"):
+                continue
+
+            cursor.execute(f"""
+            SELECT lower({columna}) AS valor, group_concat(id, ', ') AS ids
+            FROM clientes WHERE {columna} IS NOT NULL
+            GROUP BY {columna} COLLATE NOCASE HAVING COUNT(*) > 1
+            """)
+            duplicados = cursor.fetchall()
+            if duplicados:
+                for valor, ids in duplicados:
+                    logger.warning(f"[WARN] {columna} repetido sin distinguir mayúsculas: {valor} (clientes {ids})")
+                logger.warning(f"[WARN] {indice} sigue sin UNIQUE hasta corregir {len(duplicados)} duplicados")
+                continue
+
+            cursor.execute(f"DROP INDEX IF EXISTS {indice}")
+            cursor.execute(f"CREATE UNIQUE INDEX {indice} ON clientes({columna} COLLATE NOCASE)")
+
+    def _init_busqueda(self, cursor: sqlite3.Cursor):
+        """
+        Crear el índice FTS5 de clientes y los triggers que lo sincronizan.
+
+        La tabla `clientes_fts` es de contenido externo (no duplica el texto)
+        y se enlaza por rowid; tras un VACUUM hay que llamar a
+        `reconstruir_indice_busqueda`. Si el SQLite del sistema no incluye
+        FTS5 no se crea y `buscar` usa LIKE (`_init_db` mira si existe).
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'clientes_fts'")
+        existia = cursor.fetchone() is not None
+
+        try:
+            cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS clientes_fts USING fts5(
+                nombre_completo, email, razon_social,
+                content='clientes', content_rowid='rowid',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+            """)
+        except sqlite3.OperationalError as e:
+            logger.warning(f"[WARN] FTS5 no disponible, la búsqueda usará LIKE: {e}")
+            return
+
+        cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS clientes_fts_ai AFTER INSERT ON clientes BEGIN
+            INSERT INTO clientes_fts(rowid, nombre_completo, email, razon_social)
+            VALUES (new.rowid, new.nombre_completo, new.email, new.razon_social);
+        END
+        """)
+        cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS clientes_fts_ad AFTER DELETE ON clientes BEGIN
+            INSERT INTO clientes_fts(clientes_fts, rowid, nombre_completo, email, razon_social)
+            VALUES ('delete', old.rowid, old.nombre_completo, old.email, old.razon_social);
+        END
+        """)
+        cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS clientes_fts_au
+        AFTER UPDATE OF nombre_completo, email, razon_social ON clientes BEGIN
+            INSERT INTO clientes_fts(clientes_fts, rowid, nombre_completo, email, razon_social)
+            VALUES ('delete', old.rowid, old.nombre_completo, old.email, old.razon_social);
+            INSERT INTO clientes_fts(rowid, nombre_completo, email, razon_social)
+            VALUES (new.rowid, new.nombre_completo, new.email, new.razon_social);
+        END
+        """)
+
+        # Bases de datos anteriores al índice: indexar los clientes existentes
+        if not existia:
+            cursor.execute("INSERT INTO clientes_fts(clientes_fts) VALUES ('rebuild')")
+
+    def _init_versiones(self, cursor: sqlite3.Cursor):
+        """
+        Crear `versiones_clientes` y los triggers que la mantienen.
+
+        Cada cliente tiene un contador que sube con cualquier escritura
+        sobre él o sobre sus contactos, actividades u oportunidades; la
+        fila VERSION_GLOBAL sube con cualquier escritura y guarda la hora
+        (UTC) del último cambio. Así un GET condicional se resuelve con una
+        lectura por clave primaria.
+        """
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS versiones_clientes (
+            cliente_id TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0,
+            fecha_modificacion TEXT NOT NULL
+        )
+        """)
+        cursor.execute("""
+        INSERT OR IGNORE INTO versiones_clientes (cliente_id, version, fecha_modificacion)
+        VALUES (?, 0, strftime('%Y-%m-%d %H:%M:%f', 'now'))
+        """, (VERSION_GLOBAL,))
+
+        # `WHERE` obligatorio: sin él SQLite no distingue el ON CONFLICT del SELECT
+        def incrementar(*claves: str, condicion: str = "WHERE true") -> str:
+            filas = " UNION ALL ".join(
+                f"SELECT {clave}, 1, strftime('%Y-%m-%d %H:%M:%f', 'now')" for clave in claves
+            )
+            return f"""
+            INSERT INTO versiones_clientes (cliente_id, version, fecha_modificacion)
+            SELECT * FROM ({filas}) {condicion}
+            ON CONFLICT(cliente_id) DO UPDATE SET
+                version = version + 1, fecha_modificacion = excluded.fecha_modificacion;
+            """
+
+        global_ = f"'{VERSION_GLOBAL}'"
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS versiones_clientes_ai AFTER INSERT ON clientes BEGIN
+            {incrementar(global_)}
+        END
+        """)
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS versiones_clientes_au AFTER UPDATE ON clientes BEGIN
+            {incrementar("new.id", global_)}
+        END
+        """)
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS versiones_clientes_ad AFTER DELETE ON clientes BEGIN
+            DELETE FROM versiones_clientes WHERE cliente_id = old.id;
+            {incrementar(global_)}
+        END
+        """)
+
+        for tabla in ("contactos", "actividades", "oportunidades"):
+            cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS versiones_{tabla}_ai AFTER INSERT ON {tabla} BEGIN
+                {incrementar("new.cliente_id", global_)}
+            END
+            """)
+            cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS versiones_{tabla}_au AFTER UPDATE ON {tabla} BEGIN
+                {incrementar("old.cliente_id", "new.cliente_id", global_)}
+            END
+            """)
+            # En el borrado en cascada de un cliente no se recrea su fila
+            cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS versiones_{tabla}_ad AFTER DELETE ON {tabla} BEGIN
+                {incrementar("old.cliente_id", global_,
+                             condicion="WHERE 1 IN (SELECT 1 FROM clientes WHERE id = old.cliente_id)")}
+            END
+            """)
+
+    def reconstruir_indice_busqueda(self):
+        """Reindexar todos los clientes en `clientes_fts` (p. ej. tras un VACUUM)"""
+        if not self._fts_disponible:
+            return
+
+        conn = self._pool.adquirir()
+        try:
+            conn.execute("INSERT INTO clientes_fts(clientes_fts) VALUES ('rebuild')")
+            conn.commit()
+            logger.info("[OK] Índice de búsqueda reconstruido")
+        finally:
+            self._pool.liberar(conn)
 
     # =====================================================
     # CRUD CLIENTES
@@ -133,61 +584,337 @@ class CRMRepository:
         cliente_id = f"cli_{uuid.uuid4().hex[:12]}"
         ahora = datetime.now()
 
-        conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        conn = self._pool.adquirir()
         cursor = conn.cursor()
 
         try:
-            cursor.execute("""
-            INSERT INTO clientes (
-                id, nombre_completo, razon_social, tipo_cliente, email, cif_nif,
-                estado, segmento, sector_industria, website, notas, credito_disponible,
-                fecha_creacion, fecha_actualizacion
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                cliente_id, cliente_data.nombre_completo, cliente_data.razon_social,
-                cliente_data.tipo_cliente, cliente_data.email, cliente_data.cif_nif,
-                cliente_data.estado, cliente_data.segmento, cliente_data.sector_industria,
-                cliente_data.website, cliente_data.notas, cliente_data.credito_disponible,
-                ahora, ahora
-            ))
+            cursor.execute(SQL_INSERTAR_CLIENTE, self._fila_cliente(cliente_id, cliente_data, ahora))
 
             # Agregar contactos si existen
-            if cliente_data.contactos:
-                for contacto in cliente_data.contactos:
-                    self._crear_contacto(cliente_id, contacto, cursor)
+            contactos = [
+                self.crear_contacto(cliente_id, contacto, cursor)
+                for contacto in cliente_data.contactos or []
+            ]
 
             conn.commit()
-            logger.info(f"[OK] Cliente creado: {cliente_id}")
-
-            return self.obtener_cliente(cliente_id)
+            logger.info("[OK] Cliente creado: %s", cliente_id)
+
+            # Un cliente recién creado no tiene actividades ni oportunidades:
+            # se responde con lo insertado, sin releerlo
+            return Cliente(
+                **cliente_data.model_dump(exclude={"contactos"}),
+                id=cliente_id,
+                fecha_creacion=ahora,
+                fecha_actualizacion=ahora,
+                contactos=contactos
+            )
         except sqlite3.IntegrityError as e:
             conn.rollback()
             logger.error(f"[ERROR] Error al crear cliente: {e}")
             raise ValueError(f"Email o CIF ya existe: {e}")
         finally:
-            conn.close()
+            self._pool.liberar(conn)
+
+    @staticmethod
+    def _fila_cliente(cliente_id: str, cliente_data: ClienteCreate, ahora: datetime) -> tuple:
+        """Parámetros de SQL_INSERTAR_CLIENTE para un cliente nuevo"""
+        return (
+            cliente_id, cliente_data.nombre_completo, cliente_data.razon_social,
+            cliente_data.tipo_cliente, cliente_data.email, cliente_data.cif_nif,
+            cliente_data.estado, cliente_data.segmento, cliente_data.sector_industria,
+            cliente_data.website, cliente_data.notas, cliente_data.credito_disponible,
+            ahora, ahora
+        )
+
+    def importar_clientes(
+        self,
+        clientes: List[ClienteCreate],
+        tamano_lote: int = TAMANO_LOTE_IMPORTACION
+    ) -> tuple[int, List[Dict[str, Any]]]:
+        """
+        Importar muchos clientes (con sus contactos) en transacciones grandes.
+
+        Cada lote de `tamano_lote` clientes se inserta con `executemany`
+        y un único commit. Los duplicados de email o CIF/NIF (contra la base
+        de datos o dentro de la propia importación) se descartan y se
+        informan sin abortar el resto.
+
+        Args:
+            clientes: Clientes a importar
+            tamano_lote: Clientes por transacción
+
+        Returns:
+            tuple: (clientes creados, errores [{"indice", "error"}])
+        """
+        creados = 0
+        errores: List[Dict[str, Any]] = []
+
+        conn = self._pool.adquirir()
+        cursor = conn.cursor()
+
+        try:
+            for inicio in range(0, len(clientes), tamano_lote):
+                lote = list(enumerate(clientes[inicio:inicio + tamano_lote], inicio))
+                creados_lote, errores_lote = self._importar_lote(cursor, lote)
+                conn.commit()
+                creados += creados_lote
+                errores.extend(errores_lote)
+
+            logger.info("[OK] Importación de clientes: %d creados, %d con error", creados, len(errores))
+            return creados, errores
+        finally:
+            self._pool.liberar(conn)
+
+    def _importar_lote(
+        self,
+        cursor: sqlite3.Cursor,
+        lote: List[tuple[int, ClienteCreate]]
+    ) -> tuple[int, List[Dict[str, Any]]]:
+        """Insertar un lote de (índice, cliente) dentro de la transacción en curso"""
+        errores = []
+        emails_existentes = self._valores_existentes(cursor, "email", [c.email for _, c in lote if c.email])
+        cifs_existentes = self._valores_existentes(cursor, "cif_nif", [c.cif_nif for _, c in lote if c.cif_nif])
+
+        validos = []
+        for indice, cliente_data in lote:
+            if cliente_data.email and cliente_data.email.lower() in emails_existentes:
+                errores.append({"indice": indice, "error": f"Email ya existe: {cliente_data.email}"})
+                continue
+            if cliente_data.cif_nif and cliente_data.cif_nif.lower() in cifs_existentes:
+                errores.append({"indice": indice, "error": f"CIF ya existe: {cliente_data.cif_nif}"})
+                continue
+
+            # Los siguientes registros del lote chocan con este
+            if cliente_data.email:
+                emails_existentes.add(cliente_data.email.lower())
+            if cliente_data.cif_nif:
+                cifs_existentes.add(cliente_data.cif_nif.lower())
+            validos.append((indice, f"cli_{uuid.uuid4().hex[:12]}", cliente_data))
+
+        ahora = datetime.now()
+
+        def filas_contactos(cliente_id: str, cliente_data: ClienteCreate) -> List[tuple]:
+            return [
+                (f"cont_{uuid.uuid4().hex[:12]}", cliente_id, contacto.tipo, contacto.valor,
+                 contacto.principal, contacto.verificado, ahora)
+                for contacto in cliente_data.contactos or []
+            ]
+
+        cursor.execute("SAVEPOINT importacion_lote")
+        try:
+            cursor.executemany(
+                SQL_INSERTAR_CLIENTE,
+                [self._fila_cliente(cliente_id, cliente_data, ahora) for _, cliente_id, cliente_data in validos]
+            )
+            cursor.executemany(
+                SQL_INSERTAR_CONTACTO,
+                [fila for _, cliente_id, cliente_data in validos for fila in filas_contactos(cliente_id, cliente_data)]
+            )
+            cursor.execute("RELEASE importacion_lote")
+            return len(validos), errores
+        except sqlite3.IntegrityError:
+            # Conflicto no previsto (p. ej. escritura concurrente): repetir fila a fila
+            cursor.execute("ROLLBACK TO importacion_lote")
+            cursor.execute("RELEASE importacion_lote")
+
+        creados = 0
+        for indice, cliente_id, cliente_data in validos:
+            cursor.execute("SAVEPOINT importacion_fila")
+            try:
+                cursor.execute(SQL_INSERTAR_CLIENTE, self._fila_cliente(cliente_id, cliente_data, ahora))
+                cursor.executemany(SQL_INSERTAR_CONTACTO, filas_contactos(cliente_id, cliente_data))
+                cursor.execute("RELEASE importacion_fila")
+                creados += 1
+            except sqlite3.IntegrityError as e:
+                cursor.execute("ROLLBACK TO importacion_fila")
+                cursor.execute("RELEASE importacion_fila")
+                errores.append({"indice": indice, "error": f"Email o CIF ya existe: {e}"})
+
+        errores.sort(key=lambda error: error["indice"])
+        return creados, errores
+
+    def _valores_existentes(self, cursor: sqlite3.Cursor, columna: str, valores: List[str]) -> set:
+        """Valores de `valores` que ya existen (sin distinguir mayúsculas) en la columna única `columna`, en minúsculas"""
+        existentes = set()
+        for inicio in range(0, len(valores), self.TAMANO_LOTE_IN):
+            lote = valores[inicio:inicio + self.TAMANO_LOTE_IN]
+            marcadores = ", ".join("?" * len(lote))
+            cursor.execute(f"SELECT {columna} FROM clientes WHERE {columna} COLLATE NOCASE IN ({marcadores})", lote)
+            existentes.update(row[0].lower() for row in cursor.fetchall())
+        return existentes
+
+    def _clientes_existentes(self, cursor: sqlite3.Cursor, cliente_ids: List[str]) -> set:
+        """Ids de `cliente_ids` que existen, tal como están guardados (búsqueda binaria por clave primaria)"""
+        existentes = set()
+        for inicio in range(0, len(cliente_ids), self.TAMANO_LOTE_IN):
+            lote = cliente_ids[inicio:inicio + self.TAMANO_LOTE_IN]
+            marcadores = ", ".join("?" * len(lote))
+            cursor.execute(f"SELECT id FROM clientes WHERE id IN ({marcadores})", lote)
+            existentes.update(row[0] for row in cursor.fetchall())
+        return existentes
 
     def obtener_cliente(self, cliente_id: str) -> Optional[Cliente]:
-        """Obtener cliente por ID"""
-        conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
-        conn.row_factory = sqlite3.Row
+        """
+        Obtener cliente por ID (con caché de lectura).
+
+        El objeto devuelto puede estar compartido con la caché: no debe
+        modificarse.
+        """
+        return self.obtener_cliente_con_etag(cliente_id)[0]
+
+    def obtener_cliente_con_etag(self, cliente_id: str) -> tuple[Optional[Cliente], Optional[str]]:
+        """
+        Obtener (cliente, ETag) por ID; (None, None) si no existe.
+
+        Cada entrada de la caché guarda el ETag con el que se leyó y solo
+        se sirve si coincide con el actual: las escrituras de otros
+        procesos (que no invalidan esta caché) se ven en la siguiente
+        lectura y no tras el TTL. El ETag se lee antes que el cliente; si
+        hay una escritura entre medias el cuerpo es más nuevo que el ETag,
+        nunca más viejo.
+        """
+        etag = self.etag_cliente(cliente_id)
+        if etag is None:
+            return None, None
+
+        entrada = self._cache_clientes.obtener(cliente_id) if self._cache_clientes.activa else None
+        if entrada is not None and entrada[0] == etag:
+            return entrada[1], etag
+
+        generacion = self._cache_clientes.generacion()
+        cliente = self._obtener_cliente_por("id = ?", cliente_id)
+        if cliente is not None:
+            self._cache_clientes.guardar(cliente_id, (etag, cliente), generacion)
+        return cliente, etag
+
+    def etag_cliente(self, cliente_id: str) -> Optional[str]:
+        """
+        ETag del cliente sin cargarlo (None si no existe).
+
+        Combina `fecha_actualizacion` con la versión de sus datos
+        relacionados: una sola lectura indexada.
+        """
+        conn = self._pool.adquirir()
+        try:
+            row = conn.execute("""
+            SELECT c.fecha_actualizacion, COALESCE(v.version, 0) AS version
+            FROM clientes c LEFT JOIN versiones_clientes v ON v.cliente_id = c.id
+            WHERE c.id = ?
+            """, (cliente_id,)).fetchone()
+            return calcular_etag(cliente_id, row["fecha_actualizacion"], row["version"]) if row else None
+        finally:
+            self._pool.liberar(conn)
+
+    def version_clientes(self) -> tuple[str, datetime]:
+        """
+        ETag y fecha (UTC) de la última escritura en cualquier cliente.
+
+        Válido para cualquier listado: si no cambió nada, ninguna página
+        puede haber cambiado.
+        """
+        conn = self._pool.adquirir()
+        try:
+            row = conn.execute(
+                "SELECT version, fecha_modificacion FROM versiones_clientes WHERE cliente_id = ?",
+                (VERSION_GLOBAL,)
+            ).fetchone()
+            return calcular_etag(VERSION_GLOBAL, row["version"]), datetime.fromisoformat(row["fecha_modificacion"])
+        finally:
+            self._pool.liberar(conn)
+
+    def obtener_cliente_por_email(self, email: str) -> Optional[Cliente]:
+        """Obtener cliente por email exacto (sin distinguir mayúsculas), vía idx_cliente_email"""
+        return self._obtener_cliente_por("email = ? COLLATE NOCASE", email.strip())
+
+    def obtener_cliente_por_cif(self, cif_nif: str) -> Optional[Cliente]:
+        """Obtener cliente por CIF/NIF exacto (sin distinguir mayúsculas), vía idx_cliente_cif"""
+        return self._obtener_cliente_por("cif_nif = ? COLLATE NOCASE", cif_nif.strip())
+
+    def _obtener_cliente_por(self, condicion: str, valor: str) -> Optional[Cliente]:
+        """Lectura puntual de un cliente por una columna indexada, con sus relaciones"""
+        conn = self._pool.adquirir()
         cursor = conn.cursor()
 
         try:
-            cursor.execute("SELECT * FROM clientes WHERE id = ?", (cliente_id,))
+            cursor.execute(f"SELECT * FROM clientes WHERE {condicion} LIMIT 1", (valor,))
             row = cursor.fetchone()
 
             if not row:
                 return None
 
-            cliente_dict = dict(row)
-            cliente_dict['contactos'] = self._obtener_contactos(cliente_id, cursor)
-            cliente_dict['actividades_recientes'] = self._obtener_actividades(cliente_id, cursor, limit=5)
-            cliente_dict['oportunidades'] = self._obtener_oportunidades(cliente_id, cursor)
+            cliente_id = row['id']
+            return MAPEO_CLIENTE.uno(row, {
+                'contactos': self._obtener_contactos(cliente_id, cursor),
+                'actividades_recientes': self._obtener_actividades(cliente_id, cursor, limit=5),
+                'oportunidades': self._obtener_oportunidades(cliente_id, cursor),
+            })
+        finally:
+            self._pool.liberar(conn)
+
+    @staticmethod
+    def _proyeccion(
+        campos: Optional[List[str]],
+        expandir: Optional[List[str]]
+    ) -> tuple[List[str], tuple]:
+        """
+        Validar `campos` y `expandir` y devolver (columnas, relaciones).
+
+        None equivale a "todos"; `id` se selecciona siempre.
+
+        Raises:
+            ValueError: Si algún campo o relación no existe
+        """
+        if campos is None:
+            columnas = list(COLUMNAS_CLIENTE)
+        else:
+            desconocidos = [campo for campo in campos if campo not in COLUMNAS_CLIENTE]
+            if desconocidos:
+                raise ValueError(f"Campos no válidos: {', '.join(desconocidos)}")
+            columnas = list(dict.fromkeys(["id", *campos]))
+
+        if expandir is None:
+            relaciones = RELACIONES_CLIENTE
+        else:
+            desconocidas = [relacion for relacion in expandir if relacion not in RELACIONES_CLIENTE]
+            if desconocidas:
+                raise ValueError(f"Relaciones no válidas: {', '.join(desconocidas)}")
+            relaciones = tuple(dict.fromkeys(expandir))
+
+        return columnas, relaciones
+
+    def obtener_cliente_parcial(
+        self,
+        cliente_id: str,
+        campos: Optional[List[str]] = None,
+        expandir: Optional[List[str]] = None
+    ) -> Optional[ClienteParcial]:
+        """
+        Obtener un cliente con solo las columnas y relaciones pedidas.
+
+        Las columnas se proyectan en el SELECT y las relaciones no pedidas
+        no se consultan. No pasa por la caché de clientes.
 
-            return Cliente(**cliente_dict)
+        Raises:
+            ValueError: Si algún campo o relación no existe
+        """
+        columnas, relaciones = self._proyeccion(campos, expandir)
+
+        conn = self._pool.adquirir()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute(f"SELECT {', '.join(columnas)} FROM clientes WHERE id = ?", (cliente_id,))
+            row = cursor.fetchone()
+
+            if not row:
+                return None
+
+            relaciones_cliente = self._cargar_relaciones(
+                [cliente_id], cursor, limite_actividades=5, incluir=relaciones
+            )[cliente_id] if relaciones else None
+            return MAPEO_CLIENTE_PARCIAL.uno(row, relaciones_cliente)
         finally:
-            conn.close()
+            self._pool.liberar(conn)
 
     def listar_clientes(
         self,
@@ -195,55 +922,150 @@ class CRMRepository:
         limit: int = 50,
         estado: Optional[str] = None,
         segmento: Optional[str] = None,
-        buscar: Optional[str] = None
-    ) -> tuple[List[Cliente], int]:
-        """Listar clientes con filtros"""
-        conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
-        conn.row_factory = sqlite3.Row
+        buscar: Optional[str] = None,
+        cursor_pagina: Optional[str] = None,
+        contar: str = "exacto",
+        campos: Optional[List[str]] = None,
+        expandir: Optional[List[str]] = None
+    ) -> tuple[List[Cliente], Optional[int], Optional[str]]:
+        """
+        Listar clientes con filtros y paginación por cursor.
+
+        Args:
+            cursor_pagina: Cursor opaco devuelto en la página anterior
+                (`next_cursor`). Pagina por `(fecha_actualizacion, id)` sobre
+                el índice compuesto, así la página N cuesta lo mismo que la 1.
+                Con `buscar` (FTS) pagina por `(rank, id)` mientras no cambie
+                ningún cliente: el rank bm25 depende de las estadísticas de
+                todo el índice, así que tras una escritura el cursor ya no
+                encaja con los rank nuevos y la página sigue por posición
+                (OFFSET) en la ordenación actual. Entonces una fila cuya
+                relevancia relativa cambió puede repetirse u omitirse.
+            contar: "exacto" (COUNT(*)), "estimado" (MAX(rowid) si no hay
+                filtros, exacto en otro caso) o "no" (no calcula el total).
+            campos: Columnas a devolver (None = todas). Con `campos` o
+                `expandir` se devuelven `ClienteParcial`.
+            expandir: Relaciones a cargar (None = todas, [] = ninguna)
+
+        Returns:
+            tuple: (clientes, total o None, cursor de la página siguiente o None)
+
+        Raises:
+            ValueError: Si el cursor, el modo de conteo, un campo o una
+                relación no son válidos
+        """
+        if contar not in MODOS_CONTEO:
+            raise ValueError(f"Modo de conteo no válido: {contar}")
+
+        proyectado = campos is not None or expandir is not None
+        columnas, relaciones = self._proyeccion(campos, expandir)
+        # Las columnas del cursor se leen aunque no se devuelvan
+        seleccion = "*" if campos is None else ", ".join(
+            f"clientes.{columna}" for columna in dict.fromkeys([*columnas, "fecha_actualizacion"])
+        )
+
+        conn = self._pool.adquirir()
         cursor = conn.cursor()
 
         try:
-            query = "SELECT * FROM clientes WHERE 1=1"
+            query = f"SELECT {seleccion} FROM clientes WHERE 1=1"
             params = []
 
+            # Con FTS la búsqueda parte del índice y se ordena por relevancia
+            busqueda_fts = bool(buscar) and self._fts_disponible
+            if busqueda_fts:
+                # Una sola instantánea: la versión que lleva el cursor es la de los rank leídos
+                cursor.execute("BEGIN")
+                version = cursor.execute(
+                    "SELECT version FROM versiones_clientes WHERE cliente_id = ?", (VERSION_GLOBAL,)
+                ).fetchone()["version"]
+                query = (
+                    f"SELECT {'clientes.*' if campos is None else seleccion}, clientes_fts.rank AS relevancia "
+                    "FROM clientes_fts JOIN clientes ON clientes.rowid = clientes_fts.rowid "
+                    "WHERE clientes_fts MATCH ?"
+                )
+                params.append(consulta_fts(buscar))
+
             if estado:
                 query += " AND estado = ?"
                 params.append(estado)
             if segmento:
                 query += " AND segmento = ?"
                 params.append(segmento)
-            if buscar:
+            if buscar and not busqueda_fts:
                 query += " AND (nombre_completo LIKE ? OR email LIKE ? OR razon_social LIKE ?)"
                 buscar_param = f"%{buscar}%"
                 params.extend([buscar_param, buscar_param, buscar_param])
 
             # Contar total
-            count_query = query.replace("SELECT *", "SELECT COUNT(*)")
-            cursor.execute(count_query, params)
-            total = cursor.fetchone()[0]
-
-            # Obtener página
-            query += " ORDER BY fecha_actualizacion DESC LIMIT ? OFFSET ?"
-            params.extend([limit, skip])
+            total = None
+            if contar == "estimado" and not params:
+                cursor.execute("SELECT COALESCE(MAX(rowid), 0) FROM clientes")
+                total = cursor.fetchone()[0]
+            elif contar != "no":
+                count_query = "SELECT COUNT(*) " + query[query.index("FROM"):]
+                cursor.execute(count_query, params)
+                total = cursor.fetchone()[0]
+
+            # Posicionarse tras la última fila de la página anterior
+            if busqueda_fts:
+                orden = "clientes_fts.rank, clientes.id"
+                columnas_cursor = ("relevancia", "id")
+            else:
+                orden = "fecha_actualizacion DESC, id DESC"
+                columnas_cursor = ("fecha_actualizacion", "id")
+
+            # Filas ya servidas en las páginas anteriores de la búsqueda
+            posicion = 0
+            desplazamiento = skip
+            if cursor_pagina and busqueda_fts:
+                valor_orden, ultimo_id, posicion, version_cursor = decodificar_cursor(cursor_pagina)
+                if not isinstance(posicion, int) or posicion < 0:
+                    raise ValueError("Cursor de paginación no válido")
+                if version_cursor == version:
+                    query += " AND (clientes_fts.rank, clientes.id) > (?, ?)"
+                    params.extend([valor_orden, ultimo_id])
+                else:
+                    # Los rank cambiaron desde la página anterior: seguir por posición
+                    desplazamiento += posicion
+            elif cursor_pagina:
+                valor_orden, ultimo_id = decodificar_cursor(cursor_pagina)
+                query += " AND (fecha_actualizacion, id) < (?, ?)"
+                params.extend([valor_orden, ultimo_id])
+
+            # Obtener página (una fila extra para saber si hay siguiente)
+            query += f" ORDER BY {orden} LIMIT ? OFFSET ?"
+            params.extend([limit + 1, desplazamiento])
 
             cursor.execute(query, params)
             rows = cursor.fetchall()
 
-            clientes = []
-            for row in rows:
-                cliente_dict = dict(row)
-                cliente_dict['contactos'] = self._obtener_contactos(cliente_dict['id'], cursor)
-                cliente_dict['actividades_recientes'] = self._obtener_actividades(cliente_dict['id'], cursor, limit=3)
-                cliente_dict['oportunidades'] = self._obtener_oportunidades(cliente_dict['id'], cursor)
-                clientes.append(Cliente(**cliente_dict))
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                valores_cursor = [rows[-1][columna] for columna in columnas_cursor]
+                if busqueda_fts:
+                    valores_cursor += [posicion + skip + limit, version]
+                next_cursor = codificar_cursor(*valores_cursor)
+
+            # Relaciones de toda la página: una consulta por tabla en vez de tres por cliente
+            relaciones_pagina = self._cargar_relaciones(
+                [row['id'] for row in rows], cursor, limite_actividades=3, incluir=relaciones
+            )
+
+            extras = [relaciones_pagina[row['id']] for row in rows]
+            if proyectado:
+                clientes = MAPEO_CLIENTE_PARCIAL.todos(rows, extras, columnas=columnas)
+            else:
+                clientes = MAPEO_CLIENTE.todos(rows, extras)
 
-            return clientes, total
+            return clientes, total, next_cursor
         finally:
-            conn.close()
+            self._pool.liberar(conn)
 
     def actualizar_cliente(self, cliente_id: str, cliente_data: ClienteUpdate) -> Cliente:
         """Actualizar cliente"""
-        conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        conn = self._pool.adquirir()
         cursor = conn.cursor()
 
         try:
@@ -263,67 +1085,79 @@ class CRMRepository:
                 query = f"UPDATE clientes SET {', '.join(campos_actualizar)} WHERE id = ?"
                 cursor.execute(query, valores)
                 conn.commit()
-                logger.info(f"[OK] Cliente actualizado: {cliente_id}")
+                self._cache_clientes.invalidar(cliente_id)
+                logger.info("[OK] Cliente actualizado: %s", cliente_id)
 
             return self.obtener_cliente(cliente_id)
         finally:
-            conn.close()
+            self._pool.liberar(conn)
 
     def eliminar_cliente(self, cliente_id: str) -> bool:
         """Eliminar cliente"""
-        conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        conn = self._pool.adquirir()
         cursor = conn.cursor()
 
         try:
             cursor.execute("DELETE FROM clientes WHERE id = ?", (cliente_id,))
             conn.commit()
-            logger.info(f"[OK] Cliente eliminado: {cliente_id}")
+            self._cache_clientes.invalidar(cliente_id)
+            logger.info("[OK] Cliente eliminado: %s", cliente_id)
             return cursor.rowcount > 0
         finally:
-            conn.close()
+            self._pool.liberar(conn)
 
     # =====================================================
     # OPERACIONES CONTACTOS
     # =====================================================
 
-    def _crear_contacto(
+    def crear_contacto(
         self,
         cliente_id: str,
         contacto: ContactoSchema,
         cursor: Optional[sqlite3.Cursor] = None
-    ):
-        """Crear contacto para cliente"""
+    ) -> Optional[ContactoSchema]:
+        """
+        Crear contacto para cliente y devolverlo con su id.
+
+        Con `cursor` se inserta dentro de la transacción del llamador (que
+        hace el commit). Sin él, devuelve None si el cliente no existe.
+        """
         contacto_id = f"cont_{uuid.uuid4().hex[:12]}"
+        ahora = datetime.now()
         should_close = cursor is None
 
         if cursor is None:
-            conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+            conn = self._pool.adquirir()
             cursor = conn.cursor()
         else:
             conn = None
 
         try:
-            cursor.execute("""
-            INSERT INTO contactos (id, cliente_id, tipo, valor, principal, verificado, fecha_creacion)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
+            cursor.execute(SQL_INSERTAR_CONTACTO, (
                 contacto_id, cliente_id, contacto.tipo, contacto.valor,
-                contacto.principal, contacto.verificado, datetime.now()
+                contacto.principal, contacto.verificado, ahora
             ))
 
             if conn:
                 conn.commit()
+            self._cache_clientes.invalidar(cliente_id)
+            return contacto.model_copy(update={"id": contacto_id, "fecha_creacion": ahora})
+        except sqlite3.IntegrityError:
+            # La clave foránea rechaza un cliente inexistente
+            if not conn:
+                raise
+            conn.rollback()
+            return None
         finally:
             if conn and should_close:
-                conn.close()
+                self._pool.liberar(conn)
 
     def _obtener_contactos(self, cliente_id: str, cursor: Optional[sqlite3.Cursor] = None) -> List[ContactoSchema]:
         """Obtener contactos de un cliente"""
         should_close = cursor is None
 
         if cursor is None:
-            conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
-            conn.row_factory = sqlite3.Row
+            conn = self._pool.adquirir()
             cursor = conn.cursor()
         else:
             conn = None
@@ -331,40 +1165,87 @@ class CRMRepository:
         try:
             cursor.execute("SELECT * FROM contactos WHERE cliente_id = ?", (cliente_id,))
             rows = cursor.fetchall()
-            return [ContactoSchema(**dict(row)) for row in rows]
+            return MAPEO_CONTACTO.todos(rows)
         finally:
             if conn and should_close:
-                conn.close()
+                self._pool.liberar(conn)
 
     # =====================================================
     # OPERACIONES ACTIVIDADES
     # =====================================================
 
-    def crear_actividad(self, cliente_id: str, actividad: ActividadSchema) -> ActividadSchema:
-        """Crear actividad para cliente"""
+    def crear_actividad(self, cliente_id: str, actividad: ActividadSchema) -> Optional[ActividadSchema]:
+        """Crear actividad para cliente (None si el cliente no existe)"""
         actividad_id = f"act_{uuid.uuid4().hex[:12]}"
 
-        conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        conn = self._pool.adquirir()
         cursor = conn.cursor()
 
         try:
-            cursor.execute("""
-            INSERT INTO actividades (
-                id, cliente_id, tipo, titulo, descripcion, fecha, completada, responsable, notas
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                actividad_id, cliente_id, actividad.tipo, actividad.titulo,
-                actividad.descripcion, actividad.fecha, actividad.completada,
-                actividad.responsable, actividad.notas
-            ))
+            cursor.execute(SQL_INSERTAR_ACTIVIDAD, self._fila_actividad(actividad_id, cliente_id, actividad))
 
             conn.commit()
-            logger.info(f"[OK] Actividad creada para cliente {cliente_id}: {actividad_id}")
+            self._cache_clientes.invalidar(cliente_id)
+            logger.info("[OK] Actividad creada para cliente %s: %s", cliente_id, actividad_id)
 
-            actividad.id = actividad_id
-            return actividad
+            return actividad.model_copy(update={"id": actividad_id})
+        except sqlite3.IntegrityError:
+            # La clave foránea rechaza un cliente inexistente
+            conn.rollback()
+            return None
         finally:
-            conn.close()
+            self._pool.liberar(conn)
+
+    def crear_actividades_lote(
+        self,
+        actividades: List[tuple[str, ActividadSchema]]
+    ) -> List[Optional[ActividadSchema]]:
+        """
+        Crear muchas actividades (cliente_id, actividad) en una sola transacción.
+
+        Las actividades sin id reciben uno nuevo. El resultado sigue el
+        orden de la entrada, con None en las de clientes inexistentes (que
+        no abortan el resto del lote).
+        """
+        creadas = [
+            actividad if actividad.id else actividad.model_copy(update={"id": f"act_{uuid.uuid4().hex[:12]}"})
+            for _, actividad in actividades
+        ]
+
+        conn = self._pool.adquirir()
+        cursor = conn.cursor()
+
+        try:
+            # Bloqueo de escritura desde el principio: ningún cliente
+            # desaparece entre la comprobación y el INSERT
+            cursor.execute("BEGIN IMMEDIATE")
+            existentes = self._clientes_existentes(cursor, list({cliente_id for cliente_id, _ in actividades}))
+            cursor.executemany(SQL_INSERTAR_ACTIVIDAD, [
+                self._fila_actividad(actividad.id, cliente_id, actividad)
+                for (cliente_id, _), actividad in zip(actividades, creadas)
+                if cliente_id in existentes
+            ])
+            conn.commit()
+        finally:
+            self._pool.liberar(conn)
+
+        for cliente_id in existentes:
+            self._cache_clientes.invalidar(cliente_id)
+        logger.info("[OK] Lote de actividades: %d recibidas en una transacción", len(actividades))
+
+        return [
+            actividad if cliente_id in existentes else None
+            for (cliente_id, _), actividad in zip(actividades, creadas)
+        ]
+
+    @staticmethod
+    def _fila_actividad(actividad_id: str, cliente_id: str, actividad: ActividadSchema) -> tuple:
+        """Parámetros de SQL_INSERTAR_ACTIVIDAD"""
+        return (
+            actividad_id, cliente_id, actividad.tipo, actividad.titulo,
+            actividad.descripcion, actividad.fecha, actividad.completada,
+            actividad.responsable, actividad.notas
+        )
 
     def _obtener_actividades(
         self,
@@ -376,8 +1257,7 @@ class CRMRepository:
         should_close = cursor is None
 
         if cursor is None:
-            conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
-            conn.row_factory = sqlite3.Row
+            conn = self._pool.adquirir()
             cursor = conn.cursor()
         else:
             conn = None
@@ -388,20 +1268,96 @@ class CRMRepository:
                 (cliente_id, limit)
             )
             rows = cursor.fetchall()
-            return [ActividadSchema(**dict(row)) for row in rows]
+            return MAPEO_ACTIVIDAD.todos(rows)
         finally:
             if conn and should_close:
-                conn.close()
+                self._pool.liberar(conn)
+
+    def listar_actividades(
+        self,
+        cliente_id: str,
+        limit: int = 50,
+        tipos: Optional[List[str]] = None,
+        completada: Optional[bool] = None,
+        responsable: Optional[str] = None,
+        desde: Optional[datetime] = None,
+        hasta: Optional[datetime] = None,
+        cursor_pagina: Optional[str] = None
+    ) -> tuple[List[ActividadSchema], Optional[str]]:
+        """
+        Historial de actividades de un cliente, de la más reciente a la más antigua.
+
+        Args:
+            tipos: Solo estos tipos (None = todos)
+            completada: Solo completadas (True) o pendientes (False)
+            responsable: Responsable exacto
+            desde: fecha >= (inclusive)
+            hasta: fecha < (exclusiva)
+            cursor_pagina: `next_cursor` de la página anterior. Pagina por
+                `(fecha, id)` sobre idx_actividades_cliente_fecha: cualquier
+                página cuesta lo mismo aunque el cliente tenga decenas de
+                miles de actividades.
+
+        Returns:
+            tuple: (actividades, cursor de la página siguiente o None)
+
+        Raises:
+            ValueError: Si el cursor o algún tipo no son válidos
+        """
+        query = "SELECT * FROM actividades WHERE cliente_id = ?"
+        params: list = [cliente_id]
+
+        if tipos:
+            try:
+                valores = [TipoActividad(tipo).value for tipo in tipos]
+            except ValueError:
+                raise ValueError(f"Tipo de actividad no válido: {', '.join(tipos)}")
+            query += f" AND tipo IN ({', '.join('?' * len(valores))})"
+            params.extend(valores)
+        if completada is not None:
+            query += " AND completada = ?"
+            params.append(completada)
+        if responsable:
+            query += " AND responsable = ?"
+            params.append(responsable)
+        if desde:
+            query += " AND fecha >= ?"
+            params.append(desde)
+        if hasta:
+            query += " AND fecha < ?"
+            params.append(hasta)
+        if cursor_pagina:
+            fecha, ultimo_id = decodificar_cursor(cursor_pagina)
+            query += " AND (fecha, id) < (?, ?)"
+            params.extend([fecha, ultimo_id])
+
+        # Una fila extra para saber si hay página siguiente
+        query += " ORDER BY fecha DESC, id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        conn = self._pool.adquirir()
+        try:
+            rows = conn.execute(query, params).fetchall()
+        finally:
+            self._pool.liberar(conn)
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = codificar_cursor(rows[-1]["fecha"], rows[-1]["id"])
+
+        return MAPEO_ACTIVIDAD.todos(rows), next_cursor
 
     # =====================================================
     # OPERACIONES OPORTUNIDADES
     # =====================================================
 
-    def crear_oportunidad(self, cliente_id: str, oportunidad: OportunidadSchema) -> OportunidadSchema:
-        """Crear oportunidad para cliente"""
+    def crear_oportunidad(self, cliente_id: str, oportunidad: OportunidadSchema) -> Optional[OportunidadSchema]:
+        """Crear oportunidad para cliente (None si el cliente no existe)"""
         oportunidad_id = f"opp_{uuid.uuid4().hex[:12]}"
+        ahora = datetime.now()
 
-        conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        conn = self._pool.adquirir()
         cursor = conn.cursor()
 
         try:
@@ -417,24 +1373,29 @@ class CRMRepository:
                 oportunidad_id, cliente_id, oportunidad.titulo, oportunidad.descripcion,
                 oportunidad.estado, oportunidad.valor_estimado, oportunidad.probabilidad_cierre,
                 oportunidad.fecha_cierre_esperada, productos_json, oportunidad.notas,
-                datetime.now(), datetime.now()
+                ahora, ahora
             ))
 
             conn.commit()
-            logger.info(f"[OK] Oportunidad creada para cliente {cliente_id}: {oportunidad_id}")
+            self._cache_clientes.invalidar(cliente_id)
+            logger.info("[OK] Oportunidad creada para cliente %s: %s", cliente_id, oportunidad_id)
 
-            oportunidad.id = oportunidad_id
-            return oportunidad
+            return oportunidad.model_copy(
+                update={"id": oportunidad_id, "fecha_creacion": ahora, "fecha_actualizacion": ahora}
+            )
+        except sqlite3.IntegrityError:
+            # La clave foránea rechaza un cliente inexistente
+            conn.rollback()
+            return None
         finally:
-            conn.close()
+            self._pool.liberar(conn)
 
     def _obtener_oportunidades(self, cliente_id: str, cursor: Optional[sqlite3.Cursor] = None) -> List[OportunidadSchema]:
         """Obtener oportunidades abiertas de un cliente"""
         should_close = cursor is None
 
         if cursor is None:
-            conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
-            conn.row_factory = sqlite3.Row
+            conn = self._pool.adquirir()
             cursor = conn.cursor()
         else:
             conn = None
@@ -446,74 +1407,519 @@ class CRMRepository:
             )
             rows = cursor.fetchall()
 
-            oportunidades = []
-            for row in rows:
-                row_dict = dict(row)
-                if row_dict['productos']:
-                    row_dict['productos'] = json.loads(row_dict['productos'])
-                oportunidades.append(OportunidadSchema(**row_dict))
-
-            return oportunidades
+            return MAPEO_OPORTUNIDAD.todos(rows)
         finally:
             if conn and should_close:
-                conn.close()
+                self._pool.liberar(conn)
+
+    @staticmethod
+    def _filtros_oportunidades(
+        estados: Optional[List[str]] = None,
+        cierre_desde: Optional[datetime] = None,
+        cierre_hasta: Optional[datetime] = None,
+        valor_minimo: Optional[float] = None,
+        segmento: Optional[str] = None
+    ) -> tuple[str, str, list]:
+        """
+        FROM, WHERE y parámetros comunes a los listados del pipeline.
+
+        Raises:
+            ValueError: Si algún estado no es un EstadoOportunidad
+        """
+        origen = "oportunidades o"
+        condiciones = ["1=1"]
+        params: list = []
+
+        if estados:
+            try:
+                valores = [EstadoOportunidad(estado).value for estado in estados]
+            except ValueError:
+                raise ValueError(f"Estado de oportunidad no válido: {', '.join(estados)}")
+            condiciones.append(f"o.estado IN ({', '.join('?' * len(valores))})")
+            params.extend(valores)
+        if cierre_desde:
+            condiciones.append("o.fecha_cierre_esperada >= ?")
+            params.append(cierre_desde)
+        if cierre_hasta:
+            condiciones.append("o.fecha_cierre_esperada < ?")
+            params.append(cierre_hasta)
+        if valor_minimo is not None:
+            condiciones.append("o.valor_estimado >= ?")
+            params.append(valor_minimo)
+        if segmento:
+            origen += " JOIN clientes c ON c.id = o.cliente_id"
+            condiciones.append("c.segmento = ?")
+            params.append(segmento)
+
+        return origen, " AND ".join(condiciones), params
+
+    def listar_oportunidades(
+        self,
+        limit: int = 50,
+        estados: Optional[List[str]] = None,
+        cierre_desde: Optional[datetime] = None,
+        cierre_hasta: Optional[datetime] = None,
+        valor_minimo: Optional[float] = None,
+        segmento: Optional[str] = None,
+        cursor_pagina: Optional[str] = None
+    ) -> tuple[List[OportunidadCliente], Optional[str]]:
+        """
+        Oportunidades de todos los clientes, por fecha de cierre esperada.
+
+        Args:
+            estados: Solo estos estados (None = todos)
+            cierre_desde: Fecha de cierre >= (inclusive)
+            cierre_hasta: Fecha de cierre < (exclusiva)
+            valor_minimo: valor_estimado >=
+            segmento: Segmento del cliente
+            cursor_pagina: `next_cursor` de la página anterior. Pagina por
+                `(fecha_cierre_esperada, id)` sobre idx_oportunidades_cierre.
+
+        Returns:
+            tuple: (oportunidades, cursor de la página siguiente o None)
+
+        Raises:
+            ValueError: Si el cursor o un estado no son válidos
+        """
+        origen, condiciones, params = self._filtros_oportunidades(
+            estados, cierre_desde, cierre_hasta, valor_minimo, segmento
+        )
+        if cursor_pagina:
+            fecha_cierre, ultimo_id = decodificar_cursor(cursor_pagina)
+            condiciones += " AND (o.fecha_cierre_esperada, o.id) > (?, ?)"
+            params.extend([fecha_cierre, ultimo_id])
+
+        conn = self._pool.adquirir()
+        try:
+            # Una fila extra para saber si hay página siguiente
+            rows = conn.execute(f"""
+            SELECT o.* FROM {origen}
+            WHERE {condiciones}
+            ORDER BY o.fecha_cierre_esperada, o.id
+            LIMIT ?
+            """, (*params, limit + 1)).fetchall()
+
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = codificar_cursor(rows[-1]["fecha_cierre_esperada"], rows[-1]["id"])
+
+            return MAPEO_OPORTUNIDAD_CLIENTE.todos(rows), next_cursor
+        finally:
+            self._pool.liberar(conn)
+
+    def pipeline_oportunidades(
+        self,
+        estados: Optional[List[str]] = None,
+        cierre_desde: Optional[datetime] = None,
+        cierre_hasta: Optional[datetime] = None,
+        valor_minimo: Optional[float] = None,
+        segmento: Optional[str] = None
+    ) -> PipelineOportunidades:
+        """
+        Número, valor total y valor ponderado por probabilidad de cierre de
+        las oportunidades, por estado y por mes de cierre esperado.
+
+        Una sola consulta de agregados (GROUP BY en SQLite sobre el índice
+        cubriente idx_oportunidades_estado_cierre). El resultado se guarda
+        en caché junto con la versión global de los datos: cualquier
+        escritura lo deja fuera de uso.
+
+        Raises:
+            ValueError: Si algún estado no es válido
+        """
+        origen, condiciones, params = self._filtros_oportunidades(
+            estados, cierre_desde, cierre_hasta, valor_minimo, segmento
+        )
+
+        conn = self._pool.adquirir()
+        try:
+            version = conn.execute(
+                "SELECT version FROM versiones_clientes WHERE cliente_id = ?", (VERSION_GLOBAL,)
+            ).fetchone()["version"]
+            clave = (version, origen, condiciones, tuple(params))
+            pipeline = self._cache_pipeline.obtener(clave)
+            if pipeline is not None:
+                return pipeline
+
+            generacion = self._cache_pipeline.generacion()
+            agregados = """
+                COUNT(*) AS oportunidades,
+                COALESCE(SUM(o.valor_estimado), 0) AS valor_total,
+                COALESCE(SUM(o.valor_estimado * o.probabilidad_cierre / 100.0), 0) AS valor_ponderado
+            """
+            rows = conn.execute(f"""
+            SELECT 'estado' AS dimension, o.estado AS grupo, {agregados}
+            FROM {origen} WHERE {condiciones}
+            GROUP BY o.estado
+            UNION ALL
+            SELECT 'mes', strftime('%Y-%m', o.fecha_cierre_esperada), {agregados}
+            FROM {origen} WHERE {condiciones}
+            GROUP BY 2
+            ORDER BY 1, 2
+            """, (*params, *params)).fetchall()
+        finally:
+            self._pool.liberar(conn)
+
+        orden_estados = {estado.value: posicion for posicion, estado in enumerate(EstadoOportunidad)}
+        por_estado = sorted(
+            (GrupoPipeline(**{clave: row[clave] for clave in GrupoPipeline.model_fields})
+             for row in rows if row["dimension"] == "estado"),
+            key=lambda grupo: orden_estados.get(grupo.grupo, len(orden_estados))
+        )
+        por_mes = [
+            GrupoPipeline(**{clave: row[clave] for clave in GrupoPipeline.model_fields})
+            for row in rows if row["dimension"] == "mes"
+        ]
+
+        pipeline = PipelineOportunidades(
+            oportunidades=sum(grupo.oportunidades for grupo in por_estado),
+            valor_total=sum(grupo.valor_total for grupo in por_estado),
+            valor_ponderado=sum(grupo.valor_ponderado for grupo in por_estado),
+            por_estado=por_estado,
+            por_mes=por_mes
+        )
+        self._cache_pipeline.guardar(clave, pipeline, generacion)
+        return pipeline
 
     # =====================================================
     # ESTADÍSTICAS
     # =====================================================
 
-    def obtener_resumen_crm(self) -> ResumenCRM:
-        """Obtener resumen general del CRM"""
-        conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
-        cursor = conn.cursor()
+    def _init_resumen(self, cursor: sqlite3.Cursor):
+        """
+        Crear la tabla `resumen_contadores` y los triggers que la mantienen.
 
-        try:
-            # Total clientes
-            cursor.execute("SELECT COUNT(*) FROM clientes")
-            total_clientes = cursor.fetchone()[0]
+        Cada escritura en clientes, actividades u oportunidades aplica su
+        delta a los contadores (se resta la fila antigua y se suma la
+        nueva), así el resumen se sirve sin recorrer las tablas. Los datos
+        anteriores a la tabla los cuenta `recalcular_resumen` (`_init_db`).
+        """
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS resumen_contadores (
+            clave TEXT PRIMARY KEY,
+            valor REAL NOT NULL DEFAULT 0
+        )
+        """)
 
-            # Clientes activos
-            cursor.execute("SELECT COUNT(*) FROM clientes WHERE estado = 'activo'")
-            clientes_activos = cursor.fetchone()[0]
+        # Oportunidades abiertas por fecha de cierre (oportunidades_proximas_cerrar)
+        cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_oportunidades_abiertas_cierre
+        ON oportunidades(fecha_cierre_esperada) WHERE estado NOT IN ('ganada', 'perdida')
+        """)
 
-            # Clientes nuevos este mes
-            cursor.execute("""
-            SELECT COUNT(*) FROM clientes 
-            WHERE strftime('%Y-%m', fecha_creacion) = strftime('%Y-%m', 'now')
-            """)
-            clientes_nuevos_mes = cursor.fetchone()[0]
+        for tabla, (contadores, columnas) in CONTADORES_RESUMEN.items():
+            def deltas(fila: str, signo: str) -> str:
+                return ", ".join(
+                    f"({clave.format(r=fila)}, {signo}COALESCE({expresion.format(r=fila)}, 0))"
+                    for clave, expresion in contadores
+                )
 
-            # Total facturado
-            cursor.execute("SELECT COALESCE(SUM(total_facturado), 0) FROM clientes")
-            valor_total_facturado = cursor.fetchone()[0]
+            upsert = "INSERT INTO resumen_contadores (clave, valor) VALUES {} " \
+                     "ON CONFLICT(clave) DO UPDATE SET valor = valor + excluded.valor;"
 
-            # Oportunidades abiertas
-            cursor.execute("""
-            SELECT COALESCE(SUM(valor_estimado), 0) FROM oportunidades
-            WHERE estado NOT IN ('ganada', 'perdida')
+            cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS resumen_{tabla}_ai AFTER INSERT ON {tabla} BEGIN
+                {upsert.format(deltas("new", ""))}
+            END
+            """)
+            cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS resumen_{tabla}_ad AFTER DELETE ON {tabla} BEGIN
+                {upsert.format(deltas("old", "-"))}
+            END
+            """)
+            cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS resumen_{tabla}_au AFTER UPDATE OF {", ".join(columnas)} ON {tabla} BEGIN
+                {upsert.format(deltas("old", "-"))}
+                {upsert.format(deltas("new", ""))}
+            END
             """)
-            valor_oportunidades_abiertas = cursor.fetchone()[0]
 
-            # Promedio días pago
-            cursor.execute("""
-            SELECT COALESCE(AVG(dias_desde_ultimo_contacto), 0) FROM clientes
-            WHERE dias_desde_ultimo_contacto IS NOT NULL
+    def _init_estadisticas_clientes(self, cursor: sqlite3.Cursor):
+        """
+        Crear `estadisticas_clientes` y los triggers que la mantienen.
+
+        Una fila por cliente con actividad u oportunidades: número de
+        actividades (y pendientes), fechas de la primera y la última, y
+        número y valor de las oportunidades abiertas. Cada escritura aplica
+        su delta; la primera/última fecha solo se vuelven a buscar (en
+        idx_actividades_cliente_fecha) si se borra o mueve la actividad
+        que las marcaba.
+        """
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS estadisticas_clientes (
+            cliente_id TEXT PRIMARY KEY,
+            actividades INTEGER NOT NULL DEFAULT 0,
+            actividades_pendientes INTEGER NOT NULL DEFAULT 0,
+            primera_actividad TIMESTAMP,
+            ultima_actividad TIMESTAMP,
+            oportunidades_abiertas INTEGER NOT NULL DEFAULT 0,
+            valor_oportunidades_abiertas REAL NOT NULL DEFAULT 0
+        )
+        """)
+
+        sumar_actividad = """
+        INSERT INTO estadisticas_clientes (cliente_id, actividades, actividades_pendientes, primera_actividad, ultima_actividad)
+        VALUES (new.cliente_id, 1, new.completada = 0, new.fecha, new.fecha)
+        ON CONFLICT(cliente_id) DO UPDATE SET
+            actividades = actividades + 1,
+            actividades_pendientes = actividades_pendientes + excluded.actividades_pendientes,
+            primera_actividad = COALESCE(MIN(primera_actividad, excluded.primera_actividad), primera_actividad, excluded.primera_actividad),
+            ultima_actividad = COALESCE(MAX(ultima_actividad, excluded.ultima_actividad), ultima_actividad, excluded.ultima_actividad);
+        """
+        # UPDATE y no upsert: el borrado en cascada de un cliente no recrea su fila
+        restar_actividad = """
+        UPDATE estadisticas_clientes SET
+            actividades = actividades - 1,
+            actividades_pendientes = actividades_pendientes - (old.completada = 0),
+            primera_actividad = CASE WHEN old.fecha <= primera_actividad
+                THEN (SELECT MIN(fecha) FROM actividades WHERE cliente_id = old.cliente_id)
+                ELSE primera_actividad END,
+            ultima_actividad = CASE WHEN old.fecha >= ultima_actividad
+                THEN (SELECT MAX(fecha) FROM actividades WHERE cliente_id = old.cliente_id)
+                ELSE ultima_actividad END
+        WHERE cliente_id = old.cliente_id;
+        """
+
+        abierta = SQL_OPORTUNIDAD_ABIERTA
+        sumar_oportunidad = f"""
+        INSERT INTO estadisticas_clientes (cliente_id, oportunidades_abiertas, valor_oportunidades_abiertas)
+        VALUES (new.cliente_id, {abierta.format(r="new")},
+                CASE WHEN {abierta.format(r="new")} THEN new.valor_estimado ELSE 0 END)
+        ON CONFLICT(cliente_id) DO UPDATE SET
+            oportunidades_abiertas = oportunidades_abiertas + excluded.oportunidades_abiertas,
+            valor_oportunidades_abiertas = valor_oportunidades_abiertas + excluded.valor_oportunidades_abiertas;
+        """
+        restar_oportunidad = f"""
+        UPDATE estadisticas_clientes SET
+            oportunidades_abiertas = oportunidades_abiertas - ({abierta.format(r="old")}),
+            valor_oportunidades_abiertas = valor_oportunidades_abiertas
+                - CASE WHEN {abierta.format(r="old")} THEN old.valor_estimado ELSE 0 END
+        WHERE cliente_id = old.cliente_id;
+        """
+
+        for tabla, sumar, restar, columnas in (
+            ("actividades", sumar_actividad, restar_actividad, "cliente_id, fecha, completada"),
+            ("oportunidades", sumar_oportunidad, restar_oportunidad, "cliente_id, estado, valor_estimado"),
+        ):
+            cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS estadisticas_{tabla}_ai AFTER INSERT ON {tabla} BEGIN
+                {sumar}
+            END
+            """)
+            cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS estadisticas_{tabla}_ad AFTER DELETE ON {tabla} BEGIN
+                {restar}
+            END
             """)
-            promedio_dias_pago = cursor.fetchone()[0]
+            cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS estadisticas_{tabla}_au AFTER UPDATE OF {columnas} ON {tabla} BEGIN
+                {restar}
+                {sumar}
+            END
+            """)
+
+        cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS estadisticas_clientes_ad AFTER DELETE ON clientes BEGIN
+            DELETE FROM estadisticas_clientes WHERE cliente_id = old.id;
+        END
+        """)
+
+    def _poblar_estadisticas_clientes(self, cursor: sqlite3.Cursor):
+        """
+        Recalcular los contadores de `estadisticas_clientes` a partir de
+        actividades y oportunidades (la puntuación de salud se conserva).
+        """
+        cursor.execute("""
+        UPDATE estadisticas_clientes SET
+            actividades = 0, actividades_pendientes = 0, primera_actividad = NULL, ultima_actividad = NULL,
+            oportunidades_abiertas = 0, valor_oportunidades_abiertas = 0
+        """)
+        cursor.execute("""
+        INSERT INTO estadisticas_clientes (cliente_id, actividades, actividades_pendientes, primera_actividad, ultima_actividad)
+        SELECT cliente_id, COUNT(*), SUM(completada = 0), MIN(fecha), MAX(fecha)
+        FROM actividades
+        WHERE true
+        GROUP BY cliente_id
+        ON CONFLICT(cliente_id) DO UPDATE SET
+            actividades = excluded.actividades,
+            actividades_pendientes = excluded.actividades_pendientes,
+            primera_actividad = excluded.primera_actividad,
+            ultima_actividad = excluded.ultima_actividad
+        """)
+        cursor.execute(f"""
+        INSERT INTO estadisticas_clientes (cliente_id, oportunidades_abiertas, valor_oportunidades_abiertas)
+        SELECT cliente_id, COUNT(*), SUM(valor_estimado)
+        FROM oportunidades o
+        WHERE {SQL_OPORTUNIDAD_ABIERTA.format(r="o")}
+        GROUP BY cliente_id
+        ON CONFLICT(cliente_id) DO UPDATE SET
+            oportunidades_abiertas = excluded.oportunidades_abiertas,
+            valor_oportunidades_abiertas = excluded.valor_oportunidades_abiertas
+        """)
+
+    def recalcular_estadisticas_clientes(self):
+        """Recalcular las estadísticas por cliente desde cero (corrige la deriva de las sumas)"""
+        conn = self._pool.adquirir()
+
+        try:
+            self._poblar_estadisticas_clientes(conn.cursor())
+            conn.commit()
+            logger.info("[OK] Estadísticas por cliente recalculadas")
+        finally:
+            self._pool.liberar(conn)
+
+    def puntuar_salud_clientes(self, tamano_lote: int = TAMANO_LOTE_SALUD) -> Dict[str, Any]:
+        """
+        Puntuar la salud de todos los clientes y refrescar sus días sin
+        contacto (ver src/repositories/salud_clientes.py).
+
+        Usa una conexión dedicada: las peticiones siguen con el pool y
+        pueden escribir entre un lote y el siguiente.
+        """
+        with self._pool.conexion_dedicada() as conn:
+            resultado = puntuar_clientes(conn, tamano_lote)
+
+        # `dias_desde_ultimo_contacto` forma parte de los clientes en caché
+        self._cache_clientes.limpiar()
+        logger.info(
+            "[OK] Salud de %d clientes puntuada en %.2f s (%d lotes)",
+            resultado["clientes"], resultado["duracion_s"], resultado["lotes"]
+        )
+        return resultado
+
+    def obtener_estadisticas_cliente(self, cliente_id: str) -> Optional[EstadisticasCliente]:
+        """Estadísticas de un cliente (None si no existe): una lectura por clave primaria"""
+        estadisticas = self.obtener_estadisticas_clientes([cliente_id])
+        return estadisticas[0] if estadisticas else None
+
+    def obtener_estadisticas_clientes(self, cliente_ids: List[str]) -> List[EstadisticasCliente]:
+        """
+        Estadísticas de varios clientes, en el orden pedido (los que no
+        existen se omiten).
+
+        Lee `clientes` junto con `estadisticas_clientes`, ya mantenida
+        por los triggers: no recorre el historial de actividades ni de
+        oportunidades.
+        """
+        cliente_ids = list(dict.fromkeys(cliente_ids))
+        ahora = datetime.now()
+        filas = {}
+
+        conn = self._pool.adquirir()
+        try:
+            for inicio in range(0, len(cliente_ids), self.TAMANO_LOTE_IN):
+                lote = cliente_ids[inicio:inicio + self.TAMANO_LOTE_IN]
+                rows = conn.execute(f"""
+                SELECT c.id, c.total_facturado, c.numero_facturas, c.promedio_venta,
+                       c.tasa_pagos_a_tiempo, c.dias_desde_ultimo_contacto, c.fecha_creacion,
+                       e.actividades, e.actividades_pendientes, e.primera_actividad, e.ultima_actividad,
+                       e.oportunidades_abiertas, e.valor_oportunidades_abiertas,
+                       e.puntuacion_salud, e.salud_cliente
+                FROM clientes c LEFT JOIN estadisticas_clientes e ON e.cliente_id = c.id
+                WHERE c.id IN ({", ".join("?" * len(lote))})
+                """, lote).fetchall()
+                filas.update((row["id"], row) for row in rows)
+        finally:
+            self._pool.liberar(conn)
+
+        def dias_desde(fecha: Optional[str]) -> Optional[int]:
+            # Las actividades programadas pueden tener fecha futura
+            return max((ahora - datetime.fromisoformat(fecha)).days, 0) if fecha else None
+
+        estadisticas = []
+        for cliente_id in cliente_ids:
+            row = filas.get(cliente_id)
+            if row is None:
+                continue
+
+            dias_alta = dias_desde(row["fecha_creacion"]) or 0
+            dias_ultimo_contacto = dias_desde(row["ultima_actividad"])
+            if dias_ultimo_contacto is None:
+                # Sin actividades: el dato importado con el cliente o, si no hay, su alta
+                dias_ultimo_contacto = row["dias_desde_ultimo_contacto"]
+                if dias_ultimo_contacto is None:
+                    dias_ultimo_contacto = dias_alta
+            primer_contacto = dias_desde(row["primera_actividad"])
+
+            estadisticas.append(EstadisticasCliente(
+                cliente_id=cliente_id,
+                total_facturado=row["total_facturado"] or 0,
+                numero_facturas=row["numero_facturas"] or 0,
+                promedio_venta=row["promedio_venta"] or 0,
+                tasa_pagos_a_tiempo=row["tasa_pagos_a_tiempo"],
+                valor_oportunidades_abiertas=row["valor_oportunidades_abiertas"] or 0,
+                oportunidades_abiertas=row["oportunidades_abiertas"] or 0,
+                actividades=row["actividades"] or 0,
+                actividades_pendientes=row["actividades_pendientes"] or 0,
+                dias_desde_primer_contacto=primer_contacto if primer_contacto is not None else dias_alta,
+                dias_desde_ultimo_contacto=dias_ultimo_contacto,
+                puntuacion_salud=row["puntuacion_salud"],
+                # Clientes aún sin puntuar: clasificación por reglas
+                salud_cliente=row["salud_cliente"] or clasificar_salud(dias_ultimo_contacto, row["tasa_pagos_a_tiempo"])
+            ))
+
+        return estadisticas
+
+    def recalcular_resumen(self):
+        """
+        Recalcular todos los contadores del resumen desde cero.
+
+        Corrige cualquier deriva de los contadores incrementales (p. ej.
+        redondeo de sumas en coma flotante). Se ejecuta en una única
+        transacción de escritura, así ningún trigger se intercala.
+        """
+        conn = self._pool.adquirir()
+        cursor = conn.cursor()
 
-            # Clientes morosos
+        try:
+            cursor.execute("DELETE FROM resumen_contadores")
             cursor.execute("""
-            SELECT COUNT(*) FROM clientes
-            WHERE estado = 'activo' AND tasa_pagos_a_tiempo IS NOT NULL
-            AND tasa_pagos_a_tiempo < 80
+            INSERT INTO resumen_contadores (clave, valor)
+            SELECT 'total_clientes', COUNT(*) FROM clientes
+            UNION ALL
+            SELECT 'clientes_activos', COUNT(*) FROM clientes WHERE estado = 'activo'
+            UNION ALL
+            SELECT 'valor_total_facturado', COALESCE(SUM(total_facturado), 0) FROM clientes
+            UNION ALL
+            SELECT 'dias_contacto_suma', COALESCE(SUM(dias_desde_ultimo_contacto), 0) FROM clientes
+            UNION ALL
+            SELECT 'dias_contacto_n', COUNT(dias_desde_ultimo_contacto) FROM clientes
+            UNION ALL
+            SELECT 'clientes_morosos', COUNT(*) FROM clientes
+            WHERE estado = 'activo' AND tasa_pagos_a_tiempo IS NOT NULL AND tasa_pagos_a_tiempo < 80
+            UNION ALL
+            SELECT 'clientes_mes:' || strftime('%Y-%m', fecha_creacion), COUNT(*) FROM clientes
+            GROUP BY strftime('%Y-%m', fecha_creacion)
+            UNION ALL
+            SELECT 'actividades_pendientes', COUNT(*) FROM actividades WHERE completada = 0
+            UNION ALL
+            SELECT 'valor_oportunidades_abiertas', COALESCE(SUM(valor_estimado), 0) FROM oportunidades
+            WHERE estado NOT IN ('ganada', 'perdida')
             """)
-            clientes_morosos = cursor.fetchone()[0]
+            conn.commit()
+            logger.info("[OK] Resumen CRM recalculado")
+        finally:
+            self._pool.liberar(conn)
 
-            # Actividades pendientes
-            cursor.execute("SELECT COUNT(*) FROM actividades WHERE completada = 0")
-            actividades_pendientes = cursor.fetchone()[0]
+    def obtener_resumen_crm(self) -> ResumenCRM:
+        """Obtener resumen general del CRM (desde los contadores incrementales)"""
+        conn = self._pool.adquirir()
+        cursor = conn.cursor()
 
-            # Oportunidades próximas a cerrar
+        try:
+            clave_mes = "clientes_mes:" + datetime.utcnow().strftime("%Y-%m")
+            cursor.execute("""
+            SELECT clave, valor FROM resumen_contadores
+            WHERE clave IN (
+                'total_clientes', 'clientes_activos', 'valor_total_facturado',
+                'dias_contacto_suma', 'dias_contacto_n', 'clientes_morosos',
+                'actividades_pendientes', 'valor_oportunidades_abiertas', ?
+            )
+            """, (clave_mes,))
+            contadores = {row['clave']: row['valor'] for row in cursor.fetchall()}
+
+            # Ventana móvil de fechas: no se puede contar por triggers, usa el índice parcial
             cursor.execute("""
             SELECT COUNT(*) FROM oportunidades
             WHERE estado NOT IN ('ganada', 'perdida')
@@ -521,16 +1927,128 @@ class CRMRepository:
             """)
             oportunidades_proximas_cerrar = cursor.fetchone()[0]
 
+            dias_contacto_n = contadores.get('dias_contacto_n', 0)
+
             return ResumenCRM(
-                total_clientes=total_clientes,
-                clientes_activos=clientes_activos,
-                clientes_nuevos_mes=clientes_nuevos_mes,
-                valor_total_facturado=valor_total_facturado,
-                valor_oportunidades_abiertas=valor_oportunidades_abiertas,
-                promedio_dias_pago=promedio_dias_pago,
-                clientes_morosos=clientes_morosos,
-                actividades_pendientes=actividades_pendientes,
+                total_clientes=int(contadores.get('total_clientes', 0)),
+                clientes_activos=int(contadores.get('clientes_activos', 0)),
+                clientes_nuevos_mes=int(contadores.get(clave_mes, 0)),
+                valor_total_facturado=contadores.get('valor_total_facturado', 0),
+                valor_oportunidades_abiertas=contadores.get('valor_oportunidades_abiertas', 0),
+                promedio_dias_pago=(
+                    contadores.get('dias_contacto_suma', 0) / dias_contacto_n if dias_contacto_n else 0
+                ),
+                clientes_morosos=int(contadores.get('clientes_morosos', 0)),
+                actividades_pendientes=int(contadores.get('actividades_pendientes', 0)),
                 oportunidades_proximas_cerrar=oportunidades_proximas_cerrar
             )
         finally:
-            conn.close()
+            self._pool.liberar(conn)
+
+    # =====================================================
+    # EXPORTACIÓN
+    # =====================================================
+
+    def exportar(self, tabla: str, tamano_lote: int = 1000) -> tuple[List[str], Iterator[List[tuple]]]:
+        """
+        Exportar una tabla completa en lotes, sin materializarla en memoria.
+
+        Args:
+            tabla: Una de TABLAS_EXPORTABLES
+            tamano_lote: Filas por `fetchmany`
+
+        Returns:
+            tuple: (nombres de columna, generador de lotes de filas)
+
+        Raises:
+            ValueError: Si la tabla no es exportable
+        """
+        if tabla not in TABLAS_EXPORTABLES:
+            raise ValueError(f"Tabla no exportable: {tabla}")
+
+        conn_columnas = self._pool.adquirir()
+        try:
+            cursor = conn_columnas.execute(f"SELECT * FROM {tabla} LIMIT 0")
+            columnas = [descripcion[0] for descripcion in cursor.description]
+        finally:
+            self._pool.liberar(conn_columnas)
+
+        def lotes() -> Iterator[List[tuple]]:
+            # Conexión propia: el generador puede reanudarse en otro hilo
+            with self._pool.conexion_dedicada() as conn:
+                conn.row_factory = None
+                cursor = conn.execute(f"SELECT * FROM {tabla} ORDER BY rowid")
+                while True:
+                    filas = cursor.fetchmany(tamano_lote)
+                    if not filas:
+                        break
+                    yield filas
+
+            logger.info("[OK] Exportación de %s completada", tabla)
+
+        return columnas, lotes()
+
+    # =====================================================
+    # CARGA EN LOTE DE RELACIONES
+    # =====================================================
+
+    # Máximo de parámetros por cláusula IN (por debajo del límite de SQLite)
+    TAMANO_LOTE_IN = 500
+
+    def _cargar_relaciones(
+        self,
+        cliente_ids: List[str],
+        cursor: sqlite3.Cursor,
+        limite_actividades: int = 3,
+        incluir: tuple = RELACIONES_CLIENTE
+    ) -> Dict[str, Dict[str, list]]:
+        """
+        Cargar contactos, actividades recientes y oportunidades abiertas
+        de varios clientes a la vez.
+
+        Emite una consulta por tabla (por lote de `TAMANO_LOTE_IN` ids) y
+        reparte las filas por `cliente_id`. Las actividades se limitan a las
+        `limite_actividades` más recientes de cada cliente con ROW_NUMBER().
+        Las relaciones que no están en `incluir` no se consultan.
+        """
+        relaciones = {
+            cliente_id: {relacion: [] for relacion in incluir}
+            for cliente_id in cliente_ids
+        }
+        if not incluir:
+            return relaciones
+
+        for inicio in range(0, len(cliente_ids), self.TAMANO_LOTE_IN):
+            lote = cliente_ids[inicio:inicio + self.TAMANO_LOTE_IN]
+            marcadores = ", ".join("?" * len(lote))
+
+            if 'contactos' in incluir:
+                cursor.execute(f"SELECT * FROM contactos WHERE cliente_id IN ({marcadores})", lote)
+                rows = cursor.fetchall()
+                for row, contacto in zip(rows, MAPEO_CONTACTO.todos(rows)):
+                    relaciones[row['cliente_id']]['contactos'].append(contacto)
+
+            if 'actividades_recientes' in incluir:
+                cursor.execute(f"""
+                SELECT * FROM (
+                    SELECT *, ROW_NUMBER() OVER (PARTITION BY cliente_id ORDER BY fecha DESC) AS posicion
+                    FROM actividades
+                    WHERE cliente_id IN ({marcadores})
+                )
+                WHERE posicion <= ?
+                ORDER BY cliente_id, posicion
+                """, (*lote, limite_actividades))
+                rows = cursor.fetchall()
+                for row, actividad in zip(rows, MAPEO_ACTIVIDAD.todos(rows)):
+                    relaciones[row['cliente_id']]['actividades_recientes'].append(actividad)
+
+            if 'oportunidades' in incluir:
+                cursor.execute(f"""
+                SELECT * FROM oportunidades
+                WHERE cliente_id IN ({marcadores}) AND estado != 'ganada' AND estado != 'perdida'
+                """, lote)
+                rows = cursor.fetchall()
+                for row, oportunidad in zip(rows, MAPEO_OPORTUNIDAD.todos(rows)):
+                    relaciones[row['cliente_id']]['oportunidades'].append(oportunidad)
+
+        return relaciones
@@ -0,0 +1,103 @@
+# =====================================================
+# 🧊 SyntexIA CRM — Caché LRU con TTL
+# =====================================================
+"""
+Caché en proceso, acotada en tamaño (LRU) y en antigüedad (TTL),
+segura para varios hilos y con estadísticas de uso.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class CacheLRU:
+    """Caché LRU + TTL con invalidación explícita"""
+
+    def __init__(self, max_entradas: int = 1000, ttl_segundos: float = 30.0):
+        """
+        Args:
+            max_entradas: Entradas máximas antes de desalojar la menos usada
+                (0 desactiva la caché)
+            ttl_segundos: Antigüedad máxima de una entrada
+        """
+        self.max_entradas = max_entradas
+        self.ttl_segundos = ttl_segundos
+
+        self._entradas: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generacion = 0
+        self._stats = {"hits": 0, "misses": 0, "desalojos": 0, "expiradas": 0, "invalidaciones": 0}
+
+    @property
+    def activa(self) -> bool:
+        return self.max_entradas > 0
+
+    def generacion(self) -> int:
+        """
+        Marca a tomar antes de leer de la base de datos.
+
+        `guardar` descarta el valor si hubo alguna invalidación desde
+        entonces: así una lectura lenta no repone datos ya obsoletos.
+        """
+        return self._generacion
+
+    def obtener(self, clave: Hashable) -> Optional[Any]:
+        """Valor en caché o None (cuenta hit/miss)"""
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                self._stats["misses"] += 1
+                return None
+
+            expira, valor = entrada
+            if expira < time.monotonic():
+                del self._entradas[clave]
+                self._stats["expiradas"] += 1
+                self._stats["misses"] += 1
+                return None
+
+            self._entradas.move_to_end(clave)
+            self._stats["hits"] += 1
+            return valor
+
+    def guardar(self, clave: Hashable, valor: Any, generacion: int):
+        """Guardar un valor leído cuando `generacion()` valía `generacion`"""
+        if not self.activa:
+            return
+
+        with self._lock:
+            if generacion != self._generacion:
+                return
+
+            self._entradas[clave] = (time.monotonic() + self.ttl_segundos, valor)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+                self._stats["desalojos"] += 1
+
+    def invalidar(self, clave: Hashable):
+        """Eliminar una entrada tras modificar el dato en la base de datos"""
+        with self._lock:
+            self._generacion += 1
+            self._entradas.pop(clave, None)
+            self._stats["invalidaciones"] += 1
+
+    def limpiar(self):
+        """Vaciar la caché"""
+        with self._lock:
+            self._generacion += 1
+            self._entradas.clear()
+
+    def estadisticas(self) -> Dict[str, Any]:
+        """Contadores de uso y ocupación"""
+        with self._lock:
+            consultas = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "tasa_acierto": round(self._stats["hits"] / consultas, 4) if consultas else 0.0,
+                "entradas": len(self._entradas),
+                "max_entradas": self.max_entradas,
+                "ttl_segundos": self.ttl_segundos,
+            }
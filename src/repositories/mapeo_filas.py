@@ -0,0 +1,279 @@
+# =====================================================
+# 🧩 SyntexIA CRM — Mapeo de Filas SQLite a Modelos
+# =====================================================
+"""
+Hidratación de filas de la base de datos sin revalidación Pydantic.
+
+Las filas las escribió el propio repositorio con datos ya validados en
+la entrada de la API, así que no se vuelven a validar: cada columna pasa
+por un conversor precompilado a partir de la anotación del campo
+(fechas en texto -> datetime, 0/1 -> bool, texto -> Enum, JSON -> lista)
+y la instancia se crea directamente, igual que con `model_construct`.
+Las columnas de texto pasan tal cual (la afinidad TEXT de SQLite ya las
+devuelve como str).
+
+Si una fila no encaja (fecha con otro formato, tipo inesperado, valor de
+Enum desconocido, NULL en un campo obligatorio) se valida entera como
+antes: los datos raros siguen produciendo el mismo error o la misma
+coerción.
+"""
+
+import json
+import re
+import types
+from copy import copy
+from datetime import datetime
+from enum import Enum
+from typing import Any, Callable, Dict, Generic, List, Optional, Sequence, Type, TypeVar, Union, get_args, get_origin
+
+from pydantic import BaseModel
+from pydantic.fields import FieldInfo
+
+M = TypeVar("M", bound=BaseModel)
+
+_nuevo = object.__new__
+_asignar = object.__setattr__
+
+
+# Los conversores solo aceptan lo que escribe el propio repositorio; con
+# cualquier otro valor lanzan ValueError / TypeError y la fila se valida
+# entera (Pydantic interpreta distinto, p. ej., `'20250101'` o `'false'`).
+
+# Fechas sin zona tal como las guarda sqlite3 (`datetime` o CURRENT_TIMESTAMP)
+_FORMATO_FECHA = re.compile(r"\d{4}-\d\d-\d\d[ T]\d\d:\d\d(?::\d\d(?:\.\d{1,6})?)?")
+
+
+def convertir_fecha(valor: Any) -> datetime:
+    """Texto ISO de SQLite (`2025-01-01 10:00:00[.ffffff]`) -> datetime"""
+    if type(valor) is str and _FORMATO_FECHA.fullmatch(valor):
+        return datetime.fromisoformat(valor)
+    if isinstance(valor, datetime):
+        return valor
+    raise TypeError(f"Fecha con formato no previsto: {valor!r}")
+
+
+def convertir_bool(valor: Any) -> bool:
+    """0 / 1 de SQLite -> bool"""
+    if type(valor) is int and (valor == 0 or valor == 1):
+        return valor == 1
+    if type(valor) is bool:
+        return valor
+    raise TypeError(f"Booleano no previsto: {valor!r}")
+
+
+def convertir_entero(valor: Any) -> int:
+    if type(valor) is int:
+        return valor
+    raise TypeError(f"Entero no previsto: {valor!r}")
+
+
+def convertir_float(valor: Any) -> float:
+    if type(valor) is float or type(valor) is int:
+        return float(valor)
+    raise TypeError(f"Número no previsto: {valor!r}")
+
+
+def convertir_json(valor: Any) -> list:
+    """Columna TEXT con una lista JSON (p. ej. `productos`) -> lista"""
+    lista = json.loads(valor) if type(valor) is str else valor
+    if type(lista) is not list:
+        raise TypeError(f"Se esperaba una lista JSON: {valor!r}")
+    return lista
+
+
+def _convertir_json_de(elemento: type) -> Callable[[Any], list]:
+    """`convertir_json` que además exige que todos los elementos sean `elemento`"""
+    def convertir(valor: Any) -> list:
+        lista = convertir_json(valor)
+        if not all(type(item) is elemento for item in lista):
+            raise TypeError(f"Lista con elementos que no son {elemento.__name__}: {valor!r}")
+        return lista
+    return convertir
+
+
+def _admite_none(anotacion: Any) -> bool:
+    return get_origin(anotacion) in (Union, types.UnionType) and type(None) in get_args(anotacion)
+
+
+def _sin_optional(anotacion: Any) -> Any:
+    if get_origin(anotacion) in (Union, types.UnionType):
+        argumentos = [argumento for argumento in get_args(anotacion) if argumento is not type(None)]
+        if len(argumentos) == 1:
+            return argumentos[0]
+    return anotacion
+
+
+def _conversor(anotacion: Any) -> Optional[Callable[[Any], Any]]:
+    """Conversor de una columna según el tipo del campo (None = el valor de SQLite sirve tal cual)"""
+    tipo = _sin_optional(anotacion)
+
+    if tipo is datetime:
+        return convertir_fecha
+    if tipo is bool:
+        return convertir_bool
+    if tipo is int:
+        return convertir_entero
+    if tipo is float:
+        return convertir_float
+    if isinstance(tipo, type) and issubclass(tipo, Enum):
+        return tipo
+    if _es_lista_json(tipo):
+        (elemento,) = get_args(tipo) or (Any,)
+        return _convertir_json_de(elemento) if elemento in (str, int, float, bool) else convertir_json
+    return None
+
+
+def _es_lista_json(tipo: Any) -> bool:
+    """Listas guardadas como texto JSON (las de modelos son relaciones, no columnas)"""
+    if get_origin(tipo) is not list:
+        return False
+    (elemento,) = get_args(tipo) or (Any,)
+    return not (isinstance(elemento, type) and issubclass(elemento, BaseModel))
+
+
+def _decodificar_json(valor: Any) -> Any:
+    """Texto JSON -> valor; si no es JSON válido se deja para que lo rechace Pydantic"""
+    if type(valor) is not str:
+        return valor
+    try:
+        return json.loads(valor)
+    except ValueError:
+        return valor
+
+
+def _fabrica_defecto(campo: FieldInfo) -> Callable[[], Any]:
+    """Valor por defecto de un campo; los mutables se copian en cada instancia"""
+    if campo.default_factory is not None:
+        return campo.default_factory
+    defecto = campo.default
+    if isinstance(defecto, (list, dict, set)):
+        return lambda: copy(defecto)
+    return lambda: defecto
+
+
+class MapeadorFilas(Generic[M]):
+    """
+    Convierte filas `sqlite3.Row` en instancias de `modelo` sin validarlas.
+
+    El plan de conversión (campo, columna, conversor o valor por defecto,
+    en el orden de los campos del modelo) se calcula una vez por
+    combinación de columnas del SELECT y se reutiliza. Las instancias se
+    crean como en `model_construct`, pero sin su recorrido genérico de
+    campos y alias, que cuesta más que la propia validación en Rust.
+    """
+
+    def __init__(self, modelo: Type[M]):
+        self.modelo = modelo
+        self._campos = modelo.model_fields
+        self._conversores = {nombre: _conversor(campo.annotation) for nombre, campo in self._campos.items()}
+        self._columnas_json = frozenset(
+            nombre for nombre, campo in self._campos.items() if _es_lista_json(_sin_optional(campo.annotation))
+        )
+        self._no_nulos = frozenset(
+            nombre for nombre, campo in self._campos.items() if not _admite_none(campo.annotation)
+        )
+        self._planes: Dict[tuple, tuple] = {}
+
+    def _plan(self, columnas: Sequence[str], permitidas: Optional[Sequence[str]] = None) -> tuple:
+        """(pasos, campos leídos de la fila, campos obligatorios que faltan, campos no nulos leídos)"""
+        clave = (tuple(columnas), tuple(permitidas) if permitidas is not None else None)
+        plan = self._planes.get(clave)
+        if plan is not None:
+            return plan
+
+        indices = {
+            columna: indice for indice, columna in enumerate(columnas)
+            if columna in self._campos and (permitidas is None or columna in permitidas)
+        }
+        pasos = []
+        faltan = set()
+        for nombre, campo in self._campos.items():
+            if nombre in indices:
+                pasos.append((nombre, indices[nombre], self._conversores[nombre], None))
+            else:
+                if campo.is_required():
+                    faltan.add(nombre)
+                pasos.append((nombre, None, None, None if campo.is_required() else _fabrica_defecto(campo)))
+
+        plan = (
+            tuple(pasos),
+            frozenset(indices),
+            frozenset(faltan),
+            tuple(nombre for nombre in indices if nombre in self._no_nulos),
+        )
+        self._planes[clave] = plan
+        return plan
+
+    def _construir(self, fila: Any, plan: tuple, extra: Optional[Dict[str, Any]]) -> M:
+        pasos, leidos, faltan, no_nulos = plan
+        if faltan and not (extra and faltan.issubset(extra)):
+            return self._validar(fila, plan, extra)
+
+        valores = {}
+        try:
+            for nombre, indice, conversor, defecto in pasos:
+                if indice is None:
+                    valores[nombre] = defecto() if defecto is not None else None
+                    continue
+                valor = fila[indice]
+                valores[nombre] = conversor(valor) if conversor is not None and valor is not None else valor
+        except (ValueError, TypeError):
+            return self._validar(fila, plan, extra)
+
+        for nombre in no_nulos:
+            if valores[nombre] is None:
+                return self._validar(fila, plan, extra)
+
+        campos_asignados = set(leidos)
+        if extra:
+            # Las claves ya existen: el orden de los campos (el del JSON) se mantiene
+            valores.update(extra)
+            campos_asignados.update(extra)
+
+        # Mismo estado interno que deja `model_construct`
+        instancia = _nuevo(self.modelo)
+        _asignar(instancia, "__dict__", valores)
+        _asignar(instancia, "__pydantic_fields_set__", campos_asignados)
+        _asignar(instancia, "__pydantic_extra__", None)
+        _asignar(instancia, "__pydantic_private__", None)
+        return instancia
+
+    def _validar(self, fila: Any, plan: tuple, extra: Optional[Dict[str, Any]]) -> M:
+        """Camino lento: validación Pydantic completa de la fila (las columnas JSON, ya decodificadas)"""
+        pasos = plan[0]
+        valores = {
+            nombre: _decodificar_json(fila[indice]) if nombre in self._columnas_json else fila[indice]
+            for nombre, indice, _, _ in pasos if indice is not None
+        }
+        if extra:
+            valores.update(extra)
+        return self.modelo.model_validate(valores)
+
+    def uno(
+        self,
+        fila: Any,
+        extra: Optional[Dict[str, Any]] = None,
+        columnas: Optional[Sequence[str]] = None
+    ) -> M:
+        """
+        Una fila -> modelo.
+
+        Args:
+            extra: Campos ya construidos que se añaden (p. ej. relaciones)
+            columnas: Solo estas columnas de la fila (None = todas las del modelo)
+        """
+        return self._construir(fila, self._plan(fila.keys(), columnas), extra)
+
+    def todos(
+        self,
+        filas: Sequence[Any],
+        extras: Optional[Sequence[Dict[str, Any]]] = None,
+        columnas: Optional[Sequence[str]] = None
+    ) -> List[M]:
+        """Varias filas del mismo SELECT -> modelos (un solo plan); `extras` va alineado con `filas`"""
+        if not filas:
+            return []
+        plan = self._plan(filas[0].keys(), columnas)
+        if extras is None:
+            return [self._construir(fila, plan, None) for fila in filas]
+        return [self._construir(fila, plan, extra) for fila, extra in zip(filas, extras)]
@@ -0,0 +1,69 @@
+# =====================================================
+# 🧱 SyntexIA CRM — Migraciones de Esquema
+# =====================================================
+"""
+Migraciones versionadas con `PRAGMA user_version`.
+
+Cada migración se aplica una sola vez, en orden y en su propia
+transacción junto con el incremento de versión: si falla, la base de
+datos queda en la versión anterior.
+"""
+
+import sqlite3
+from typing import Callable, List, Tuple
+
+from src.config.logger import get_logger
+
+logger = get_logger("CRM-Migraciones")
+
+# (descripción, función que recibe el cursor de la transacción)
+Migracion = Tuple[str, Callable[[sqlite3.Cursor], None]]
+
+
+def version_esquema(conn: sqlite3.Connection) -> int:
+    """Versión del esquema guardada en la base de datos"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def aplicar_migraciones(conn: sqlite3.Connection, migraciones: List[Migracion]) -> Tuple[int, int]:
+    """
+    Aplicar las migraciones pendientes.
+
+    La migración N lleva la base de datos de la versión N-1 a la N.
+    `BEGIN IMMEDIATE` toma el bloqueo de escritura antes de releer la
+    versión, así dos procesos que arrancan a la vez no aplican la misma
+    migración dos veces.
+
+    Returns:
+        tuple: (versión inicial, versión final)
+
+    Raises:
+        RuntimeError: Si la base de datos es de una versión más nueva
+    """
+    version_inicial = version_esquema(conn)
+    if version_inicial > len(migraciones):
+        raise RuntimeError(
+            f"Esquema en versión {version_inicial}, este código solo conoce hasta la {len(migraciones)}"
+        )
+
+    for numero, (descripcion, migracion) in enumerate(migraciones, 1):
+        if numero <= version_inicial:
+            continue
+
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            if version_esquema(conn) >= numero:
+                conn.rollback()
+                continue
+            migracion(cursor)
+            cursor.execute(f"PRAGMA user_version = {numero}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logger.error(f"[ERROR] Migración {numero} fallida: {descripcion}")
+            raise
+
+        logger.info(f"[OK] Migración {numero} aplicada: {descripcion}")
+
+    return version_inicial, version_esquema(conn)
@@ -0,0 +1,142 @@
+# =====================================================
+# 🩺 SyntexIA CRM — Puntuación de Salud de Clientes
+# =====================================================
+"""
+Cálculo en lote de la salud de todos los clientes.
+
+Cada cliente recibe una puntuación de 0 a 100, media ponderada de cuatro
+componentes entre 0 y 1:
+
+- recencia: días desde el último contacto (1 = hoy, 0.5 a los 30 días)
+- frecuencia: actividades por mes desde la primera (0.5 = una al mes)
+- pipeline: valor de las oportunidades abiertas (0.5 = VALOR_PIPELINE_REFERENCIA)
+- puntualidad: `tasa_pagos_a_tiempo` / 100 (sin dato, 1)
+
+El cálculo son sentencias SQL sobre rangos de rowid de `clientes`, que
+SQLite evalúa columna a columna sin pasar fila a fila por Python; cada
+rango es una transacción. Por el camino se actualiza
+`clientes.dias_desde_ultimo_contacto` con la última actividad.
+
+Ejecutar: python -m src.repositories.salud_clientes --db crm.db
+"""
+
+import argparse
+import sqlite3
+import time
+from datetime import datetime
+from typing import Any, Dict
+
+# Pesos de cada componente (suman 1)
+PESO_RECENCIA = 0.35
+PESO_FRECUENCIA = 0.20
+PESO_PIPELINE = 0.15
+PESO_PUNTUALIDAD = 0.30
+
+# Días sin contacto con los que la recencia vale 0.5
+DIAS_RECENCIA_REFERENCIA = 30
+
+# Valor de oportunidades abiertas con el que el componente de pipeline vale 0.5
+VALOR_PIPELINE_REFERENCIA = 10_000
+
+# Puntuación mínima de cada categoría de `salud_cliente` (por debajo, "en_riesgo")
+PUNTUACION_BUENA = 65
+PUNTUACION_ATENCION = 40
+
+# Clientes por transacción
+TAMANO_LOTE_SALUD = 50_000
+
+# `:ahora` es la hora local en el formato en que se guardan las fechas
+SQL_ACTUALIZAR_DIAS_CONTACTO = """
+UPDATE clientes
+SET dias_desde_ultimo_contacto = CAST(MAX(julianday(:ahora) - julianday(e.ultima_actividad), 0) AS INTEGER)
+FROM estadisticas_clientes e
+WHERE e.cliente_id = clientes.id
+AND clientes.rowid >= :desde AND clientes.rowid < :hasta
+AND e.ultima_actividad IS NOT NULL
+AND clientes.dias_desde_ultimo_contacto IS NOT CAST(MAX(julianday(:ahora) - julianday(e.ultima_actividad), 0) AS INTEGER)
+"""
+
+SQL_PUNTUAR = f"""
+INSERT INTO estadisticas_clientes (cliente_id, puntuacion_salud, salud_cliente, fecha_puntuacion)
+SELECT id, puntuacion,
+       CASE WHEN puntuacion >= {PUNTUACION_BUENA} THEN 'buena'
+            WHEN puntuacion >= {PUNTUACION_ATENCION} THEN 'atencion'
+            ELSE 'en_riesgo' END,
+       :ahora
+FROM (
+    SELECT c.id, ROUND(100 * (
+        {PESO_RECENCIA} * {DIAS_RECENCIA_REFERENCIA}.0 / ({DIAS_RECENCIA_REFERENCIA} + MAX(COALESCE(
+            c.dias_desde_ultimo_contacto, julianday(:ahora) - julianday(c.fecha_creacion), 0), 0))
+        + {PESO_FRECUENCIA} * COALESCE(frecuencia / (frecuencia + 1), 0)
+        + {PESO_PIPELINE} * COALESCE(pipeline / (pipeline + {VALOR_PIPELINE_REFERENCIA}), 0)
+        + {PESO_PUNTUALIDAD} * MIN(MAX(COALESCE(c.tasa_pagos_a_tiempo, 100), 0), 100) / 100.0
+    ), 2) AS puntuacion
+    FROM clientes c
+    LEFT JOIN (
+        SELECT cliente_id,
+               MAX(valor_oportunidades_abiertas, 0) AS pipeline,
+               actividades * 30.0 / MAX(julianday(:ahora) - julianday(primera_actividad), 30) AS frecuencia
+        FROM estadisticas_clientes
+    ) e ON e.cliente_id = c.id
+    WHERE c.rowid >= :desde AND c.rowid < :hasta
+) AS p
+WHERE true
+ON CONFLICT(cliente_id) DO UPDATE SET
+    puntuacion_salud = excluded.puntuacion_salud,
+    salud_cliente = excluded.salud_cliente,
+    fecha_puntuacion = excluded.fecha_puntuacion
+"""
+
+
+def puntuar_clientes(conn: sqlite3.Connection, tamano_lote: int = TAMANO_LOTE_SALUD) -> Dict[str, Any]:
+    """
+    Puntuar todos los clientes, `tamano_lote` clientes por transacción.
+
+    Returns:
+        dict: clientes puntuados, días de contacto actualizados, lotes y duración
+    """
+    inicio = time.perf_counter()
+    ahora = datetime.now().isoformat(" ")
+    maximo = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM clientes").fetchone()[0]
+
+    puntuados = dias_actualizados = lotes = 0
+    for desde in range(1, maximo + 1, tamano_lote):
+        params = {"ahora": ahora, "desde": desde, "hasta": desde + tamano_lote}
+        try:
+            dias_actualizados += conn.execute(SQL_ACTUALIZAR_DIAS_CONTACTO, params).rowcount
+            puntuados += conn.execute(SQL_PUNTUAR, params).rowcount
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        lotes += 1
+
+    return {
+        "clientes": puntuados,
+        "dias_contacto_actualizados": dias_actualizados,
+        "lotes": lotes,
+        "duracion_s": round(time.perf_counter() - inicio, 3),
+    }
+
+
+def main():
+    from src.repositories.crm_repository import CRMRepository
+
+    parser = argparse.ArgumentParser(description="Puntuar la salud de todos los clientes del CRM")
+    parser.add_argument("--db", default="crm.db", help="Base de datos SQLite")
+    parser.add_argument("--lote", type=int, default=TAMANO_LOTE_SALUD, help="Clientes por transacción")
+    args = parser.parse_args()
+
+    repo = CRMRepository(db_path=args.db, pool_size=1)
+    try:
+        resultado = repo.puntuar_salud_clientes(args.lote)
+    finally:
+        repo.cerrar()
+    print(
+        f"✅ {resultado['clientes']:,} clientes puntuados en {resultado['duracion_s']} s "
+        f"({resultado['lotes']} lotes, {resultado['dias_contacto_actualizados']:,} días de contacto actualizados)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+# =====================================================
+# 🔌 SyntexIA CRM — Pool de Conexiones SQLite
+# =====================================================
+"""
+Pool acotado de conexiones SQLite de larga duración.
+
+Cada conexión se configura una sola vez (WAL, synchronous=NORMAL,
+foreign_keys, caché de páginas) y se reutiliza entre peticiones.
+Dentro de un mismo hilo las llamadas anidadas comparten la conexión
+ya adquirida, de modo que un método del repositorio que llama a otro
+no necesita una segunda conexión.
+"""
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Dict, Any, Optional
+
+from src.repositories.trazas_sql import ConexionTrazada, TrazadorSQL
+from src.config.logger import get_logger
+
+logger = get_logger("SQLite-Pool")
+
+
+class SQLiteConnectionPool:
+    """Pool de conexiones SQLite con chequeo de salud y cierre limpio"""
+
+    def __init__(
+        self,
+        db_path: str,
+        pool_size: int = 5,
+        timeout: float = 30,
+        cache_size_kb: int = 16000,
+        trazador: Optional[TrazadorSQL] = None
+    ):
+        if pool_size < 1:
+            raise ValueError("pool_size debe ser >= 1")
+
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.cache_size_kb = cache_size_kb
+        self.trazador = trazador
+
+        self._disponibles: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=pool_size)
+        self._creadas = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._cerrado = False
+
+    # =====================================================
+    # CICLO DE VIDA DE CONEXIONES
+    # =====================================================
+
+    def _nueva_conexion(self) -> sqlite3.Connection:
+        """Abrir y configurar una conexión nueva"""
+        if self.trazador:
+            conn = self.trazador.instrumentar(sqlite3.connect(
+                self.db_path, check_same_thread=False, timeout=self.timeout, factory=ConexionTrazada
+            ))
+        else:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=self.timeout)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kb)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    @staticmethod
+    def _es_saludable(conn: sqlite3.Connection) -> bool:
+        """Comprobar que la conexión sigue operativa"""
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _adquirir(self) -> sqlite3.Connection:
+        """Tomar una conexión libre, crear una nueva o esperar a que se libere"""
+        if self._cerrado:
+            raise RuntimeError("El pool de conexiones está cerrado")
+
+        try:
+            conn = self._disponibles.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                puede_crear = self._creadas < self.pool_size
+                if puede_crear:
+                    self._creadas += 1
+
+            if puede_crear:
+                try:
+                    return self._nueva_conexion()
+                except Exception:
+                    with self._lock:
+                        self._creadas -= 1
+                    raise
+
+            try:
+                conn = self._disponibles.get(timeout=self.timeout)
+            except queue.Empty:
+                raise TimeoutError(
+                    f"No hay conexiones disponibles tras {self.timeout}s (pool_size={self.pool_size})"
+                )
+
+        if not self._es_saludable(conn):
+            logger.warning("[WARN] Conexión SQLite defectuosa, reemplazando")
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+            conn = self._nueva_conexion()
+
+        return conn
+
+    def _devolver(self, conn: sqlite3.Connection):
+        """Devolver la conexión al pool (o cerrarla si el pool está cerrado)"""
+        # Una transacción que quedó abierta (p. ej. por una excepción) no debe
+        # filtrarse a la siguiente petición que reciba esta conexión
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            pass
+
+        if self._cerrado:
+            conn.close()
+            with self._lock:
+                self._creadas -= 1
+            return
+
+        self._disponibles.put_nowait(conn)
+
+    def adquirir(self) -> sqlite3.Connection:
+        """
+        Prestar una conexión del pool al hilo actual.
+
+        Las llamadas anidadas en el mismo hilo reciben la conexión ya
+        prestada, así un método del repositorio que llama a otro no
+        ocupa una segunda conexión. Cada `adquirir` debe ir emparejado
+        con un `liberar`.
+        """
+        actual = getattr(self._local, "conn", None)
+        if actual is not None:
+            self._local.nivel += 1
+            return actual
+
+        conn = self._adquirir()
+        self._local.conn = conn
+        self._local.nivel = 1
+        return conn
+
+    def liberar(self, conn: sqlite3.Connection):
+        """Devolver la conexión; solo vuelve al pool al cerrar el nivel exterior"""
+        if getattr(self._local, "conn", None) is not conn:
+            self._devolver(conn)
+            return
+
+        self._local.nivel -= 1
+        if self._local.nivel == 0:
+            self._local.conn = None
+            self._devolver(conn)
+
+    @contextmanager
+    def conexion(self) -> Iterator[sqlite3.Connection]:
+        """Context manager equivalente a `adquirir` / `liberar`"""
+        conn = self.adquirir()
+        try:
+            yield conn
+        finally:
+            self.liberar(conn)
+
+    @contextmanager
+    def conexion_dedicada(self) -> Iterator[sqlite3.Connection]:
+        """
+        Conexión configurada igual que las del pool pero fuera de él.
+
+        Para lecturas largas (exportaciones en streaming) que se consumen
+        desde varios hilos y no deben ocupar una plaza del pool ni quedar
+        ligadas al hilo que las abrió.
+        """
+        conn = self._nueva_conexion()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    # =====================================================
+    # SALUD Y CIERRE
+    # =====================================================
+
+    def verificar_salud(self) -> Dict[str, Any]:
+        """Ejecutar un chequeo sobre una conexión del pool y devolver su estado"""
+        with self.conexion() as conn:
+            saludable = self._es_saludable(conn)
+
+        return {"saludable": saludable, **self.estadisticas()}
+
+    def estadisticas(self) -> Dict[str, Any]:
+        """Tamaño del pool y conexiones abiertas y libres (sin tocar la base de datos)"""
+        return {
+            "pool_size": self.pool_size,
+            "conexiones_abiertas": self._creadas,
+            "conexiones_libres": self._disponibles.qsize(),
+        }
+
+    def cerrar(self):
+        """Cerrar todas las conexiones libres; las prestadas se cierran al devolverse"""
+        self._cerrado = True
+        while True:
+            try:
+                conn = self._disponibles.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._creadas -= 1
+        logger.info("[OK] Pool de conexiones SQLite cerrado")
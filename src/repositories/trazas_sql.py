@@ -0,0 +1,223 @@
+# =====================================================
+# 🔬 SyntexIA CRM — Trazas SQL y Log de Consultas Lentas
+# =====================================================
+"""
+Instrumentación opcional de las conexiones SQLite del repositorio.
+
+Con un `TrazadorSQL` el pool abre conexiones `ConexionTrazada`, cuyos
+cursores miden cada sentencia: texto, forma de los parámetros, tiempo
+(ejecución + lectura de filas), filas devueltas o afectadas y pasos de
+la máquina virtual de SQLite (progress handler; incluye el trabajo de
+los triggers). Las sentencias por encima del umbral se escriben en el
+log; si hay una traza de petición activa (`iniciar_traza`) se añaden a
+ella para devolverlas con la respuesta.
+
+Sin trazador las conexiones son `sqlite3.Connection` normales: coste cero.
+"""
+
+import re
+import sqlite3
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from src.config.logger import get_logger
+
+logger = get_logger("SQL-Trazas")
+
+# Instrucciones de la VM de SQLite entre llamadas al progress handler
+PASOS_POR_AVISO = 1000
+
+# Longitud máxima del texto SQL guardado en una traza
+MAX_TEXTO_SQL = 500
+
+# Sentencias de la petición en curso (None = no se está trazando)
+_traza_actual: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar("traza_sql", default=None)
+
+
+def iniciar_traza() -> List[Dict[str, Any]]:
+    """Empezar a recoger las sentencias ejecutadas en este contexto (petición)"""
+    traza: List[Dict[str, Any]] = []
+    _traza_actual.set(traza)
+    return traza
+
+
+def finalizar_traza():
+    _traza_actual.set(None)
+
+
+def forma_parametros(parametros: Any) -> str:
+    """Forma de los parámetros sin sus valores: `?, ?, ?`, `40 x ?`, `:email, :id`"""
+    if isinstance(parametros, dict):
+        return ", ".join(f":{clave}" for clave in parametros)
+    try:
+        n = len(parametros)
+    except TypeError:
+        return type(parametros).__name__
+    return ", ".join("?" * n) if n <= 8 else f"{n} x ?"
+
+
+def _normalizar(sql: str) -> str:
+    texto = re.sub(r"\s+", " ", sql).strip()
+    return texto if len(texto) <= MAX_TEXTO_SQL else texto[:MAX_TEXTO_SQL] + "…"
+
+
+class TrazadorSQL:
+    """Configuración de la instrumentación y últimas peticiones trazadas"""
+
+    def __init__(self, umbral_lenta_ms: float = 0, trazas_peticion: bool = False, max_peticiones: int = 50):
+        """
+        Args:
+            umbral_lenta_ms: Sentencias que tardan más se escriben en el log
+                (0 = sin log de consultas lentas)
+            trazas_peticion: Permitir trazar peticiones concretas
+            max_peticiones: Peticiones trazadas que se conservan para consulta
+        """
+        self.umbral_lenta = umbral_lenta_ms / 1000
+        self.trazas_peticion = trazas_peticion
+        self.recientes: "deque[Dict[str, Any]]" = deque(maxlen=max_peticiones)
+
+    def instrumentar(self, conn: "ConexionTrazada") -> "ConexionTrazada":
+        conn.trazador = self
+        conn.pasos = 0
+
+        def aviso() -> int:
+            conn.pasos += PASOS_POR_AVISO
+            return 0
+
+        conn.set_progress_handler(aviso, PASOS_POR_AVISO)
+        return conn
+
+    def registrar(self, sentencia: Dict[str, Any]):
+        """Sentencia terminada: log si es lenta y alta en la traza de la petición"""
+        if self.umbral_lenta and sentencia["duracion_ms"] >= self.umbral_lenta * 1000:
+            logger.warning(
+                "🐢 SQL lenta %.1f ms, %d filas, ~%d pasos VM: %s [%s]",
+                sentencia["duracion_ms"], sentencia["filas"], sentencia["pasos_vm"],
+                sentencia["sql"], sentencia["parametros"]
+            )
+
+        traza = _traza_actual.get()
+        if traza is not None:
+            traza.append(sentencia)
+
+
+class CursorTrazado(sqlite3.Cursor):
+    """
+    Cursor que mide cada sentencia hasta que se leen todas sus filas.
+
+    La sentencia se da por terminada al agotar las filas, al ejecutar
+    otra en el mismo cursor o al liberarse el cursor.
+    """
+
+    _sentencia: Optional[Dict[str, Any]] = None
+
+    def _empezar(self, sql: str, parametros: Any, lote: Optional[int] = None):
+        self._terminar()
+        forma = forma_parametros(parametros)
+        self._sentencia = {
+            "sql": _normalizar(sql),
+            "parametros": f"{lote} x ({forma})" if lote is not None else forma,
+            "duracion_ms": 0.0,
+            "filas": 0,
+            "pasos_vm": 0,
+        }
+        self._pasos_inicio = self.connection.pasos
+
+    def _acumular(self, inicio: float, filas: int = 0):
+        if self._sentencia is not None:
+            self._sentencia["duracion_ms"] += (time.perf_counter() - inicio) * 1000
+            self._sentencia["filas"] += filas
+
+    def _terminar(self):
+        sentencia, self._sentencia = self._sentencia, None
+        if sentencia is None:
+            return
+        sentencia["duracion_ms"] = round(sentencia["duracion_ms"], 3)
+        sentencia["pasos_vm"] = self.connection.pasos - self._pasos_inicio
+        if not sentencia["filas"] and self.rowcount > 0:
+            # INSERT / UPDATE / DELETE: filas afectadas
+            sentencia["filas"] = self.rowcount
+        self.connection.trazador.registrar(sentencia)
+
+    def execute(self, sql: str, parametros: Any = ()):
+        self._empezar(sql, parametros)
+        inicio = time.perf_counter()
+        try:
+            return super().execute(sql, parametros)
+        finally:
+            self._acumular(inicio)
+            if self.description is None:
+                self._terminar()
+
+    def executemany(self, sql: str, filas: Any):
+        filas = filas if isinstance(filas, (list, tuple)) else list(filas)
+        self._empezar(sql, filas[0] if filas else (), lote=len(filas))
+        inicio = time.perf_counter()
+        try:
+            return super().executemany(sql, filas)
+        finally:
+            self._acumular(inicio)
+            self._terminar()
+
+    def fetchone(self):
+        inicio = time.perf_counter()
+        fila = super().fetchone()
+        self._acumular(inicio, fila is not None)
+        if fila is None:
+            self._terminar()
+        return fila
+
+    def fetchmany(self, size: Optional[int] = None):
+        inicio = time.perf_counter()
+        filas = super().fetchmany(self.arraysize if size is None else size)
+        self._acumular(inicio, len(filas))
+        if len(filas) < (self.arraysize if size is None else size):
+            self._terminar()
+        return filas
+
+    def fetchall(self):
+        inicio = time.perf_counter()
+        filas = super().fetchall()
+        self._acumular(inicio, len(filas))
+        self._terminar()
+        return filas
+
+    def __next__(self):
+        inicio = time.perf_counter()
+        try:
+            fila = super().__next__()
+        except StopIteration:
+            self._terminar()
+            raise
+        self._acumular(inicio, 1)
+        return fila
+
+    def close(self):
+        self._terminar()
+        super().close()
+
+    def __del__(self):
+        # `conn.execute(...).fetchone()`: el cursor se libera sin agotar sus filas
+        try:
+            self._terminar()
+        except Exception:
+            pass
+
+
+class ConexionTrazada(sqlite3.Connection):
+    """Conexión cuyos cursores (también los de `execute`) son `CursorTrazado`"""
+
+    trazador: TrazadorSQL
+    pasos: int = 0
+
+    def cursor(self, factory=CursorTrazado):
+        return super().cursor(factory)
+
+    # sqlite3.Connection.execute no pasa por `cursor()`: se redefinen
+    def execute(self, sql: str, parametros: Any = ()):
+        return self.cursor().execute(sql, parametros)
+
+    def executemany(self, sql: str, filas: Any):
+        return self.cursor().executemany(sql, filas)
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# =====================================================
+# 🧪 Fixtures compartidas de los tests
+# =====================================================
+"""
+Repositorios sobre una base de datos temporal, para los tests que no
+necesitan el servidor.
+"""
+
+import pytest
+
+from src.repositories.crm_repository import CRMRepository
+
+
+# =====================================================
+# FIXTURES
+# =====================================================
+
+@pytest.fixture
+def crear_repo(tmp_path):
+    """
+    Fábrica de repositorios sobre `tmp_path/crm_test.db`; todos se cierran al final.
+
+    Varias llamadas abren la misma base de datos, como varios procesos del servidor.
+    """
+    repos = []
+
+    def crear(**opciones) -> CRMRepository:
+        opciones.setdefault("pool_size", 2)
+        repo = CRMRepository(db_path=str(tmp_path / "crm_test.db"), **opciones)
+        repos.append(repo)
+        return repo
+
+    yield crear
+    for repo in repos:
+        repo.cerrar()
+
+
+@pytest.fixture
+def repo(crear_repo) -> CRMRepository:
+    """Repositorio con la configuración por defecto"""
+    return crear_repo()
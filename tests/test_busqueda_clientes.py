@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# =====================================================
+# 🧪 Tests de la Búsqueda de Clientes (FTS5)
+# =====================================================
+"""
+Índice de texto completo `clientes_fts` y paginación de sus resultados
+sobre una base de datos temporal.
+Ejecutar con: python -m pytest tests/test_busqueda_clientes.py -v
+"""
+
+import pytest
+
+from src.models.crm_models import ClienteCreate, ClienteUpdate
+from src.repositories.crm_repository import codificar_cursor
+
+
+def buscar(repo, texto: str, **opciones) -> set:
+    """Nombres de los clientes que encuentra `buscar` (una sola página)"""
+    clientes, _, _ = repo.listar_clientes(buscar=texto, limit=100, **opciones)
+    return {cliente.nombre_completo for cliente in clientes}
+
+
+@pytest.fixture(autouse=True)
+def requiere_fts(repo):
+    if not repo._fts_disponible:
+        pytest.skip("SQLite sin FTS5: la búsqueda usa LIKE")
+
+
+def test_sin_distinguir_acentos_ni_mayusculas(repo):
+    """"garcia" encuentra "García" y "GARCÍA" encuentra "Garcia" """
+    repo.crear_cliente(ClienteCreate(nombre_completo="María García López"))
+    repo.crear_cliente(ClienteCreate(nombre_completo="Pedro Garcia"))
+    repo.crear_cliente(ClienteCreate(nombre_completo="Ana Martín"))
+
+    assert buscar(repo, "garcia") == {"María García López", "Pedro Garcia"}
+    assert buscar(repo, "GARCÍA") == {"María García López", "Pedro Garcia"}
+    assert buscar(repo, "martin") == {"Ana Martín"}
+
+
+def test_prefijos_y_todas_las_palabras(repo):
+    """Cada palabra es un prefijo y deben aparecer todas, en nombre, email o razón social"""
+    repo.crear_cliente(ClienteCreate(nombre_completo="José Fernández", email="jose@acme.es"))
+    repo.crear_cliente(ClienteCreate(nombre_completo="Josefina Ruiz", razon_social="Ruiz Logística SL"))
+    repo.crear_cliente(ClienteCreate(nombre_completo="Fernando Acosta"))
+
+    assert buscar(repo, "jos") == {"José Fernández", "Josefina Ruiz"}
+    assert buscar(repo, "jos fern") == {"José Fernández"}
+    assert buscar(repo, "logis") == {"Josefina Ruiz"}
+    assert buscar(repo, "acme") == {"José Fernández"}
+    # La sintaxis FTS5 del usuario no se interpreta
+    assert buscar(repo, 'jos" OR "fer') == set()
+    assert buscar(repo, "***") == set()
+
+
+def test_indice_sincronizado_tras_update_y_delete(repo):
+    """Los triggers reindexan al editar nombre, email o razón social y desindexan al borrar"""
+    cliente = repo.crear_cliente(ClienteCreate(nombre_completo="Lucía Prieto", email="lucia@viejo.es"))
+    otro = repo.crear_cliente(ClienteCreate(nombre_completo="Lucas Prieto"))
+
+    repo.actualizar_cliente(cliente.id, ClienteUpdate(nombre_completo="Lucía Soto", email="lucia@nuevo.es"))
+
+    assert buscar(repo, "prieto") == {"Lucas Prieto"}
+    assert buscar(repo, "soto") == {"Lucía Soto"}
+    assert buscar(repo, "viejo") == set()
+    assert buscar(repo, "nuevo") == {"Lucía Soto"}
+
+    # Un UPDATE de otras columnas no toca el índice
+    repo.actualizar_cliente(cliente.id, ClienteUpdate(notas="Prieto en las notas no se indexa"))
+    assert buscar(repo, "soto") == {"Lucía Soto"}
+    assert buscar(repo, "prieto") == {"Lucas Prieto"}
+
+    repo.eliminar_cliente(otro.id)
+    assert buscar(repo, "prieto") == set()
+    assert buscar(repo, "luc") == {"Lucía Soto"}
+
+    # El índice coincide con la tabla (comprobación de integridad de FTS5)
+    with repo._pool.conexion() as conn:
+        conn.execute("INSERT INTO clientes_fts(clientes_fts, rank) VALUES ('integrity-check', 1)")
+
+
+def test_paginacion_de_resultados_sin_duplicados_ni_huecos(repo):
+    """El cursor recorre todos los resultados de la búsqueda una sola vez, en orden de relevancia"""
+    creados, _ = repo.importar_clientes([
+        # Relevancias repetidas (mismo texto) para probar el desempate por id
+        ClienteCreate(nombre_completo=f"Cliente Núñez {i % 4}", razon_social="Núñez" if i % 3 == 0 else None)
+        for i in range(47)
+    ])
+    repo.importar_clientes([ClienteCreate(nombre_completo=f"Otro {i}") for i in range(10)])
+    assert creados == 47
+
+    vistos, cursor, paginas = [], None, 0
+    while True:
+        clientes, total, cursor = repo.listar_clientes(buscar="nunez", limit=10, cursor_pagina=cursor)
+        vistos.extend(cliente.id for cliente in clientes)
+        paginas += 1
+        if cursor is None:
+            break
+
+    assert total == 47
+    assert paginas == 5
+    assert len(vistos) == len(set(vistos)) == 47
+
+    # Mismo orden que una sola página con todos los resultados
+    todos, _, _ = repo.listar_clientes(buscar="nunez", limit=100)
+    assert vistos == [cliente.id for cliente in todos]
+
+
+def recorrer(repo, texto: str, entre_paginas=None) -> list:
+    """Ids de todas las páginas de 10 de la búsqueda; `entre_paginas(n)` escribe tras la página n"""
+    vistos, cursor, pagina = [], None, 0
+    while True:
+        clientes, _, cursor = repo.listar_clientes(buscar=texto, limit=10, cursor_pagina=cursor, contar="no")
+        vistos.extend(cliente.id for cliente in clientes)
+        pagina += 1
+        if cursor is None:
+            return vistos
+        if entre_paginas:
+            entre_paginas(pagina)
+
+
+def test_paginacion_con_escrituras_entre_paginas(repo):
+    """Las escrituras entre páginas cambian todos los rank (estadísticas bm25), no el recorrido"""
+    repo.importar_clientes([ClienteCreate(nombre_completo=f"Cliente Ibáñez {i:02d}") for i in range(35)])
+    esperados = recorrer(repo, "ibanez")
+    assert len(esperados) == 35
+
+    def escribir(pagina: int):
+        # Altas, cambios y bajas que no coinciden con la búsqueda pero alteran el índice
+        nuevos = [repo.crear_cliente(ClienteCreate(nombre_completo=f"Otro {pagina} {i}")) for i in range(5)]
+        repo.actualizar_cliente(nuevos[0].id, ClienteUpdate(razon_social="Distribuciones Largas del Norte SA"))
+        repo.eliminar_cliente(nuevos[1].id)
+
+    vistos = recorrer(repo, "ibanez", entre_paginas=escribir)
+
+    assert vistos == esperados
+
+
+def test_cursor_de_busqueda_no_valido(repo):
+    repo.importar_clientes([ClienteCreate(nombre_completo=f"Cliente Ibáñez {i}") for i in range(3)])
+    _, _, cursor = repo.listar_clientes(buscar="ibanez", limit=1)
+
+    with pytest.raises(ValueError):
+        repo.listar_clientes(buscar="ibanez", limit=1, cursor_pagina=codificar_cursor(-1.0, "cli_x"))
+    with pytest.raises(ValueError):
+        repo.listar_clientes(buscar="ibanez", limit=1, cursor_pagina=codificar_cursor(-1.0, "cli_x", -5, 1))
+    assert len(repo.listar_clientes(buscar="ibanez", limit=1, cursor_pagina=cursor)[0]) == 1
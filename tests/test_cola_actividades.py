@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# =====================================================
+# 🧪 Tests de la Cola de Actividades
+# =====================================================
+"""
+Commits agrupados de actividades sobre una base de datos temporal.
+Ejecutar con: python -m pytest tests/test_cola_actividades.py -v
+"""
+
+import threading
+import time
+
+from src.repositories.cola_actividades import ColaActividades, ColaLlena
+from src.repositories.trazas_sql import TrazadorSQL, iniciar_traza, finalizar_traza
+from src.models.crm_models import ActividadSchema, ClienteCreate
+
+
+def test_lote_con_cliente_inexistente(repo):
+    """Un cliente inexistente no aborta el resto del lote"""
+    cliente = repo.crear_cliente(ClienteCreate(nombre_completo="Cliente Lote"))
+
+    creadas = repo.crear_actividades_lote([
+        (cliente.id, ActividadSchema(tipo="llamada", titulo="Uno")),
+        ("cli_no_existe", ActividadSchema(tipo="llamada", titulo="Dos")),
+        (cliente.id, ActividadSchema(tipo="email", titulo="Tres")),
+    ])
+
+    assert [actividad.titulo if actividad else None for actividad in creadas] == ["Uno", None, "Tres"]
+    assert len(repo._obtener_actividades(cliente.id)) == 2
+
+
+def test_cola_agrupa_y_vuelca_al_cerrar(repo):
+    """Las actividades encoladas se escriben en pocos lotes y todas antes de cerrar"""
+    cliente = repo.crear_cliente(ClienteCreate(nombre_completo="Cliente Cola"))
+    cola = ColaActividades(repo, max_lote=50, max_espera_ms=50)
+
+    futuros = [
+        cola.encolar(cliente.id, ActividadSchema(tipo="nota", titulo=f"Nota {i}"))[1]
+        for i in range(120)
+    ]
+    cola.cerrar()
+
+    assert all(futuro.result(timeout=5) is not None for futuro in futuros)
+    stats = cola.estadisticas()
+    assert stats["actividades"] == 120
+    assert stats["lotes"] < 120
+    assert len(repo._obtener_actividades(cliente.id, limit=200)) == 120
+
+
+def test_estadisticas_con_varios_productores(repo):
+    """Los contadores cuadran con lo encolado desde varios hilos mientras se leen"""
+    cliente = repo.crear_cliente(ClienteCreate(nombre_completo="Cliente Hilos"))
+    cola = ColaActividades(repo, max_lote=20, max_espera_ms=1)
+
+    def producir(indice: int):
+        for i in range(50):
+            destino = cliente.id if i % 10 else "cli_no_existe"
+            cola.encolar(destino, ActividadSchema(tipo="nota", titulo=f"Nota {indice}-{i}"))
+            cola.estadisticas()
+
+    hilos = [threading.Thread(target=producir, args=(indice,)) for indice in range(4)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    cola.cerrar()
+
+    stats = cola.estadisticas()
+    assert stats["actividades"] == 180
+    assert stats["cliente_inexistente"] == 20
+    assert stats["pendientes"] == 0
+    assert stats["lote_maximo"] <= 20
+
+
+def test_estadisticas_actualizadas_al_resolver_el_futuro(repo):
+    """Quien espera el commit ya ve su lote contado"""
+    cola = ColaActividades(repo, max_espera_ms=0)
+    try:
+        _, futuro = cola.encolar("cli_no_existe", ActividadSchema(tipo="nota", titulo="Huérfana"))
+
+        assert futuro.result(timeout=5) is None
+        assert cola.estadisticas()["cliente_inexistente"] == 1
+    finally:
+        cola.cerrar()
+
+
+def test_lote_busca_clientes_por_clave_primaria(crear_repo):
+    """La comprobación de clientes usa el índice de la clave primaria y compara los ids tal cual"""
+    repo = crear_repo(trazador=TrazadorSQL(trazas_peticion=True))
+    cliente = repo.crear_cliente(ClienteCreate(nombre_completo="Cliente Clave"))
+
+    sentencias = iniciar_traza()
+    try:
+        creadas = repo.crear_actividades_lote([
+            (cliente.id, ActividadSchema(tipo="nota", titulo="Id exacto")),
+            (cliente.id.upper(), ActividadSchema(tipo="nota", titulo="Id en mayúsculas")),
+        ])
+    finally:
+        finalizar_traza()
+
+    assert [actividad.titulo if actividad else None for actividad in creadas] == ["Id exacto", None]
+    consulta = next(s["sql"] for s in sentencias if s["sql"].startswith("SELECT id FROM clientes"))
+    with repo._pool.conexion() as conn:
+        plan = " ".join(
+            row["detail"] for row in conn.execute(f"EXPLAIN QUERY PLAN {consulta}", ("a", "b"))
+        )
+    assert plan.startswith("SEARCH clientes")
+
+
+def test_encolar_durante_el_cierre(repo):
+    """Lo que se acepta mientras se cierra se escribe; lo que llega después se rechaza"""
+    cliente = repo.crear_cliente(ClienteCreate(nombre_completo="Cliente Cierre"))
+    cola = ColaActividades(repo, max_lote=10, max_espera_ms=0)
+    aceptados = []
+    rechazos = []
+
+    def producir(indice: int):
+        for i in range(10000):
+            try:
+                aceptados.append(cola.encolar(cliente.id, ActividadSchema(tipo="nota", titulo=f"{indice}-{i}"))[1])
+            except ColaLlena:
+                time.sleep(0.001)
+            except RuntimeError:
+                rechazos.append(indice)
+                return
+
+    hilos = [threading.Thread(target=producir, args=(indice,)) for indice in range(4)]
+    for hilo in hilos:
+        hilo.start()
+    while len(aceptados) < 200:
+        time.sleep(0.001)
+    cola.cerrar()
+    for hilo in hilos:
+        hilo.join()
+
+    assert sorted(rechazos) == [0, 1, 2, 3]
+    # Ningún Future queda sin resolver tras `cerrar`
+    assert all(futuro.done() for futuro in aceptados)
+    assert cola.estadisticas()["actividades"] == len(aceptados)
@@ -23,6 +23,7 @@ TIMEOUT = 5
 
 # Variables globales para guardar IDs
 cliente_id = None
+cliente_email = None
 actividad_id = None
 oportunidad_id = None
 
@@ -75,13 +76,27 @@ def test_version():
     print(f"✅ Versión: {response.json()['version']}")
 
 
+def test_metricas_prometheus():
+    """/metrics expone latencias por plantilla de ruta y por método del repositorio"""
+    requests.get(f"{BASE_URL}/health", timeout=TIMEOUT)
+    requests.get(f"{CRM_API}/clientes/cli_no_existe", timeout=TIMEOUT)
+
+    response = requests.get(f"{BASE_URL}/metrics", timeout=TIMEOUT)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'crm_http_duracion_segundos_bucket{metodo="GET",ruta="/health",le="+Inf"}' in response.text
+    assert 'crm_http_peticiones_total{metodo="GET",ruta="/api/crm/clientes/{cliente_id}",estado="404"}' in response.text
+    assert 'crm_repositorio_duracion_segundos_count{metodo="etag_cliente"}' in response.text
+    print("✅ Métricas Prometheus expuestas")
+
+
 # =====================================================
 # TESTS CLIENTES
 # =====================================================
 
 def test_crear_cliente():
     """Test crear cliente"""
-    global cliente_id
+    global cliente_id, cliente_email
     
     payload = {
         "nombre_completo": "Test Client Corp",
@@ -101,6 +116,7 @@ def test_crear_cliente():
     assert response.status_code == 201, f"Error: {response.text}"
     data = response.json()
     cliente_id = data["id"]
+    cliente_email = data["email"]
     
     assert data["nombre_completo"] == payload["nombre_completo"]
     assert data["email"] == payload["email"]
@@ -123,6 +139,56 @@ def test_obtener_cliente():
     print(f"✅ Cliente obtenido: {cliente_id}")
 
 
+def test_obtener_cliente_condicional():
+    """Test GET condicional: 304 con el ETag vigente"""
+    if not cliente_id:
+        pytest.skip("Cliente no creado")
+    
+    response = requests.get(f"{CRM_API}/clientes/{cliente_id}", timeout=TIMEOUT)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    
+    response = requests.get(
+        f"{CRM_API}/clientes/{cliente_id}",
+        headers={"If-None-Match": etag},
+        timeout=TIMEOUT
+    )
+    assert response.status_code == 304
+    assert response.content == b""
+    
+    response = requests.get(f"{CRM_API}/clientes", timeout=TIMEOUT)
+    assert "Last-Modified" in response.headers
+    response = requests.get(
+        f"{CRM_API}/clientes",
+        headers={"If-None-Match": response.headers["ETag"]},
+        timeout=TIMEOUT
+    )
+    assert response.status_code == 304
+    print(f"✅ GET condicional: {etag}")
+
+
+def test_buscar_por_email():
+    """Test búsqueda exacta por email (sin distinguir mayúsculas)"""
+    if not cliente_id:
+        pytest.skip("Cliente no creado")
+    
+    response = requests.get(
+        f"{CRM_API}/clientes/buscar/email/{cliente_email.upper()}",
+        timeout=TIMEOUT
+    )
+    
+    assert response.status_code == 200
+    assert response.json()["id"] == cliente_id
+    
+    # Un fragmento del email no debe coincidir
+    response = requests.get(
+        f"{CRM_API}/clientes/buscar/email/{cliente_email[1:]}",
+        timeout=TIMEOUT
+    )
+    assert response.status_code == 404
+    print(f"✅ Cliente encontrado por email: {cliente_email}")
+
+
 def test_listar_clientes():
     """Test listar clientes"""
     response = requests.get(
@@ -138,6 +204,95 @@ def test_listar_clientes():
     print(f"✅ Clientes listados: {data['total']} total")
 
 
+def test_listar_clientes_cursor():
+    """Test paginación por cursor sin total"""
+    response = requests.get(
+        f"{CRM_API}/clientes?limit=1&contar=no",
+        timeout=TIMEOUT
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] is None
+    assert "next_cursor" in data
+
+    if data["next_cursor"]:
+        siguiente = requests.get(
+            f"{CRM_API}/clientes",
+            params={"limit": 1, "contar": "no", "cursor": data["next_cursor"]},
+            timeout=TIMEOUT
+        ).json()
+        ids_pagina_1 = {c["id"] for c in data["clientes"]}
+        assert not ids_pagina_1 & {c["id"] for c in siguiente["clientes"]}
+
+    response = requests.get(f"{CRM_API}/clientes?cursor=no-es-un-cursor", timeout=TIMEOUT)
+    assert response.status_code == 400
+    print("✅ Paginación por cursor correcta")
+
+
+def test_listar_clientes_proyeccion():
+    """Test fields/expand: solo las columnas y relaciones pedidas"""
+    response = requests.get(
+        f"{CRM_API}/clientes",
+        params={"fields": "nombre_completo,estado", "limit": 5},
+        timeout=TIMEOUT
+    )
+    
+    assert response.status_code == 200
+    for cliente in response.json()["clientes"]:
+        assert set(cliente) == {"id", "nombre_completo", "estado"}
+    
+    response = requests.get(f"{CRM_API}/clientes", params={"fields": "no_existe"}, timeout=TIMEOUT)
+    assert response.status_code == 400
+    print("✅ Proyección de campos en el listado")
+
+
+def test_esquema_openapi_proyeccion():
+    """El esquema OpenAPI admite clientes completos y proyectados en listado y detalle"""
+    response = requests.get(f"{BASE_URL}/openapi.json", timeout=TIMEOUT)
+
+    assert response.status_code == 200
+    esquema = response.json()
+    referencias = {"#/components/schemas/Cliente", "#/components/schemas/ClienteParcial"}
+
+    items = esquema["components"]["schemas"]["ListaClientes"]["properties"]["clientes"]["items"]
+    assert {opcion["$ref"] for opcion in items["anyOf"]} == referencias
+
+    detalle = esquema["paths"]["/api/crm/clientes/{cliente_id}"]["get"]["responses"]["200"]
+    opciones = detalle["content"]["application/json"]["schema"]["anyOf"]
+    assert {opcion["$ref"] for opcion in opciones} == referencias
+    print("✅ Esquema OpenAPI de la proyección")
+
+
+def test_importar_clientes_bulk():
+    """Test importación masiva con errores por registro"""
+    sufijo = int(time.time() * 1000)
+    payload = [
+        {"nombre_completo": "Bulk Uno", "email": f"bulk-1-{sufijo}@example.com"},
+        {"nombre_completo": "Bulk Duplicado", "email": f"bulk-1-{sufijo}@example.com"},
+        {"email": "sin-nombre@example.com"},
+    ]
+    
+    response = requests.post(
+        f"{CRM_API}/clientes/bulk",
+        json=payload,
+        timeout=TIMEOUT
+    )
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 3
+    assert data["creados"] == 1
+    assert [error["indice"] for error in data["errores"]] == [1, 2]
+    
+    creado = requests.get(
+        f"{CRM_API}/clientes/buscar/email/bulk-1-{sufijo}@example.com",
+        timeout=TIMEOUT
+    ).json()
+    requests.delete(f"{CRM_API}/clientes/{creado['id']}", timeout=TIMEOUT)
+    print("✅ Importación masiva correcta")
+
+
 def test_actualizar_cliente():
     """Test actualizar cliente"""
     if not cliente_id:
@@ -160,6 +315,34 @@ def test_actualizar_cliente():
     print(f"✅ Cliente actualizado")
 
 
+def test_cache_invalidada_tras_actualizar():
+    """Test la lectura cacheada refleja la última actualización"""
+    if not cliente_id:
+        pytest.skip("Cliente no creado")
+    
+    # Dos lecturas: la segunda puede servirse desde la caché
+    for _ in range(2):
+        response = requests.get(f"{CRM_API}/clientes/{cliente_id}", timeout=TIMEOUT)
+        assert response.status_code == 200
+    
+    response = requests.put(
+        f"{CRM_API}/clientes/{cliente_id}",
+        json={"segmento": "pyme"},
+        timeout=TIMEOUT
+    )
+    assert response.status_code == 200
+    
+    response = requests.get(f"{CRM_API}/clientes/{cliente_id}", timeout=TIMEOUT)
+    assert response.json()["segmento"] == "pyme"
+    
+    response = requests.get(f"{CRM_API}/cache/estadisticas", timeout=TIMEOUT)
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["hits"] >= 1
+    assert stats["invalidaciones"] >= 1
+    print(f"✅ Caché de clientes: tasa de acierto {stats['tasa_acierto']}")
+
+
 # =====================================================
 # TESTS CONTACTOS
 # =====================================================
@@ -251,6 +434,33 @@ def test_listar_actividades():
     print(f"✅ Actividades listadas: {len(data)} actividades")
 
 
+def test_historial_actividades():
+    """Test historial de actividades paginado y en NDJSON"""
+    if not cliente_id:
+        pytest.skip("Cliente no creado")
+    
+    response = requests.get(
+        f"{CRM_API}/clientes/{cliente_id}/actividades/historial",
+        params={"limit": 1, "tipo": "llamada,reunion"},
+        timeout=TIMEOUT
+    )
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["actividades"]) <= 1
+    assert "next_cursor" in data
+    
+    response = requests.get(
+        f"{CRM_API}/clientes/{cliente_id}/actividades/historial",
+        params={"formato": "ndjson"},
+        timeout=TIMEOUT
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lineas = [json.loads(linea) for linea in response.text.splitlines()]
+    print(f"✅ Historial de actividades: {len(lineas)} actividades")
+
+
 # =====================================================
 # TESTS OPORTUNIDADES
 # =====================================================
@@ -299,6 +509,53 @@ def test_listar_oportunidades():
     print(f"✅ Oportunidades listadas: {len(data)} oportunidades")
 
 
+def test_estadisticas_cliente():
+    """Test estadísticas de un cliente y de varios a la vez"""
+    if not cliente_id:
+        pytest.skip("Cliente no creado")
+    
+    response = requests.get(f"{CRM_API}/clientes/{cliente_id}/estadisticas", timeout=TIMEOUT)
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["cliente_id"] == cliente_id
+    assert data["salud_cliente"] in ("buena", "atencion", "en_riesgo")
+    
+    response = requests.post(
+        f"{CRM_API}/clientes/estadisticas",
+        json=[cliente_id, "cli_no_existe"],
+        timeout=TIMEOUT
+    )
+    assert response.status_code == 200
+    assert [e["cliente_id"] for e in response.json()] == [cliente_id]
+    print(f"✅ Estadísticas: {data['actividades']} actividades, salud {data['salud_cliente']}")
+
+
+def test_listar_oportunidades_pipeline():
+    """Test listado de oportunidades de todos los clientes"""
+    response = requests.get(f"{CRM_API}/oportunidades", params={"limit": 5}, timeout=TIMEOUT)
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["oportunidades"]) <= 5
+    assert "next_cursor" in data
+    
+    response = requests.get(f"{CRM_API}/oportunidades", params={"estado": "no_existe"}, timeout=TIMEOUT)
+    assert response.status_code == 400
+    print(f"✅ Oportunidades del pipeline: {len(data['oportunidades'])}")
+
+
+def test_pipeline():
+    """Test agregados del pipeline por estado y por mes"""
+    response = requests.get(f"{CRM_API}/pipeline", timeout=TIMEOUT)
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["oportunidades"] == sum(grupo["oportunidades"] for grupo in data["por_estado"])
+    assert data["oportunidades"] == sum(grupo["oportunidades"] for grupo in data["por_mes"])
+    print(f"✅ Pipeline: {data['oportunidades']} oportunidades, {data['valor_ponderado']:.2f} ponderado")
+
+
 # =====================================================
 # TESTS ESTADÍSTICAS
 # =====================================================
@@ -326,6 +583,31 @@ def test_obtener_resumen():
     print(f"   💼 Oportunidades próximas: {data['oportunidades_proximas_cerrar']}")
 
 
+# =====================================================
+# TESTS EXPORTACIÓN
+# =====================================================
+
+def test_exportar_clientes_ndjson():
+    """Test exportación en streaming (NDJSON)"""
+    response = requests.get(
+        f"{CRM_API}/export/clientes",
+        timeout=TIMEOUT
+    )
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    filas = [json.loads(linea) for linea in response.text.splitlines() if linea]
+    assert all("id" in fila for fila in filas)
+    print(f"✅ Exportados {len(filas)} clientes")
+
+
+def test_exportar_tabla_no_valida():
+    """Test error al exportar una tabla no permitida"""
+    response = requests.get(f"{CRM_API}/export/sqlite_master", timeout=TIMEOUT)
+    assert response.status_code == 404
+    print("✅ Error 404 correcto para tabla no exportable")
+
+
 # =====================================================
 # TESTS ERRORES
 # =====================================================
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# =====================================================
+# 🧪 Tests de Estadísticas por Cliente
+# =====================================================
+"""
+Estadísticas incrementales por cliente sobre una base de datos temporal.
+Ejecutar con: python -m pytest tests/test_estadisticas_clientes.py -v
+"""
+
+from datetime import datetime, timedelta
+
+from src.repositories.crm_repository import clasificar_salud
+from src.models.crm_models import ActividadSchema, ClienteCreate, OportunidadSchema
+
+
+def filas_estadisticas(repo) -> dict:
+    """Contenido de `estadisticas_clientes` sin las filas que han vuelto a cero"""
+    with repo._pool.conexion() as conn:
+        return {
+            row[0]: tuple(row)[1:]
+            for row in conn.execute("SELECT * FROM estadisticas_clientes")
+            if any(tuple(row)[1:])
+        }
+
+
+def test_incrementales_igual_que_recalculadas(repo):
+    """Tras altas, cambios y borrados los triggers dejan lo mismo que un recálculo completo"""
+    ana = repo.crear_cliente(ClienteCreate(nombre_completo="Ana"))
+    luis = repo.crear_cliente(ClienteCreate(nombre_completo="Luis"))
+    hoy = datetime.now()
+    for dias, completada in ((1, True), (10, False), (40, True)):
+        repo.crear_actividad(ana.id, ActividadSchema(
+            tipo="llamada", titulo=f"Hace {dias}", fecha=hoy - timedelta(days=dias), completada=completada
+        ))
+    for estado, valor in (("propuesta", 1000.0), ("ganada", 500.0), ("inicial", 250.0)):
+        repo.crear_oportunidad(luis.id, OportunidadSchema(
+            titulo=estado, estado=estado, valor_estimado=valor, probabilidad_cierre=50, fecha_cierre_esperada=hoy
+        ))
+
+    with repo._pool.conexion() as conn:
+        conn.execute("DELETE FROM actividades WHERE titulo = 'Hace 1'")
+        conn.execute("UPDATE actividades SET completada = 1 WHERE titulo = 'Hace 10'")
+        conn.execute("UPDATE oportunidades SET estado = 'perdida' WHERE titulo = 'inicial'")
+        conn.execute("UPDATE oportunidades SET cliente_id = ? WHERE titulo = 'propuesta'", (ana.id,))
+        conn.commit()
+
+    incrementales = filas_estadisticas(repo)
+    repo.recalcular_estadisticas_clientes()
+    assert incrementales == filas_estadisticas(repo)
+
+    estadisticas = repo.obtener_estadisticas_cliente(ana.id)
+    assert (estadisticas.actividades, estadisticas.actividades_pendientes) == (2, 0)
+    assert estadisticas.dias_desde_ultimo_contacto == 10
+    assert estadisticas.dias_desde_primer_contacto == 40
+    assert (estadisticas.oportunidades_abiertas, estadisticas.valor_oportunidades_abiertas) == (1, 1000)
+    assert repo.obtener_estadisticas_cliente(luis.id).oportunidades_abiertas == 0
+
+    repo.eliminar_cliente(ana.id)
+    assert ana.id not in filas_estadisticas(repo)
+
+
+def test_varios_clientes_en_orden(repo):
+    """La variante masiva respeta el orden pedido y omite los inexistentes"""
+    ids = [repo.crear_cliente(ClienteCreate(nombre_completo=f"Cliente {i}")).id for i in range(3)]
+
+    estadisticas = repo.obtener_estadisticas_clientes([ids[2], "cli_no_existe", ids[0], ids[2]])
+
+    assert [e.cliente_id for e in estadisticas] == [ids[2], ids[0]]
+    assert all(e.actividades == 0 and e.dias_desde_ultimo_contacto == 0 for e in estadisticas)
+    assert repo.obtener_estadisticas_cliente("cli_no_existe") is None
+
+
+def test_clasificar_salud():
+    assert clasificar_salud(5, 99) == "buena"
+    assert clasificar_salud(5, None) == "buena"
+    assert clasificar_salud(45, 99) == "atencion"
+    assert clasificar_salud(5, 90) == "atencion"
+    assert clasificar_salud(120, 99) == "en_riesgo"
+    assert clasificar_salud(5, 60) == "en_riesgo"
+
+
+def test_puntuacion_salud_en_lote(repo):
+    """Puntúa todos los clientes por lotes, refresca los días sin contacto y el recálculo la conserva"""
+    hoy = datetime.now()
+    activo = repo.crear_cliente(ClienteCreate(nombre_completo="Activo"))
+    dormido = repo.crear_cliente(ClienteCreate(nombre_completo="Dormido"))
+    sin_actividad = repo.crear_cliente(ClienteCreate(nombre_completo="Sin actividad"))
+    for dias in (2, 20, 35):
+        repo.crear_actividad(activo.id, ActividadSchema(tipo="reunion", titulo="Visita", fecha=hoy - timedelta(days=dias)))
+    repo.crear_oportunidad(activo.id, OportunidadSchema(
+        titulo="Renovación", valor_estimado=20000, probabilidad_cierre=60, fecha_cierre_esperada=hoy
+    ))
+    repo.crear_actividad(dormido.id, ActividadSchema(tipo="email", titulo="Último", fecha=hoy - timedelta(days=400)))
+    repo.obtener_cliente(dormido.id)
+
+    resultado = repo.puntuar_salud_clientes(tamano_lote=2)
+
+    assert (resultado["clientes"], resultado["lotes"]) == (3, 2)
+    salud = {e.cliente_id: e for e in repo.obtener_estadisticas_clientes([activo.id, dormido.id, sin_actividad.id])}
+    assert salud[activo.id].salud_cliente == "buena"
+    assert salud[dormido.id].salud_cliente == "en_riesgo"
+    assert salud[activo.id].puntuacion_salud > salud[sin_actividad.id].puntuacion_salud > salud[dormido.id].puntuacion_salud
+    # La caché de clientes se vacía: se ve el dato refrescado
+    assert repo.obtener_cliente(dormido.id).dias_desde_ultimo_contacto == 400
+
+    repo.recalcular_estadisticas_clientes()
+    assert repo.obtener_estadisticas_cliente(activo.id).puntuacion_salud == salud[activo.id].puntuacion_salud
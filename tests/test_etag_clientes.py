@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# =====================================================
+# 🧪 Tests de ETag y Caché de Clientes
+# =====================================================
+"""
+Coherencia entre la caché de clientes y su ETag cuando escriben varios
+procesos sobre la misma base de datos.
+Ejecutar con: python -m pytest tests/test_etag_clientes.py -v
+"""
+
+from src.models.crm_models import ActividadSchema, ClienteCreate, ClienteUpdate
+
+
+def test_escritura_de_otro_proceso_no_sirve_cache_obsoleta(crear_repo):
+    """Tras escribir desde otro repositorio, el cuerpo y el ETag servidos son los nuevos"""
+    lector = crear_repo()
+    escritor = crear_repo()
+    cliente = lector.crear_cliente(ClienteCreate(nombre_completo="Nombre Viejo"))
+
+    cacheado, etag_viejo = lector.obtener_cliente_con_etag(cliente.id)
+    assert cacheado.nombre_completo == "Nombre Viejo"
+    assert lector.obtener_cliente_con_etag(cliente.id) == (cacheado, etag_viejo)
+
+    escritor.actualizar_cliente(cliente.id, ClienteUpdate(nombre_completo="Nombre Nuevo"))
+
+    actual, etag = lector.obtener_cliente_con_etag(cliente.id)
+    assert actual.nombre_completo == "Nombre Nuevo"
+    assert etag == lector.etag_cliente(cliente.id) != etag_viejo
+    assert lector.obtener_cliente(cliente.id).nombre_completo == "Nombre Nuevo"
+
+
+def test_relaciones_escritas_por_otro_proceso(crear_repo):
+    """Una actividad creada en otro proceso cambia el ETag y recarga el cliente cacheado"""
+    lector = crear_repo()
+    escritor = crear_repo()
+    cliente = lector.crear_cliente(ClienteCreate(nombre_completo="Cliente Relaciones"))
+    assert lector.obtener_cliente(cliente.id).actividades_recientes == []
+
+    escritor.crear_actividad(cliente.id, ActividadSchema(tipo="llamada", titulo="Desde otro proceso"))
+
+    actual, etag = lector.obtener_cliente_con_etag(cliente.id)
+    assert [actividad.titulo for actividad in actual.actividades_recientes] == ["Desde otro proceso"]
+    assert etag == escritor.etag_cliente(cliente.id)
+
+
+def test_cliente_borrado_por_otro_proceso(crear_repo):
+    """Un cliente cacheado que otro proceso elimina deja de devolverse"""
+    lector = crear_repo()
+    escritor = crear_repo()
+    cliente = lector.crear_cliente(ClienteCreate(nombre_completo="Cliente Borrado"))
+    lector.obtener_cliente(cliente.id)
+
+    escritor.eliminar_cliente(cliente.id)
+
+    assert lector.obtener_cliente_con_etag(cliente.id) == (None, None)
+    assert lector.obtener_cliente(cliente.id) is None
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# =====================================================
+# 🧪 Tests del Historial de Actividades
+# =====================================================
+"""
+Historial de actividades por cliente sobre una base de datos temporal.
+Ejecutar con: python -m pytest tests/test_historial_actividades.py -v
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.models.crm_models import ActividadSchema, ClienteCreate
+
+
+@pytest.fixture
+def cliente_con_historial(repo):
+    """Cliente con 30 actividades; varias comparten fecha para probar el desempate por id"""
+    cliente = repo.crear_cliente(ClienteCreate(nombre_completo="Cliente Historial"))
+    base = datetime(2025, 1, 1, 9, 0)
+    repo.crear_actividades_lote([
+        (cliente.id, ActividadSchema(
+            tipo=("llamada", "email", "reunion")[i % 3],
+            titulo=f"Actividad {i}",
+            fecha=base + timedelta(days=i // 2),
+            completada=i % 2 == 0,
+            responsable="Marta" if i % 5 == 0 else "Javier"
+        ))
+        for i in range(30)
+    ])
+    return cliente
+
+
+def test_paginas_sin_huecos_ni_repetidas(repo, cliente_con_historial):
+    """El cursor recorre todo el historial, de lo más reciente a lo más antiguo"""
+    vistas, cursor = [], None
+    while True:
+        pagina, cursor = repo.listar_actividades(cliente_con_historial.id, limit=4, cursor_pagina=cursor)
+        vistas.extend(pagina)
+        if cursor is None:
+            break
+
+    assert len(vistas) == 30
+    assert len({actividad.id for actividad in vistas}) == 30
+    claves = [(actividad.fecha, actividad.id) for actividad in vistas]
+    assert claves == sorted(claves, reverse=True)
+
+
+def test_filtros(repo, cliente_con_historial):
+    actividades, _ = repo.listar_actividades(
+        cliente_con_historial.id, limit=100, tipos=["llamada"], completada=True,
+        desde=datetime(2025, 1, 5), hasta=datetime(2025, 1, 12)
+    )
+    assert {a.titulo for a in actividades} == {"Actividad 12", "Actividad 18"}
+
+    actividades, _ = repo.listar_actividades(cliente_con_historial.id, limit=100, responsable="Marta")
+    assert len(actividades) == 6
+
+    with pytest.raises(ValueError):
+        repo.listar_actividades(cliente_con_historial.id, tipos=["fax"])
+    with pytest.raises(ValueError):
+        repo.listar_actividades(cliente_con_historial.id, cursor_pagina="no-es-un-cursor")
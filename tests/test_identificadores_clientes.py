@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# =====================================================
+# 🧪 Tests de Email y CIF/NIF sin Distinguir Mayúsculas
+# =====================================================
+"""
+Unicidad y búsqueda exacta de email y CIF/NIF sobre una base de datos temporal.
+Ejecutar con: python -m pytest tests/test_identificadores_clientes.py -v
+"""
+
+import logging
+import sqlite3
+
+import pytest
+
+from src.models.crm_models import ClienteCreate
+from src.repositories.migraciones import version_esquema
+
+
+def sql_indice(repo, nombre: str) -> str:
+    with repo._pool.conexion() as conn:
+        return conn.execute("SELECT sql FROM sqlite_master WHERE name = ?", (nombre,)).fetchone()[0]
+
+
+def test_email_y_cif_unicos_sin_distinguir_mayusculas(repo):
+    """`A@x.com` choca con `a@x.com` (y lo mismo con el CIF/NIF)"""
+    original = repo.crear_cliente(ClienteCreate(nombre_completo="Original", email="ana@x.com", cif_nif="b12345678"))
+
+    with pytest.raises(ValueError):
+        repo.crear_cliente(ClienteCreate(nombre_completo="Copia", email="ANA@x.com"))
+    with pytest.raises(ValueError):
+        repo.crear_cliente(ClienteCreate(nombre_completo="Copia", cif_nif="B12345678"))
+
+    assert repo.obtener_cliente_por_email("Ana@X.com").id == original.id
+    assert repo.obtener_cliente_por_cif("B12345678").id == original.id
+    assert sql_indice(repo, "idx_cliente_email").upper().startswith("CREATE UNIQUE")
+
+
+def test_importacion_descarta_variantes_de_mayusculas(repo):
+    """Contra la base de datos y dentro de la propia importación"""
+    repo.crear_cliente(ClienteCreate(nombre_completo="Existente", email="luis@x.com"))
+
+    creados, errores = repo.importar_clientes([
+        ClienteCreate(nombre_completo="Uno", email="LUIS@x.com"),
+        ClienteCreate(nombre_completo="Dos", email="eva@x.com"),
+        ClienteCreate(nombre_completo="Tres", email="Eva@X.com"),
+    ])
+
+    assert creados == 1
+    assert [error["indice"] for error in errores] == [0, 2]
+
+
+def test_migracion_informa_de_duplicados_existentes(crear_repo, tmp_path, caplog):
+    """Con duplicados el índice queda sin UNIQUE y se informa; al corregirlos se crea en el siguiente arranque"""
+    repo = crear_repo()
+    with repo._pool.conexion() as conn:
+        version = version_esquema(conn)
+    repo.cerrar()
+
+    # Base de datos anterior a la migración, con dos emails que solo difieren en mayúsculas
+    conn = sqlite3.connect(str(tmp_path / "crm_test.db"))
+    conn.execute("DROP INDEX idx_cliente_email")
+    conn.execute("CREATE INDEX idx_cliente_email ON clientes(email COLLATE NOCASE)")
+    conn.executemany(
+        "INSERT INTO clientes (id, nombre_completo, tipo_cliente, email) VALUES (?, ?, 'empresa', ?)",
+        [("cli_a", "Minúsculas", "dup@x.com"), ("cli_b", "Mayúsculas", "DUP@x.com")]
+    )
+    conn.execute(f"PRAGMA user_version = {version - 1}")
+    conn.commit()
+    conn.close()
+
+    with caplog.at_level(logging.WARNING, logger="SyntexIA-CRM"):
+        repo = crear_repo()
+    assert "dup@x.com (clientes cli_a, cli_b)" in caplog.text
+    assert not sql_indice(repo, "idx_cliente_email").upper().startswith("CREATE UNIQUE")
+    assert sql_indice(repo, "idx_cliente_cif").upper().startswith("CREATE UNIQUE")
+    repo.eliminar_cliente("cli_b")
+    repo.cerrar()
+
+    repo = crear_repo()
+    assert sql_indice(repo, "idx_cliente_email").upper().startswith("CREATE UNIQUE")
+    assert repo.obtener_cliente_por_email("Dup@X.com").id == "cli_a"
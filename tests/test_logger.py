@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# =====================================================
+# 🧪 Tests del Logging en Segundo Plano
+# =====================================================
+"""
+Registros que viajan por `ManejadorCola` hasta el `QueueListener`, su
+formato JSON y el vaciado de la cola al parar el hilo escritor.
+Ejecutar con: python -m pytest tests/test_logger.py -v
+"""
+
+import json
+import logging
+import threading
+
+import pytest
+
+from src.config import logger as config_logger
+from src.config.logger import FiltroMuestreo, FormateadorJSON, get_logger
+
+
+class ManejadorMemoria(logging.Handler):
+    """Guarda cada registro ya formateado y el hilo que lo escribió"""
+
+    def __init__(self):
+        super().__init__()
+        self.setFormatter(FormateadorJSON())
+        self.lineas = []
+        self.hilos = set()
+
+    def emit(self, record: logging.LogRecord):
+        self.lineas.append(self.format(record))
+        self.hilos.add(threading.current_thread())
+
+    def registros(self) -> list:
+        return [json.loads(linea) for linea in self.lineas]
+
+
+@pytest.fixture
+def escritor(monkeypatch):
+    """El listener del módulo escribe en memoria en vez de en el fichero de log"""
+    manejador = ManejadorMemoria()
+    config_logger.detener_logging()
+    monkeypatch.setattr(config_logger.listener, "handlers", (manejador,))
+    config_logger.iniciar_logging()
+    yield manejador
+    config_logger.detener_logging()
+    monkeypatch.undo()
+    config_logger.iniciar_logging()
+
+
+def test_registro_llega_por_la_cola_en_formato_json(escritor):
+    """Campos del JSON, texto no ASCII y excepción formateados en el hilo del listener"""
+    log = get_logger("Test-Cola")
+    try:
+        raise ValueError("cliente inválido")
+    except ValueError:
+        log.exception("❌ Error con %s", "Íñigo")
+    log.warning("[WARN] Aviso sin excepción")
+
+    config_logger.detener_logging()
+
+    error, aviso = escritor.registros()
+    assert error["nivel"] == "ERROR"
+    assert error["logger"] == "SyntexIA-CRM.Test-Cola"
+    assert error["mensaje"] == "❌ Error con Íñigo"
+    assert "ValueError: cliente inválido" in error["excepcion"]
+    assert error["fecha"][4] == "-" and error["fecha"][10] == "T"
+    assert set(aviso) == {"fecha", "nivel", "logger", "mensaje"}
+    assert (aviso["nivel"], aviso["mensaje"]) == ("WARNING", "[WARN] Aviso sin excepción")
+    # Una línea por registro, sin escapar los caracteres no ASCII
+    assert "Íñigo" in escritor.lineas[0] and "\n" not in escritor.lineas[1]
+    assert threading.current_thread() not in escritor.hilos
+
+
+def test_el_registro_se_encola_sin_formatear():
+    """`prepare` no formatea: el registro conserva sus argumentos y la excepción"""
+    registro = logging.LogRecord("SyntexIA-CRM", logging.ERROR, __file__, 1, "Error %s", ("x",), None)
+    registro.exc_info = (ValueError, ValueError("x"), None)
+
+    preparado = config_logger.ManejadorCola(config_logger.log_queue).prepare(registro)
+
+    assert preparado is registro
+    assert preparado.args == ("x",) and preparado.exc_info is not None
+
+
+def test_detener_escribe_todos_los_registros_pendientes(escritor):
+    """Al parar no se pierde nada de lo encolado, aunque registren varios hilos a la vez"""
+    log = get_logger("Test-Parada")
+
+    def registrar(hilo: int):
+        for i in range(500):
+            log.warning("Hilo %d registro %d", hilo, i)
+
+    hilos = [threading.Thread(target=registrar, args=(hilo,)) for hilo in range(4)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    config_logger.detener_logging()
+
+    mensajes = [registro["mensaje"] for registro in escritor.registros()]
+    assert len(mensajes) == 2000
+    assert set(mensajes) == {f"Hilo {hilo} registro {i}" for hilo in range(4) for i in range(500)}
+    assert config_logger.listener._thread is None
+    # Parar dos veces no falla y se puede volver a arrancar
+    config_logger.detener_logging()
+    config_logger.iniciar_logging()
+    log.warning("Tras reiniciar")
+    config_logger.detener_logging()
+    assert escritor.registros()[-1]["mensaje"] == "Tras reiniciar"
+
+
+def test_muestreo_de_mensajes_ok():
+    """1 de cada N mensajes "[OK]"; los demás mensajes y niveles pasan siempre"""
+    filtro = FiltroMuestreo(3)
+
+    def registro(nivel: int, mensaje: str) -> logging.LogRecord:
+        return logging.LogRecord("SyntexIA-CRM", nivel, __file__, 1, mensaje, None, None)
+
+    ok = [filtro.filter(registro(logging.INFO, f"[OK] Cliente creado: {i}")) for i in range(9)]
+    assert ok == [True, False, False] * 3
+    assert filtro.filter(registro(logging.INFO, "Otro mensaje"))
+    assert filtro.filter(registro(logging.WARNING, "[OK] con nivel WARNING"))
+    assert all(FiltroMuestreo(1).filter(registro(logging.INFO, "[OK] x")) for _ in range(5))
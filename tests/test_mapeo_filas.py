@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# =====================================================
+# 🧪 Tests del Mapeo de Filas a Modelos
+# =====================================================
+"""
+`MapeadorFilas` debe producir lo mismo que `model_validate` sobre la
+misma fila, tanto por el camino rápido como por el de validación.
+Ejecutar con: python -m pytest tests/test_mapeo_filas.py -v
+"""
+
+import json
+import sqlite3
+from datetime import datetime
+
+import pytest
+from pydantic import ValidationError
+
+from src.models.crm_models import (
+    ActividadSchema, Cliente, ClienteCreate, ClienteParcial, ContactoSchema, OportunidadSchema
+)
+from src.repositories.mapeo_filas import MapeadorFilas
+
+
+# =====================================================
+# FIXTURES
+# =====================================================
+
+@pytest.fixture
+def cliente_id(repo):
+    """Cliente con contactos, actividades y oportunidades (con y sin productos)"""
+    cliente = repo.crear_cliente(ClienteCreate(
+        nombre_completo="Mapeo Completo", email="mapeo@x.es", estado="activo",
+        credito_disponible=1500, contactos=[ContactoSchema(tipo="telefono", valor="600000000", principal=True)]
+    ))
+    repo.crear_actividad(cliente.id, ActividadSchema(
+        tipo="reunion", titulo="Demo", fecha=datetime(2025, 3, 1, 9, 30, 15, 123456), completada=True
+    ))
+    repo.crear_actividad(cliente.id, ActividadSchema(tipo="nota", titulo="Sin completar"))
+    repo.crear_oportunidad(cliente.id, OportunidadSchema(
+        titulo="Con productos", valor_estimado=12000.5, probabilidad_cierre=40,
+        fecha_cierre_esperada=datetime(2025, 6, 30), productos=["licencia", "soporte"]
+    ))
+    repo.crear_oportunidad(cliente.id, OportunidadSchema(
+        titulo="Sin productos", estado="propuesta", valor_estimado=300, probabilidad_cierre=10,
+        fecha_cierre_esperada=datetime(2025, 7, 1, 12, 0)
+    ))
+    return cliente.id
+
+
+@pytest.fixture
+def conn(repo):
+    with repo._pool.conexion() as conn:
+        yield conn
+
+
+def contar_validaciones(mapeador: MapeadorFilas, monkeypatch) -> list:
+    """Lista que recibe una entrada cada vez que el mapeador cae a `model_validate`"""
+    llamadas = []
+    original = mapeador._validar
+
+    def validar(*args):
+        llamadas.append(args)
+        return original(*args)
+
+    monkeypatch.setattr(mapeador, "_validar", validar)
+    return llamadas
+
+
+def assert_identicos(rapido, validado):
+    """Mismos valores y tipos campo a campo, mismos campos asignados y mismo JSON byte a byte"""
+    assert type(rapido) is type(validado)
+    for campo in type(validado).model_fields:
+        valor_rapido, valor_validado = getattr(rapido, campo), getattr(validado, campo)
+        assert valor_rapido == valor_validado, campo
+        assert type(valor_rapido) is type(valor_validado), campo
+    assert rapido.model_fields_set == validado.model_fields_set
+    assert rapido.model_dump_json().encode() == validado.model_dump_json().encode()
+    assert rapido.model_dump_json(exclude_unset=True) == validado.model_dump_json(exclude_unset=True)
+
+
+def fila(sql: str, params: tuple = ()) -> sqlite3.Row:
+    """Una fila de una base de datos en memoria, para valores que el repositorio nunca escribe"""
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    return conn.execute(sql, params).fetchone()
+
+
+# =====================================================
+# TESTS CAMINO RÁPIDO
+# =====================================================
+
+def test_cliente_igual_que_model_validate(repo, conn, cliente_id, monkeypatch):
+    """Cliente con relaciones: columnas de texto, Enum, float y fechas"""
+    mapeador = MapeadorFilas(Cliente)
+    validaciones = contar_validaciones(mapeador, monkeypatch)
+    row = conn.execute("SELECT * FROM clientes WHERE id = ?", (cliente_id,)).fetchone()
+    relaciones = repo._cargar_relaciones([cliente_id], conn.cursor(), limite_actividades=5)[cliente_id]
+
+    rapido = mapeador.uno(row, relaciones)
+
+    assert validaciones == []
+    assert_identicos(rapido, Cliente.model_validate({**dict(row), **relaciones}))
+    assert len(rapido.contactos) == 1 and len(rapido.oportunidades) == 2
+
+
+def test_relaciones_igual_que_model_validate(conn, cliente_id, monkeypatch):
+    """Contactos y actividades (0/1 -> bool, Enum, fechas con microsegundos) y oportunidades (JSON)"""
+    casos = [
+        (ContactoSchema, "SELECT * FROM contactos WHERE cliente_id = ?", {}),
+        (ActividadSchema, "SELECT * FROM actividades WHERE cliente_id = ? ORDER BY fecha", {}),
+        (OportunidadSchema, "SELECT * FROM oportunidades WHERE cliente_id = ? ORDER BY titulo", {"productos": json.loads}),
+    ]
+    for modelo, sql, decodificar in casos:
+        mapeador = MapeadorFilas(modelo)
+        validaciones = contar_validaciones(mapeador, monkeypatch)
+        rows = conn.execute(sql, (cliente_id,)).fetchall()
+
+        rapidos = mapeador.todos(rows)
+
+        assert validaciones == [], modelo.__name__
+        for row, rapido in zip(rows, rapidos):
+            datos = dict(row)
+            for columna, funcion in decodificar.items():
+                datos[columna] = funcion(datos[columna]) if datos[columna] is not None else None
+            assert_identicos(rapido, modelo.model_validate(datos))
+
+
+def test_columnas_json_y_fechas(conn, cliente_id):
+    """La lista JSON y las fechas llegan con su tipo, no como texto"""
+    rows = conn.execute("SELECT * FROM oportunidades WHERE cliente_id = ? ORDER BY titulo", (cliente_id,)).fetchall()
+    con_productos, sin_productos = MapeadorFilas(OportunidadSchema).todos(rows)
+
+    assert con_productos.productos == ["licencia", "soporte"]
+    assert sin_productos.productos is None
+    assert con_productos.fecha_cierre_esperada == datetime(2025, 6, 30)
+    assert isinstance(con_productos.fecha_creacion, datetime)
+
+    actividad = MapeadorFilas(ActividadSchema).uno(
+        conn.execute("SELECT * FROM actividades WHERE titulo = 'Demo'").fetchone()
+    )
+    assert actividad.fecha == datetime(2025, 3, 1, 9, 30, 15, 123456)
+    assert actividad.completada is True
+
+
+def test_proyeccion_y_columnas_desconocidas(conn, cliente_id, monkeypatch):
+    """Las columnas que no son campos (p. ej. `relevancia` de FTS) se ignoran como en `model_validate`"""
+    mapeador = MapeadorFilas(ClienteParcial)
+    validaciones = contar_validaciones(mapeador, monkeypatch)
+    row = conn.execute(
+        "SELECT id, email, estado, fecha_creacion, 0.5 AS relevancia FROM clientes WHERE id = ?", (cliente_id,)
+    ).fetchone()
+
+    assert_identicos(mapeador.uno(row), ClienteParcial.model_validate(dict(row)))
+    # `columnas` restringe lo leído aunque la fila traiga más
+    parcial = mapeador.uno(row, columnas=["id", "email"])
+    assert parcial.model_fields_set == {"id", "email"}
+    assert parcial.estado is None
+    assert validaciones == []
+
+
+# =====================================================
+# TESTS CAMINO DE VALIDACIÓN
+# =====================================================
+
+@pytest.mark.parametrize("sql, params", [
+    # Formatos que interpretan distinto `datetime.fromisoformat` y Pydantic
+    ("SELECT 'c1' AS id, 'Fecha compacta' AS nombre_completo, ? AS fecha_creacion, ? AS fecha_actualizacion",
+     ("20250101", "2025-01-01 10:00:00")),
+    ("SELECT 'c1' AS id, 'Fecha numérica' AS nombre_completo, ? AS fecha_creacion, ? AS fecha_actualizacion",
+     (1735725600, "2025-01-01T10:00:00Z")),
+    # Número guardado como texto en una columna REAL
+    ("SELECT 'c1' AS id, 'Texto' AS nombre_completo, '2025-01-01 10:00:00' AS fecha_creacion, "
+     "'2025-01-01 10:00:00' AS fecha_actualizacion, ' 2.5 ' AS credito_disponible", ()),
+])
+def test_valores_no_previstos_se_validan(sql, params, monkeypatch):
+    """Con valores que el repositorio no escribe el resultado es el de `model_validate`"""
+    mapeador = MapeadorFilas(Cliente)
+    validaciones = contar_validaciones(mapeador, monkeypatch)
+    row = fila(sql, params)
+
+    assert_identicos(mapeador.uno(row), Cliente.model_validate(dict(row)))
+    assert len(validaciones) == 1
+
+
+def test_booleano_en_texto_se_valida(monkeypatch):
+    """'false' es False para Pydantic (bool('false') sería True)"""
+    mapeador = MapeadorFilas(ContactoSchema)
+    validaciones = contar_validaciones(mapeador, monkeypatch)
+    row = fila("SELECT 'cont_1' AS id, 'email' AS tipo, 'a@x.es' AS valor, 'false' AS principal, 1 AS verificado")
+
+    contacto = mapeador.uno(row)
+
+    assert contacto.principal is False and contacto.verificado is True
+    assert_identicos(contacto, ContactoSchema.model_validate(dict(row)))
+    assert len(validaciones) == 1
+
+
+@pytest.mark.parametrize("sql", [
+    # NULL en un campo obligatorio
+    "SELECT 'c1' AS id, NULL AS nombre_completo, '2025-01-01 10:00:00' AS fecha_creacion, "
+    "'2025-01-01 10:00:00' AS fecha_actualizacion",
+    # Valor de Enum desconocido
+    "SELECT 'c1' AS id, 'Estado raro' AS nombre_completo, 'borrado' AS estado, "
+    "'2025-01-01 10:00:00' AS fecha_creacion, '2025-01-01 10:00:00' AS fecha_actualizacion",
+    # Falta una columna obligatoria
+    "SELECT 'c1' AS id, 'Sin fechas' AS nombre_completo",
+])
+def test_filas_invalidas_dan_el_mismo_error(sql):
+    row = fila(sql)
+
+    with pytest.raises(ValidationError) as rapido:
+        MapeadorFilas(Cliente).uno(row)
+    with pytest.raises(ValidationError) as validado:
+        Cliente.model_validate(dict(row))
+
+    assert rapido.value.errors() == validado.value.errors()
+
+
+def test_validacion_decodifica_columnas_json(monkeypatch):
+    """Si la fila cae a `model_validate` por otro campo, la lista JSON se sigue decodificando"""
+    mapeador = MapeadorFilas(OportunidadSchema)
+    validaciones = contar_validaciones(mapeador, monkeypatch)
+    row = fila(
+        "SELECT 'op_1' AS id, 'Fecha con zona' AS titulo, 100.0 AS valor_estimado, 10.0 AS probabilidad_cierre, "
+        "'2025-01-01T00:00:00Z' AS fecha_cierre_esperada, '[\"licencia\"]' AS productos"
+    )
+
+    oportunidad = mapeador.uno(row)
+
+    assert len(validaciones) == 1
+    assert oportunidad.productos == ["licencia"]
+    assert oportunidad.fecha_cierre_esperada.tzinfo is not None
+
+
+def test_json_que_no_es_lista_de_textos_se_valida():
+    """Una lista JSON con elementos de otro tipo da el mismo error que `model_validate`"""
+    row = fila(
+        "SELECT 'op_1' AS id, 'JSON raro' AS titulo, 100.0 AS valor_estimado, 10.0 AS probabilidad_cierre, "
+        "'2025-01-01 00:00:00' AS fecha_cierre_esperada, '[1, 2]' AS productos"
+    )
+
+    with pytest.raises(ValidationError) as rapido:
+        MapeadorFilas(OportunidadSchema).uno(row)
+    with pytest.raises(ValidationError) as validado:
+        OportunidadSchema.model_validate({**dict(row), "productos": json.loads(row["productos"])})
+
+    assert rapido.value.errors() == validado.value.errors()
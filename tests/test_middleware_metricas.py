@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# =====================================================
+# 🧪 Tests del Middleware de Métricas HTTP
+# =====================================================
+"""
+Etiquetas de las métricas HTTP: el número de series no depende de lo
+que envíe el cliente.
+Ejecutar con: python -m pytest tests/test_middleware_metricas.py -v
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.interface.middleware_metricas import (
+    METODO_OTRO, RUTA_DESCONOCIDA, MiddlewareMetricas, en_vuelo_http, peticiones_http
+)
+
+
+@pytest.fixture
+def cliente_http():
+    """App mínima con el middleware de métricas"""
+    app = FastAPI()
+
+    @app.api_route("/clientes/{cliente_id}", methods=["GET", "PATCH"])
+    def cliente(cliente_id: str):
+        return {"id": cliente_id}
+
+    app.add_middleware(MiddlewareMetricas)
+    return TestClient(app)
+
+
+def series(metrica) -> set:
+    """Combinaciones de etiquetas registradas"""
+    return set(metrica._valores)
+
+
+def test_rutas_y_metodos_de_la_plantilla(cliente_http):
+    antes = peticiones_http._valores.get(("PATCH", "/clientes/{cliente_id}", 200), 0)
+
+    for i in range(3):
+        assert cliente_http.patch(f"/clientes/cli_{i}").status_code == 200
+
+    assert peticiones_http._valores[("PATCH", "/clientes/{cliente_id}", 200)] == antes + 3
+
+
+def test_metodos_desconocidos_se_agrupan(cliente_http):
+    """Verbos inventados no crean series nuevas: cuentan como OTHER"""
+    for metodo in ("FOO", "BAR", "get", "X" * 200):
+        cliente_http.request(metodo, "/clientes/cli_1")
+        cliente_http.request(metodo, "/no/existe")
+
+    metodos = {clave[0] for clave in series(peticiones_http) | series(en_vuelo_http)}
+    assert metodos <= {"GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS", METODO_OTRO}
+    assert (METODO_OTRO, "/clientes/{cliente_id}", 405) in series(peticiones_http)
+    assert (METODO_OTRO, RUTA_DESCONOCIDA, 404) in series(peticiones_http)
+    assert en_vuelo_http._valores[(METODO_OTRO,)] == 0
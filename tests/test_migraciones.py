@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# =====================================================
+# 🧪 Tests de Migraciones e Índices
+# =====================================================
+"""
+Migraciones de esquema y planes de consulta del repositorio.
+No necesitan el servidor: usan una base de datos temporal.
+Ejecutar con: python -m pytest tests/test_migraciones.py -v
+"""
+
+import sqlite3
+
+import pytest
+
+from src.repositories.crm_repository import CRMRepository, VERSION_GLOBAL
+from src.repositories.migraciones import version_esquema
+
+
+# =====================================================
+# FIXTURES
+# =====================================================
+
+@pytest.fixture
+def conn(repo):
+    with repo._pool.conexion() as conn:
+        yield conn
+
+
+def plan(conn: sqlite3.Connection, sql: str, params: tuple = ()) -> list:
+    """Detalle de cada paso de EXPLAIN QUERY PLAN"""
+    return [row["detail"] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def assert_sin_scan(pasos: list, tabla: str):
+    """La tabla se lee por índice, nunca recorriéndola entera"""
+    for paso in pasos:
+        assert not (paso.startswith(f"SCAN {tabla}") and "INDEX" not in paso), pasos
+    assert any(tabla in paso and "INDEX" in paso for paso in pasos), pasos
+
+
+# =====================================================
+# TESTS MIGRACIONES
+# =====================================================
+
+def test_base_nueva_en_ultima_version(repo, conn):
+    """Una base de datos nueva queda en la última versión"""
+    assert version_esquema(conn) == len(repo._migraciones())
+
+
+def test_migraciones_no_se_repiten(tmp_path):
+    """Reabrir la base de datos no vuelve a aplicar migraciones"""
+    db_path = str(tmp_path / "crm_test.db")
+    CRMRepository(db_path=db_path, pool_size=1).cerrar()
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("DROP INDEX idx_contactos_cliente")
+    conn.commit()
+    conn.close()
+
+    repo = CRMRepository(db_path=db_path, pool_size=1)
+    with repo._pool.conexion() as conn:
+        indices = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    repo.cerrar()
+
+    assert "idx_contactos_cliente" not in indices
+
+
+def test_base_anterior_a_migraciones(tmp_path):
+    """Una base de datos en versión 0 con datos se migra y conserva los datos"""
+    db_path = str(tmp_path / "crm_test.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+    CREATE TABLE clientes (
+        id TEXT PRIMARY KEY, nombre_completo TEXT NOT NULL, razon_social TEXT, tipo_cliente TEXT,
+        email TEXT UNIQUE, cif_nif TEXT UNIQUE, estado TEXT DEFAULT 'prospecto', segmento TEXT,
+        sector_industria TEXT, website TEXT, notas TEXT, credito_disponible REAL DEFAULT 0,
+        total_facturado REAL DEFAULT 0, numero_facturas INTEGER DEFAULT 0, promedio_venta REAL DEFAULT 0,
+        tasa_pagos_a_tiempo REAL, dias_desde_ultimo_contacto INTEGER,
+        fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP, fecha_actualizacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    conn.execute("CREATE INDEX idx_cliente_email ON clientes(email)")
+    conn.execute(
+        "INSERT INTO clientes (id, nombre_completo, tipo_cliente, email, estado) "
+        "VALUES ('cli_1', 'Ana', 'empresa', 'ana@x.es', 'activo')"
+    )
+    conn.commit()
+    conn.close()
+
+    repo = CRMRepository(db_path=db_path, pool_size=1)
+    try:
+        assert repo.obtener_cliente_por_email("ANA@x.es").id == "cli_1"
+        assert repo.obtener_resumen_crm().clientes_activos == 1
+        clientes, _, _ = repo.listar_clientes(buscar="ana")
+        assert [cliente.id for cliente in clientes] == ["cli_1"]
+    finally:
+        repo.cerrar()
+
+
+# =====================================================
+# TESTS PLANES DE CONSULTA
+# =====================================================
+
+def test_plan_contactos_por_cliente(conn):
+    assert_sin_scan(plan(conn, "SELECT * FROM contactos WHERE cliente_id = ?", ("cli_1",)), "contactos")
+
+
+def test_plan_actividades_recientes(conn):
+    """Filtra por cliente y sale ordenado por fecha del índice (sin ordenar aparte)"""
+    pasos = plan(
+        conn,
+        "SELECT * FROM actividades WHERE cliente_id = ? ORDER BY fecha DESC LIMIT ?",
+        ("cli_1", 10)
+    )
+    assert_sin_scan(pasos, "actividades")
+    assert any("idx_actividades_cliente_fecha" in paso for paso in pasos), pasos
+    assert not any("TEMP B-TREE" in paso for paso in pasos), pasos
+
+
+def test_plan_historial_actividades(conn):
+    """Página del historial por (fecha, id): sale ordenada del índice (sin ordenar aparte)"""
+    pasos = plan(
+        conn,
+        "SELECT * FROM actividades WHERE cliente_id = ? AND tipo IN (?, ?) AND (fecha, id) < (?, ?) "
+        "ORDER BY fecha DESC, id DESC LIMIT ?",
+        ("cli_1", "llamada", "email", "2025-01-01", "act_1", 51)
+    )
+    assert any("idx_actividades_cliente_fecha" in paso for paso in pasos), pasos
+    assert not any("TEMP B-TREE" in paso for paso in pasos), pasos
+
+
+def test_plan_oportunidades_abiertas(conn):
+    pasos = plan(
+        conn,
+        "SELECT * FROM oportunidades WHERE cliente_id = ? AND estado != 'ganada' AND estado != 'perdida'",
+        ("cli_1",)
+    )
+    assert_sin_scan(pasos, "oportunidades")
+
+
+def test_plan_relaciones_por_lote(conn):
+    """Consultas de `_cargar_relaciones` (IN sobre varios clientes)"""
+    ids = ("cli_1", "cli_2", "cli_3")
+    assert_sin_scan(plan(conn, "SELECT * FROM contactos WHERE cliente_id IN (?, ?, ?)", ids), "contactos")
+    assert_sin_scan(plan(conn, """
+        SELECT * FROM (
+            SELECT *, ROW_NUMBER() OVER (PARTITION BY cliente_id ORDER BY fecha DESC) AS posicion
+            FROM actividades WHERE cliente_id IN (?, ?, ?)
+        ) WHERE posicion <= 3
+    """, ids), "actividades")
+    assert_sin_scan(plan(
+        conn,
+        "SELECT * FROM oportunidades WHERE cliente_id IN (?, ?, ?) AND estado != 'ganada' AND estado != 'perdida'",
+        ids
+    ), "oportunidades")
+
+
+def test_plan_busquedas_exactas(conn):
+    assert_sin_scan(plan(conn, "SELECT * FROM clientes WHERE email = ? COLLATE NOCASE LIMIT 1", ("a@b.es",)), "clientes")
+    assert_sin_scan(plan(conn, "SELECT * FROM clientes WHERE cif_nif = ? COLLATE NOCASE LIMIT 1", ("B1",)), "clientes")
+
+
+def test_plan_listado_por_cursor(conn):
+    pasos = plan(
+        conn,
+        "SELECT * FROM clientes WHERE (fecha_actualizacion, id) < (?, ?) "
+        "ORDER BY fecha_actualizacion DESC, id DESC LIMIT ?",
+        ("2024-01-01", "cli_1", 51)
+    )
+    assert any("idx_cliente_actualizacion" in paso for paso in pasos), pasos
+    assert not any("TEMP B-TREE" in paso for paso in pasos), pasos
+
+
+def test_plan_oportunidades_por_cursor(conn):
+    """Listado global de oportunidades: sale ordenado del índice por (fecha de cierre, id)"""
+    pasos = plan(
+        conn,
+        "SELECT o.* FROM oportunidades o WHERE (o.fecha_cierre_esperada, o.id) > (?, ?) "
+        "ORDER BY o.fecha_cierre_esperada, o.id LIMIT ?",
+        ("2025-01-01", "opp_1", 51)
+    )
+    assert any("idx_oportunidades_cierre" in paso for paso in pasos), pasos
+    assert not any("TEMP B-TREE" in paso for paso in pasos), pasos
+
+
+def test_plan_pipeline_por_estado(conn):
+    """Los agregados por estado se calculan sin leer la tabla"""
+    pasos = plan(
+        conn,
+        "SELECT o.estado, COUNT(*), SUM(o.valor_estimado), SUM(o.valor_estimado * o.probabilidad_cierre) "
+        "FROM oportunidades o GROUP BY o.estado"
+    )
+    assert any("COVERING INDEX idx_oportunidades_estado_cierre" in paso for paso in pasos), pasos
+    assert not any("TEMP B-TREE" in paso for paso in pasos), pasos
+
+
+def test_plan_estadisticas_cliente(conn):
+    pasos = plan(conn, """
+        SELECT c.id, e.actividades
+        FROM clientes c LEFT JOIN estadisticas_clientes e ON e.cliente_id = c.id
+        WHERE c.id IN (?, ?)
+    """, ("cli_1", "cli_2"))
+    assert_sin_scan(pasos, "c")
+    assert_sin_scan(pasos, "e")
+
+
+def test_plan_etag_cliente(conn):
+    pasos = plan(conn, """
+        SELECT c.fecha_actualizacion, COALESCE(v.version, 0)
+        FROM clientes c LEFT JOIN versiones_clientes v ON v.cliente_id = c.id
+        WHERE c.id = ?
+    """, ("cli_1",))
+    assert_sin_scan(pasos, "c")
+    assert_sin_scan(pasos, "v")
+
+
+def test_plan_version_global(conn):
+    pasos = plan(conn, "SELECT version FROM versiones_clientes WHERE cliente_id = ?", (VERSION_GLOBAL,))
+    assert_sin_scan(pasos, "versiones_clientes")
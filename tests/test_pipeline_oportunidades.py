@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# =====================================================
+# 🧪 Tests del Pipeline de Oportunidades
+# =====================================================
+"""
+Listado global de oportunidades y agregados del pipeline sobre una
+base de datos temporal.
+Ejecutar con: python -m pytest tests/test_pipeline_oportunidades.py -v
+"""
+
+from datetime import datetime
+
+import pytest
+
+from src.models.crm_models import ClienteCreate, OportunidadSchema
+
+
+def crear_oportunidades(repo, cliente_id: str, datos: list):
+    for titulo, estado, valor, probabilidad, fecha in datos:
+        repo.crear_oportunidad(cliente_id, OportunidadSchema(
+            titulo=titulo, estado=estado, valor_estimado=valor,
+            probabilidad_cierre=probabilidad, fecha_cierre_esperada=fecha
+        ))
+
+
+def test_listado_paginado_y_filtrado(repo):
+    """El cursor recorre todas las oportunidades en orden de cierre; los filtros se combinan"""
+    pyme = repo.crear_cliente(ClienteCreate(nombre_completo="Pyme", segmento="pyme"))
+    grande = repo.crear_cliente(ClienteCreate(nombre_completo="Grande", segmento="corporativo"))
+    crear_oportunidades(repo, pyme.id, [
+        (f"P{i}", "propuesta", 1000 * i, 50, datetime(2025, 1 + i % 3, 10)) for i in range(7)
+    ])
+    crear_oportunidades(repo, grande.id, [("G1", "ganada", 90000, 100, datetime(2025, 2, 1))])
+
+    vistas, cursor = [], None
+    while True:
+        pagina, cursor = repo.listar_oportunidades(limit=3, cursor_pagina=cursor)
+        vistas.extend(pagina)
+        if cursor is None:
+            break
+    assert len(vistas) == 8
+    assert [o.fecha_cierre_esperada for o in vistas] == sorted(o.fecha_cierre_esperada for o in vistas)
+
+    filtradas, _ = repo.listar_oportunidades(
+        segmento="pyme", valor_minimo=2000,
+        cierre_desde=datetime(2025, 2, 1), cierre_hasta=datetime(2025, 3, 1)
+    )
+    assert sorted(o.titulo for o in filtradas) == ["P4"]
+    assert all(o.cliente_id == pyme.id for o in filtradas)
+
+    with pytest.raises(ValueError):
+        repo.listar_oportunidades(estados=["desconocido"])
+
+
+def test_pipeline_agrega_y_se_renueva_tras_escribir(repo):
+    """Totales por estado y por mes; una escritura invalida el resultado en caché"""
+    cliente = repo.crear_cliente(ClienteCreate(nombre_completo="Cliente Pipeline"))
+    crear_oportunidades(repo, cliente.id, [
+        ("A", "propuesta", 1000, 50, datetime(2025, 1, 15)),
+        ("B", "propuesta", 3000, 10, datetime(2025, 2, 15)),
+        ("C", "ganada", 2000, 100, datetime(2025, 2, 20)),
+    ])
+
+    pipeline = repo.pipeline_oportunidades()
+    assert (pipeline.oportunidades, pipeline.valor_total, pipeline.valor_ponderado) == (3, 6000, 2800)
+    assert [(g.grupo, g.oportunidades, g.valor_total) for g in pipeline.por_estado] == [
+        ("propuesta", 2, 4000), ("ganada", 1, 2000)
+    ]
+    assert [(g.grupo, g.oportunidades) for g in pipeline.por_mes] == [("2025-01", 1), ("2025-02", 2)]
+    assert repo.pipeline_oportunidades() is pipeline
+
+    crear_oportunidades(repo, cliente.id, [("D", "inicial", 500, 0, datetime(2025, 3, 1))])
+    assert repo.pipeline_oportunidades().oportunidades == 4
+    assert repo.pipeline_oportunidades(estados=["propuesta"]).valor_total == 4000
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# =====================================================
+# 🧪 Tests de la Carga de Relaciones de Clientes
+# =====================================================
+"""
+`listar_clientes` carga contactos, actividades recientes y oportunidades
+abiertas de toda la página a la vez; cada cliente debe recibir las suyas,
+igual que con las consultas por cliente, sobre una base de datos temporal.
+Ejecutar con: python -m pytest tests/test_relaciones_clientes.py -v
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.models.crm_models import ActividadSchema, ClienteCreate, ContactoSchema, OportunidadSchema
+from src.repositories.trazas_sql import TrazadorSQL, iniciar_traza, finalizar_traza
+
+TOTAL_CLIENTES = 12
+ESTADOS_OPORTUNIDAD = ("inicial", "ganada", "propuesta", "perdida", "negociacion")
+
+
+@pytest.fixture
+def repo(crear_repo):
+    return crear_repo(trazador=TrazadorSQL(trazas_peticion=True))
+
+
+@pytest.fixture
+def clientes(repo) -> dict:
+    """Clientes con 0-2 contactos, 0-4 actividades y oportunidades abiertas y cerradas"""
+    base = datetime(2025, 1, 1, 9, 0)
+    creados = {}
+    for i in range(TOTAL_CLIENTES):
+        cliente = repo.crear_cliente(ClienteCreate(
+            nombre_completo=f"Cliente {i:02d}",
+            contactos=[ContactoSchema(tipo="telefono", valor=f"6000000{i:02d}{j}") for j in range(i % 3)]
+        ))
+        for j in range(i % 5):
+            repo.crear_actividad(cliente.id, ActividadSchema(
+                tipo="llamada", titulo=f"Actividad {i}-{j}", fecha=base + timedelta(days=j, hours=i)
+            ))
+        for j in range(i % 4):
+            repo.crear_oportunidad(cliente.id, OportunidadSchema(
+                titulo=f"Oportunidad {i}-{j}", estado=ESTADOS_OPORTUNIDAD[(i + j) % 5],
+                valor_estimado=100 * (j + 1), probabilidad_cierre=50, fecha_cierre_esperada=base
+            ))
+        creados[cliente.id] = i
+    return creados
+
+
+def sentencias_por_tabla(sentencias: list) -> dict:
+    return {
+        tabla: sum(1 for s in sentencias if f"FROM {tabla} WHERE cliente_id IN" in s["sql"])
+        for tabla in ("contactos", "actividades", "oportunidades")
+    }
+
+
+def listar_trazado(repo, **opciones) -> tuple:
+    sentencias = iniciar_traza()
+    try:
+        pagina, _, _ = repo.listar_clientes(limit=50, **opciones)
+    finally:
+        finalizar_traza()
+    return pagina, sentencias
+
+
+def assert_relaciones_propias(repo, pagina: list, clientes: dict):
+    """Mismas relaciones que las consultas de un solo cliente"""
+    assert {cliente.id for cliente in pagina} == set(clientes)
+    for cliente in pagina:
+        i = clientes[cliente.id]
+        assert {c.id for c in cliente.contactos} == {c.id for c in repo._obtener_contactos(cliente.id)}
+        assert len(cliente.contactos) == i % 3
+
+        # Las 3 más recientes, de la más nueva a la más antigua
+        assert cliente.actividades_recientes == repo._obtener_actividades(cliente.id, limit=3)
+        assert len(cliente.actividades_recientes) == min(i % 5, 3)
+        assert all(a.titulo.startswith(f"Actividad {i}-") for a in cliente.actividades_recientes)
+
+        abiertas = {o.id for o in repo._obtener_oportunidades(cliente.id)}
+        assert {o.id for o in cliente.oportunidades} == abiertas
+        assert all(o.estado.value not in ("ganada", "perdida") for o in cliente.oportunidades)
+        assert all(o.titulo.startswith(f"Oportunidad {i}-") for o in cliente.oportunidades)
+
+
+def test_cada_cliente_recibe_sus_relaciones(repo, clientes):
+    pagina, sentencias = listar_trazado(repo)
+
+    assert_relaciones_propias(repo, pagina, clientes)
+    # Una consulta por tabla para toda la página, no una por cliente
+    assert sentencias_por_tabla(sentencias) == {"contactos": 1, "actividades": 1, "oportunidades": 1}
+
+
+def test_ids_repartidos_en_varios_lotes(repo, clientes, monkeypatch):
+    """Con más ids que `TAMANO_LOTE_IN` se consulta por lotes y el resultado es el mismo"""
+    monkeypatch.setattr(type(repo), "TAMANO_LOTE_IN", 5)
+
+    pagina, sentencias = listar_trazado(repo)
+
+    assert_relaciones_propias(repo, pagina, clientes)
+    assert sentencias_por_tabla(sentencias) == {"contactos": 3, "actividades": 3, "oportunidades": 3}
+
+
+def test_solo_se_consultan_las_relaciones_pedidas(repo, clientes):
+    pagina, sentencias = listar_trazado(repo, campos=["nombre_completo"], expandir=["contactos"])
+
+    assert sentencias_por_tabla(sentencias) == {"contactos": 1, "actividades": 0, "oportunidades": 0}
+    for cliente in pagina:
+        assert cliente.model_fields_set == {"id", "nombre_completo", "contactos"}
+        assert len(cliente.contactos) == clientes[cliente.id] % 3
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# =====================================================
+# 🧪 Tests del Repositorio Asíncrono
+# =====================================================
+"""
+`AsyncCRMRepository` ejecuta las operaciones síncronas en su executor,
+con un máximo de operaciones en vuelo, sobre una base de datos temporal.
+Ejecutar con: python -m pytest tests/test_repositorio_async.py -v
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.models.crm_models import ActividadSchema, ClienteCreate
+from src.repositories.async_crm_repository import AsyncCRMRepository
+from src.repositories.cola_actividades import ColaActividades
+from src.repositories.trazas_sql import TrazadorSQL, iniciar_traza, finalizar_traza
+
+
+@pytest.fixture
+def repo(crear_repo):
+    return crear_repo(trazador=TrazadorSQL(trazas_peticion=True))
+
+
+@pytest.fixture
+def fachada(repo):
+    fachada = AsyncCRMRepository(repo, max_en_vuelo=2)
+    yield fachada
+    fachada.cerrar()
+
+
+def test_resultados_iguales_que_el_repositorio_sincrono(repo, fachada, monkeypatch):
+    """Las operaciones devuelven lo mismo que las síncronas y se ejecutan en los hilos del executor"""
+    hilos = []
+    original = repo.listar_clientes
+
+    def listar(*args, **kwargs):
+        hilos.append(threading.current_thread().name)
+        return original(*args, **kwargs)
+
+    async def escenario():
+        creado = await fachada.crear_cliente(ClienteCreate(nombre_completo="Cliente Async", email="async@x.es"))
+        leido = await fachada.obtener_cliente(creado.id)
+        por_email = await fachada.obtener_cliente_por_email("ASYNC@x.es")
+        pagina = await fachada.listar_clientes(limit=10)
+        return creado, leido, por_email, pagina
+
+    monkeypatch.setattr(repo, "listar_clientes", listar)
+    creado, leido, por_email, pagina = asyncio.run(escenario())
+
+    assert leido == por_email == repo.obtener_cliente(creado.id)
+    assert pagina == original(limit=10)
+    assert hilos and all(nombre.startswith("crm-db") for nombre in hilos)
+
+
+def test_excepciones_llegan_al_llamador(fachada):
+    async def escenario():
+        await fachada.crear_cliente(ClienteCreate(nombre_completo="Uno", email="dup@x.es"))
+        await fachada.crear_cliente(ClienteCreate(nombre_completo="Dos", email="dup@x.es"))
+
+    with pytest.raises(ValueError):
+        asyncio.run(escenario())
+
+
+def test_operaciones_en_vuelo_acotadas_sin_bloquear_el_loop(fachada):
+    """Con `max_en_vuelo=2` nunca hay más de dos a la vez y el event loop sigue atendiendo"""
+    en_vuelo, maximo = 0, 0
+    lock = threading.Lock()
+
+    def operacion_lenta():
+        nonlocal en_vuelo, maximo
+        with lock:
+            en_vuelo += 1
+            maximo = max(maximo, en_vuelo)
+        time.sleep(0.03)
+        with lock:
+            en_vuelo -= 1
+
+    async def escenario():
+        latidos = 0
+
+        async def latir():
+            nonlocal latidos
+            while True:
+                latidos += 1
+                await asyncio.sleep(0.005)
+
+        latido = asyncio.create_task(latir())
+        await asyncio.gather(*(fachada._ejecutar(operacion_lenta) for _ in range(6)))
+        latido.cancel()
+        return latidos
+
+    inicio = time.perf_counter()
+    latidos = asyncio.run(escenario())
+
+    assert maximo == 2
+    # Tres tandas de dos operaciones de 30 ms
+    assert time.perf_counter() - inicio >= 0.09
+    assert latidos >= 5
+
+
+def test_traza_de_la_peticion_llega_al_executor(repo, fachada):
+    """El contexto (traza SQL) se copia al hilo que ejecuta la operación"""
+    async def escenario():
+        sentencias = iniciar_traza()
+        try:
+            await fachada.listar_clientes(limit=5)
+        finally:
+            finalizar_traza()
+        return sentencias
+
+    sentencias = asyncio.run(escenario())
+
+    assert any(s["sql"].startswith("SELECT * FROM clientes") for s in sentencias)
+
+
+def test_exportar_lee_todos_los_lotes(repo, fachada):
+    creados, _ = repo.importar_clientes([ClienteCreate(nombre_completo=f"Export {i}") for i in range(2500)])
+
+    async def escenario():
+        columnas, lotes = await fachada.exportar("clientes")
+        tamanos = [len(lote) async for lote in lotes]
+        return columnas, tamanos
+
+    columnas, tamanos = asyncio.run(escenario())
+
+    assert "nombre_completo" in columnas
+    assert tamanos == [1000, 1000, 500] and creados == 2500
+
+
+def test_crear_actividad_por_la_cola(repo):
+    """Con cola: sin esperar se devuelve al encolar; esperando, tras el commit"""
+    cliente = repo.crear_cliente(ClienteCreate(nombre_completo="Cliente Cola Async"))
+    fachada = AsyncCRMRepository(repo, cola_actividades=ColaActividades(repo, max_espera_ms=1))
+
+    async def escenario():
+        encolada = await fachada.crear_actividad(
+            cliente.id, ActividadSchema(tipo="nota", titulo="Sin esperar"), esperar_commit=False
+        )
+        confirmada = await fachada.crear_actividad(cliente.id, ActividadSchema(tipo="nota", titulo="Esperando"))
+        inexistente = await fachada.crear_actividad("cli_no_existe", ActividadSchema(tipo="nota", titulo="X"))
+        return encolada, confirmada, inexistente
+
+    try:
+        encolada, confirmada, inexistente = asyncio.run(escenario())
+        titulos = {actividad.titulo for actividad in repo._obtener_actividades(cliente.id)}
+    finally:
+        fachada.cerrar()
+
+    assert encolada.id and encolada.titulo == "Sin esperar"
+    assert confirmada.id and inexistente is None
+    # La no esperada se escribió en el mismo lote o antes que la esperada
+    assert titulos == {"Sin esperar", "Esperando"}
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# =====================================================
+# 🧪 Tests de las Respuestas de Creación
+# =====================================================
+"""
+Las altas devuelven la entidad construida con lo insertado, sin releerla;
+debe ser igual a la que devuelve una lectura posterior desde otro
+repositorio (sin caché compartida) sobre la misma base de datos temporal.
+Ejecutar con: python -m pytest tests/test_respuestas_creacion.py -v
+"""
+
+from datetime import datetime
+
+import pytest
+
+from src.models.crm_models import ActividadSchema, ClienteCreate, ContactoSchema, OportunidadSchema
+
+
+@pytest.fixture
+def lector(crear_repo):
+    """Otro repositorio sobre la misma base de datos: sus lecturas no pasan por la caché del que escribe"""
+    return crear_repo()
+
+
+def por_id(modelos: list, modelo_id: str):
+    return next(modelo for modelo in modelos if modelo.id == modelo_id)
+
+
+@pytest.mark.parametrize("datos", [
+    {"nombre_completo": "Solo Nombre"},
+    {
+        "nombre_completo": "Cliente Completo", "razon_social": "Completo SL", "tipo_cliente": "persona",
+        "email": "completo@x.es", "cif_nif": "B00000000", "estado": "activo", "segmento": "pyme",
+        "sector_industria": "retail", "website": "https://completo.es", "notas": "Notas — ñ",
+        "credito_disponible": 1500.25,
+        "contactos": [
+            {"tipo": "email", "valor": "otro@x.es", "principal": True, "verificado": True},
+            {"tipo": "movil", "valor": "600000000"},
+        ],
+    },
+])
+def test_crear_cliente_igual_que_releerlo(repo, lector, datos):
+    creado = repo.crear_cliente(ClienteCreate(**datos))
+
+    leido = lector.obtener_cliente(creado.id)
+
+    assert creado.model_dump(exclude={"contactos"}) == leido.model_dump(exclude={"contactos"})
+    assert sorted(creado.contactos, key=lambda c: c.id) == sorted(leido.contactos, key=lambda c: c.id)
+    assert creado.model_dump_json(exclude={"contactos"}) == leido.model_dump_json(exclude={"contactos"})
+
+
+def test_crear_contacto_igual_que_releerlo(repo, lector):
+    cliente = repo.crear_cliente(ClienteCreate(nombre_completo="Cliente Contacto"))
+    contacto = ContactoSchema(tipo="direccion", valor="Calle Mayor 1", principal=True)
+
+    creado = repo.crear_contacto(cliente.id, contacto)
+
+    assert creado == por_id(lector._obtener_contactos(cliente.id), creado.id)
+    assert contacto.id is None
+    assert repo.crear_contacto("cli_no_existe", contacto) is None
+
+
+def test_crear_actividad_igual_que_releerla(repo, lector):
+    cliente = repo.crear_cliente(ClienteCreate(nombre_completo="Cliente Actividad"))
+    actividad = ActividadSchema(
+        tipo="reunion", titulo="Demo", descripcion="Producto", fecha=datetime(2025, 3, 1, 9, 30, 15, 123456),
+        completada=True, responsable="Ana", notas="Llevar portátil"
+    )
+
+    creada = repo.crear_actividad(cliente.id, actividad)
+    en_lote = repo.crear_actividades_lote([(cliente.id, ActividadSchema(tipo="nota", titulo="En lote"))])[0]
+
+    leidas = lector._obtener_actividades(cliente.id)
+    assert creada == por_id(leidas, creada.id)
+    assert en_lote == por_id(leidas, en_lote.id)
+    # El modelo del llamador no se modifica
+    assert actividad.id is None
+    assert repo.crear_actividad("cli_no_existe", actividad) is None
+
+
+def test_crear_oportunidad_igual_que_releerla(repo, lector):
+    cliente = repo.crear_cliente(ClienteCreate(nombre_completo="Cliente Oportunidad"))
+    oportunidad = OportunidadSchema(
+        titulo="Licencias", descripcion="Renovación", estado="propuesta", valor_estimado=12000.5,
+        probabilidad_cierre=33.5, fecha_cierre_esperada=datetime(2030, 6, 30, 12, 0),
+        productos=["licencia", "soporte"], notas="Urgente"
+    )
+
+    creada = repo.crear_oportunidad(cliente.id, oportunidad)
+
+    assert creada == por_id(lector._obtener_oportunidades(cliente.id), creada.id)
+    assert creada.fecha_creacion == creada.fecha_actualizacion
+    assert oportunidad.id is None and oportunidad.fecha_creacion is None
+    assert repo.crear_oportunidad("cli_no_existe", oportunidad) is None
+
+
+def test_cliente_tras_crear_relaciones(repo, lector):
+    """Tras añadir relaciones, la lectura del que escribe (caché invalidada) es la de otro repositorio"""
+    cliente = repo.crear_cliente(ClienteCreate(nombre_completo="Cliente Relaciones"))
+    repo.obtener_cliente(cliente.id)
+
+    repo.crear_contacto(cliente.id, ContactoSchema(tipo="email", valor="rel@x.es"))
+    repo.crear_actividad(cliente.id, ActividadSchema(tipo="llamada", titulo="Seguimiento"))
+    repo.crear_oportunidad(cliente.id, OportunidadSchema(
+        titulo="Abierta", valor_estimado=100, probabilidad_cierre=10, fecha_cierre_esperada=datetime(2030, 1, 1)
+    ))
+
+    assert repo.obtener_cliente(cliente.id) == lector.obtener_cliente(cliente.id)
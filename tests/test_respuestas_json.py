@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# =====================================================
+# 🧪 Tests de las Respuestas JSON
+# =====================================================
+"""
+`RespuestaJSON` debe producir el mismo JSON que `JSONResponse` tras
+`jsonable_encoder` (el camino por defecto de FastAPI), con los modelos
+que devuelve el repositorio sobre una base de datos temporal.
+Ejecutar con: python -m pytest tests/test_respuestas_json.py -v
+"""
+
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from src.interface.respuestas import RespuestaJSON, respuesta_json
+from src.models.crm_models import (
+    ActividadSchema, ClienteCreate, ContactoSchema, OportunidadSchema
+)
+
+
+def cuerpo_anterior(contenido) -> bytes:
+    """Lo que devolvía FastAPI sin `RespuestaJSON`"""
+    return JSONResponse(jsonable_encoder(contenido)).body
+
+
+@pytest.fixture
+def cliente_id(repo):
+    """Cliente con relaciones, fechas con microsegundos, Enum, textos no ASCII y floats"""
+    cliente = repo.crear_cliente(ClienteCreate(
+        nombre_completo="Íñigo Muñoz — «Comillas» \"dobles\" \\ barra", email="inigo@x.es", estado="activo",
+        credito_disponible=0.1 + 0.2, notas="Línea 1\nLínea 2\t€ 😀",
+        contactos=[ContactoSchema(tipo="movil", valor="+34 600 000 000", principal=True)]
+    ))
+    repo.crear_actividad(cliente.id, ActividadSchema(
+        tipo="reunion", titulo="Demo", fecha=datetime(2025, 3, 1, 9, 30, 15, 123456), completada=True
+    ))
+    repo.crear_oportunidad(cliente.id, OportunidadSchema(
+        titulo="Licencias", valor_estimado=12000.5, probabilidad_cierre=33.333333333333336,
+        fecha_cierre_esperada=datetime(2030, 6, 30), productos=["licencia", "soporte ñ"]
+    ))
+    return cliente.id
+
+
+def test_modelos_del_repositorio(repo, cliente_id):
+    """Cliente completo, parcial, listas, estadísticas, pipeline y resumen"""
+    clientes, total, next_cursor = repo.listar_clientes(limit=10)
+    parciales, _, _ = repo.listar_clientes(limit=10, campos=["id", "email", "fecha_creacion"], expandir=["contactos"])
+    contenidos = [
+        repo.obtener_cliente(cliente_id),
+        repo.obtener_cliente_parcial(cliente_id, campos=["nombre_completo", "estado"], expandir=[]),
+        repo._obtener_contactos(cliente_id),
+        repo._obtener_actividades(cliente_id, limit=20),
+        repo._obtener_oportunidades(cliente_id),
+        repo.obtener_estadisticas_cliente(cliente_id),
+        repo.obtener_estadisticas_clientes([cliente_id, "no_existe"]),
+        repo.pipeline_oportunidades(),
+        repo.obtener_resumen_crm(),
+        repo.estadisticas_cache(),
+        # Cuerpos que arman los endpoints de listado
+        {"clientes": clientes, "total": total, "skip": 0, "limit": 10, "next_cursor": next_cursor},
+        {"clientes": [c.model_dump(exclude_unset=True) for c in parciales], "total": None, "skip": 0, "limit": 10,
+         "next_cursor": None},
+        {"total": 3, "creados": 1, "errores": [{"indice": 2, "error": "Email duplicado: ñ@x.es"}]},
+    ]
+
+    for contenido in contenidos:
+        assert RespuestaJSON(contenido).body == cuerpo_anterior(contenido), type(contenido).__name__
+
+
+@pytest.mark.parametrize("contenido", [
+    [0.0, -0.0, 1.0, 0.1, 1 / 3, 12345678.9, 2.0 ** 53, -1234.5],
+    {"entero": 10 ** 18, "booleanos": [True, False], "nulo": None, "vacios": [[], {}, ""]},
+    {"fecha": datetime(2025, 1, 1), "con_zona": datetime(2025, 1, 1, tzinfo=timezone(timedelta(hours=2)))},
+    {"anidado": {"nivel": [{"nivel": [{"texto": "<script>&' "}]}]}},
+])
+def test_valores_sueltos(contenido):
+    assert RespuestaJSON(contenido).body == cuerpo_anterior(contenido)
+
+
+def test_diferencias_de_formato_con_el_mismo_valor():
+    """Exponentes y fechas UTC fuera de un modelo se escriben distinto, pero se leen igual"""
+    numeros = [1e16, 1e-7, -2.5e-300]
+    assert RespuestaJSON(numeros).body == b"[1e16,1e-7,-2.5e-300]"
+    assert json.loads(RespuestaJSON(numeros).body) == json.loads(cuerpo_anterior(numeros)) == numeros
+
+    fecha = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+    nuevo, anterior = json.loads(RespuestaJSON([fecha]).body)[0], json.loads(cuerpo_anterior([fecha]))[0]
+    assert (nuevo, anterior) == ("2025-01-01T12:00:00Z", "2025-01-01T12:00:00+00:00")
+    assert datetime.fromisoformat(nuevo) == datetime.fromisoformat(anterior) == fecha
+
+
+def test_nan_e_infinito_se_escriben_como_null():
+    """`JSONResponse` los rechazaba; aquí el cuerpo sigue siendo JSON válido"""
+    with pytest.raises(ValueError):
+        cuerpo_anterior([float("nan")])
+
+    assert json.loads(RespuestaJSON([float("nan"), float("inf"), -float("inf")]).body) == [None, None, None]
+
+
+def test_codigo_y_cabeceras(repo, cliente_id):
+    respuesta = respuesta_json(repo.obtener_cliente(cliente_id), status_code=201, headers={"ETag": '"abc"'})
+
+    assert respuesta.status_code == 201
+    assert respuesta.headers["etag"] == '"abc"'
+    assert respuesta.headers["content-type"] == "application/json"
+    assert int(respuesta.headers["content-length"]) == len(respuesta.body)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# =====================================================
+# 🧪 Tests de los Contadores del Resumen
+# =====================================================
+"""
+Los contadores que mantienen los triggers deben coincidir con los que
+calcula `recalcular_resumen` desde cero, sobre una base de datos temporal.
+Ejecutar con: python -m pytest tests/test_resumen_contadores.py -v
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.models.crm_models import ActividadSchema, ClienteCreate, ClienteUpdate, OportunidadSchema
+
+
+def contadores(repo) -> dict:
+    """Contenido de `resumen_contadores` sin las claves que valen cero"""
+    with repo._pool.conexion() as conn:
+        return {
+            row["clave"]: row["valor"]
+            for row in conn.execute("SELECT clave, valor FROM resumen_contadores")
+            if abs(row["valor"]) > 1e-9
+        }
+
+
+def ejecutar(repo, sql: str, params: tuple = ()):
+    """Escritura directa para las columnas que la API no modifica (facturación, pagos)"""
+    with repo._pool.conexion() as conn:
+        conn.execute(sql, params)
+        conn.commit()
+
+
+def assert_contadores_iguales(incrementales: dict, recalculados: dict):
+    assert set(incrementales) == set(recalculados)
+    for clave, valor in recalculados.items():
+        assert incrementales[clave] == pytest.approx(valor, rel=1e-9, abs=1e-6), clave
+
+
+def test_incrementales_igual_que_recalculados(repo):
+    """Altas, cambios de estado, ediciones y borrados en cascada dejan los mismos contadores"""
+    cierre = datetime.now() + timedelta(days=3)
+    clientes = [
+        repo.crear_cliente(ClienteCreate(
+            nombre_completo=f"Cliente {i}", email=f"resumen{i}@x.es",
+            estado=("activo", "prospecto", "inactivo")[i % 3]
+        ))
+        for i in range(9)
+    ]
+    importados, _ = repo.importar_clientes([
+        ClienteCreate(nombre_completo=f"Importado {i}", estado="activo") for i in range(5)
+    ])
+    assert importados == 5
+
+    for i, cliente in enumerate(clientes):
+        # Importes con decimales que no son exactos en binario
+        ejecutar(repo, """
+        UPDATE clientes SET total_facturado = ?, tasa_pagos_a_tiempo = ?, dias_desde_ultimo_contacto = ?
+        WHERE id = ?
+        """, (0.1 * (i + 1) + 1000.7, (60, 85, None)[i % 3], (None, 5, 40)[i % 3], cliente.id))
+        for j in range(3):
+            repo.crear_actividad(cliente.id, ActividadSchema(
+                tipo="tarea", titulo=f"Tarea {j}", completada=j == 0
+            ))
+        for j, estado in enumerate(("inicial", "propuesta", "ganada")):
+            repo.crear_oportunidad(cliente.id, OportunidadSchema(
+                titulo=f"Oportunidad {j}", estado=estado, valor_estimado=1234.56 * (j + 1) + 0.01 * i,
+                probabilidad_cierre=50, fecha_cierre_esperada=cierre
+            ))
+
+    # Cambios de estado de clientes, actividades y oportunidades
+    repo.actualizar_cliente(clientes[1].id, ClienteUpdate(estado="activo"))
+    repo.actualizar_cliente(clientes[0].id, ClienteUpdate(estado="bloqueado"))
+    repo.actualizar_cliente(clientes[3].id, ClienteUpdate(notas="Solo notas, sin contadores"))
+    ejecutar(repo, "UPDATE actividades SET completada = 1 WHERE cliente_id = ? AND titulo = 'Tarea 1'", (clientes[2].id,))
+    ejecutar(repo, "UPDATE actividades SET completada = 0 WHERE cliente_id = ? AND titulo = 'Tarea 0'", (clientes[4].id,))
+    ejecutar(repo, "UPDATE oportunidades SET estado = 'perdida' WHERE cliente_id = ? AND estado = 'inicial'", (clientes[5].id,))
+    ejecutar(repo, "UPDATE oportunidades SET estado = 'negociacion' WHERE cliente_id = ? AND estado = 'ganada'", (clientes[6].id,))
+    ejecutar(repo, "UPDATE oportunidades SET valor_estimado = valor_estimado * 1.1 WHERE cliente_id = ?", (clientes[7].id,))
+    ejecutar(repo, "UPDATE clientes SET fecha_creacion = '2024-02-10 08:00:00' WHERE id = ?", (clientes[8].id,))
+
+    # Borrados sueltos y en cascada (actividades y oportunidades del cliente)
+    ejecutar(repo, "DELETE FROM actividades WHERE cliente_id = ? AND titulo = 'Tarea 2'", (clientes[3].id,))
+    ejecutar(repo, "DELETE FROM oportunidades WHERE cliente_id = ? AND estado = 'propuesta'", (clientes[4].id,))
+    assert repo.eliminar_cliente(clientes[2].id)
+    assert repo.eliminar_cliente(clientes[6].id)
+
+    incrementales = contadores(repo)
+    resumen_incremental = repo.obtener_resumen_crm()
+
+    repo.recalcular_resumen()
+
+    assert_contadores_iguales(incrementales, contadores(repo))
+    resumen = repo.obtener_resumen_crm()
+    for campo, valor in resumen.model_dump().items():
+        assert getattr(resumen_incremental, campo) == pytest.approx(valor, rel=1e-9, abs=1e-6), campo
+    assert resumen.total_clientes == 12
+    assert resumen.oportunidades_proximas_cerrar > 0
+
+
+def test_borrar_todo_deja_los_contadores_a_cero(repo):
+    """Tras eliminar todos los clientes (en cascada) no queda ningún contador distinto de cero"""
+    for i in range(3):
+        cliente = repo.crear_cliente(ClienteCreate(nombre_completo=f"Temporal {i}", estado="activo"))
+        repo.crear_actividad(cliente.id, ActividadSchema(tipo="llamada", titulo="Pendiente"))
+        repo.crear_oportunidad(cliente.id, OportunidadSchema(
+            titulo="Abierta", valor_estimado=0.3, probabilidad_cierre=20, fecha_cierre_esperada=datetime(2030, 1, 1)
+        ))
+        repo.eliminar_cliente(cliente.id)
+
+    assert contadores(repo) == {}
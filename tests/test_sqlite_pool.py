@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# =====================================================
+# 🧪 Tests del Pool de Conexiones SQLite
+# =====================================================
+"""
+Préstamo, reutilización, límite y configuración de las conexiones de
+`SQLiteConnectionPool` sobre una base de datos temporal.
+Ejecutar con: python -m pytest tests/test_sqlite_pool.py -v
+"""
+
+import sqlite3
+import threading
+
+import pytest
+
+from src.repositories.sqlite_pool import SQLiteConnectionPool
+
+
+@pytest.fixture
+def crear_pool(tmp_path):
+    """Fábrica de pools sobre `tmp_path/pool.db`; todos se cierran al final"""
+    pools = []
+
+    def crear(**opciones) -> SQLiteConnectionPool:
+        pool = SQLiteConnectionPool(str(tmp_path / "pool.db"), **opciones)
+        pools.append(pool)
+        return pool
+
+    yield crear
+    for pool in pools:
+        pool.cerrar()
+
+
+def en_otro_hilo(funcion):
+    """Resultado (o excepción) de `funcion` ejecutada en un hilo aparte"""
+    resultado = {}
+
+    def ejecutar():
+        try:
+            resultado["valor"] = funcion()
+        except Exception as e:
+            resultado["error"] = e
+
+    hilo = threading.Thread(target=ejecutar)
+    hilo.start()
+    hilo.join()
+    if "error" in resultado:
+        raise resultado["error"]
+    return resultado["valor"]
+
+
+def test_anidadas_en_el_mismo_hilo_comparten_conexion(crear_pool):
+    """Solo el `liberar` exterior devuelve la conexión al pool"""
+    pool = crear_pool(pool_size=1, timeout=0.05)
+
+    with pool.conexion() as exterior:
+        with pool.conexion() as interior:
+            assert interior is exterior
+            assert pool.adquirir() is exterior
+            pool.liberar(exterior)
+        # Sigue prestada al hilo: otro hilo no la obtiene
+        assert pool.estadisticas()["conexiones_libres"] == 0
+        with pytest.raises(TimeoutError):
+            en_otro_hilo(pool.adquirir)
+
+    assert pool.estadisticas() == {"pool_size": 1, "conexiones_abiertas": 1, "conexiones_libres": 1}
+    # Otro hilo recibe la misma conexión, ya libre
+    conn = en_otro_hilo(pool.adquirir)
+    assert conn is exterior
+    pool.liberar(conn)
+
+
+def test_hilos_distintos_reciben_conexiones_distintas(crear_pool):
+    pool = crear_pool(pool_size=2)
+
+    with pool.conexion() as propia:
+        ajena = en_otro_hilo(pool.adquirir)
+        assert ajena is not propia
+        assert pool.estadisticas()["conexiones_abiertas"] == 2
+        pool.liberar(ajena)
+
+    assert pool.estadisticas()["conexiones_libres"] == 2
+
+
+def test_pool_agotado_espera_y_da_timeout(crear_pool):
+    """Sin conexiones libres se espera `timeout` y se lanza TimeoutError"""
+    pool = crear_pool(pool_size=2, timeout=0.05)
+    prestadas = [en_otro_hilo(pool.adquirir) for _ in range(2)]
+
+    with pytest.raises(TimeoutError, match="pool_size=2"):
+        pool.adquirir()
+    assert pool.estadisticas()["conexiones_abiertas"] == 2
+
+    # Una conexión devuelta desde otro hilo despierta al que espera
+    temporizador = threading.Timer(0.01, pool.liberar, args=(prestadas[0],))
+    pool.timeout = 5
+    temporizador.start()
+    with pool.conexion() as conn:
+        assert conn is prestadas[0]
+    temporizador.join()
+    pool.liberar(prestadas[1])
+
+
+def test_pragmas_de_cada_conexion(crear_pool):
+    """WAL, synchronous=NORMAL, claves foráneas, caché y temporales en memoria en todas las conexiones"""
+    pool = crear_pool(pool_size=2, cache_size_kb=4000)
+
+    conexiones = [pool.adquirir(), en_otro_hilo(pool.adquirir)]
+    with pool.conexion_dedicada() as dedicada:
+        for conn in conexiones + [dedicada]:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+            assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+            assert conn.execute("PRAGMA cache_size").fetchone()[0] == -4000
+            assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2
+    for conn in conexiones:
+        pool.liberar(conn)
+
+
+def test_claves_foraneas_se_aplican(crear_pool):
+    pool = crear_pool()
+    with pool.conexion() as conn:
+        conn.execute("CREATE TABLE padre (id INTEGER PRIMARY KEY)")
+        conn.execute("CREATE TABLE hijo (padre_id INTEGER REFERENCES padre(id))")
+        with pytest.raises(sqlite3.IntegrityError, match="FOREIGN KEY"):
+            conn.execute("INSERT INTO hijo VALUES (1)")
+
+
+def test_transaccion_abierta_no_pasa_a_la_siguiente_peticion(crear_pool):
+    """Al devolverse, la conexión deshace lo que quedó sin confirmar"""
+    pool = crear_pool(pool_size=1)
+    with pool.conexion() as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+        conn.commit()
+
+    with pytest.raises(RuntimeError):
+        with pool.conexion() as conn:
+            conn.execute("INSERT INTO t VALUES (1)")
+            raise RuntimeError("fallo a mitad de la petición")
+
+    with pool.conexion() as conn:
+        assert not conn.in_transaction
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+
+
+def test_cierre(crear_pool):
+    """Las libres se cierran al momento y las prestadas al devolverse"""
+    pool = crear_pool(pool_size=2)
+    prestada = pool.adquirir()
+    libre = en_otro_hilo(pool.adquirir)
+    pool.liberar(libre)
+    assert pool.estadisticas()["conexiones_abiertas"] == 2
+
+    pool.cerrar()
+
+    assert pool.estadisticas()["conexiones_abiertas"] == 1
+    pool.liberar(prestada)
+    assert pool.estadisticas()["conexiones_abiertas"] == 0
+    with pytest.raises(RuntimeError):
+        pool.adquirir()
+
+
+def test_pool_size_invalido(tmp_path):
+    with pytest.raises(ValueError):
+        SQLiteConnectionPool(str(tmp_path / "pool.db"), pool_size=0)
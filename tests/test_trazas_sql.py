@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# =====================================================
+# 🧪 Tests de las Trazas SQL
+# =====================================================
+"""
+Instrumentación SQL del repositorio sobre una base de datos temporal.
+Ejecutar con: python -m pytest tests/test_trazas_sql.py -v
+"""
+
+import json
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.interface.middleware_trazas_sql import MiddlewareTrazasSQL, router_trazas_sql
+from src.repositories.trazas_sql import TrazadorSQL, iniciar_traza, finalizar_traza
+from src.models.crm_models import ClienteCreate
+
+
+@pytest.fixture
+def repo(crear_repo):
+    return crear_repo(trazador=TrazadorSQL(umbral_lenta_ms=0.000001, trazas_peticion=True, max_peticiones=3))
+
+
+@pytest.fixture
+def cliente_http(repo):
+    """App mínima con el middleware de trazas y `/debug/sql` sobre `repo`"""
+    app = FastAPI()
+    trazador = repo._pool.trazador
+
+    @app.get("/clientes")
+    def listar():
+        clientes, total, _ = repo.listar_clientes(limit=5)
+        return {"total": total}
+
+    app.include_router(router_trazas_sql(trazador))
+    app.add_middleware(MiddlewareTrazasSQL, trazador=trazador)
+    return TestClient(app)
+
+
+def test_traza_recoge_sentencias_y_filas(repo):
+    """Cada sentencia queda con su texto, forma de parámetros y filas leídas"""
+    for i in range(3):
+        repo.crear_cliente(ClienteCreate(nombre_completo=f"Cliente {i}", email=f"c{i}@traza.es"))
+
+    sentencias = iniciar_traza()
+    try:
+        repo.listar_clientes(limit=10, contar="exacto")
+    finally:
+        finalizar_traza()
+
+    seleccion = next(s for s in sentencias if s["sql"].startswith("SELECT * FROM clientes"))
+    assert seleccion["filas"] == 3
+    assert seleccion["parametros"] == "?, ?"
+    assert seleccion["duracion_ms"] > 0
+    assert any(s["sql"].startswith("SELECT COUNT(*)") for s in sentencias)
+
+
+def test_sin_traza_activa_no_se_acumula(repo, caplog):
+    """Fuera de una traza solo actúa el log de sentencias lentas"""
+    with caplog.at_level(logging.WARNING, logger="SyntexIA-CRM"):
+        repo.crear_cliente(ClienteCreate(nombre_completo="Sin traza", email="sin@traza.es"))
+
+    assert any("SQL lenta" in registro.message and "INSERT INTO clientes" in registro.message
+               for registro in caplog.records)
+    assert "sin@traza.es" not in caplog.text
+
+
+def test_solo_se_trazan_las_peticiones_marcadas(cliente_http, repo):
+    """Sin `X-Trazar-SQL: 1` la petición no se traza; se conservan las últimas `max_peticiones`"""
+    respuesta = cliente_http.get("/clientes")
+    assert "x-traza-sql" not in respuesta.headers
+    assert cliente_http.get("/debug/sql").json() == []
+
+    ids = [cliente_http.get("/clientes", headers={"X-Trazar-SQL": "1"}).headers["x-traza-sql"] for _ in range(5)]
+    cliente_http.get("/clientes", headers={"X-Trazar-SQL": "0"})
+
+    trazas = cliente_http.get("/debug/sql").json()
+    assert [traza["id"] for traza in trazas] == ids[-3:]
+
+
+def test_formato_json_de_debug_sql(cliente_http):
+    """Cada traza lleva la petición, los tiempos y sus sentencias sin valores de parámetros"""
+    respuesta = cliente_http.get("/clientes", headers={"X-Trazar-SQL": "1"})
+    traza_id = respuesta.headers["x-traza-sql"]
+    assert respuesta.headers["server-timing"].startswith("sql;dur=")
+
+    detalle = cliente_http.get("/debug/sql", params={"traza_id": traza_id})
+    assert detalle.headers["content-type"] == "application/json"
+    traza = json.loads(detalle.content)
+
+    assert set(traza) == {"id", "metodo", "ruta", "fecha", "duracion_ms", "sql_ms", "sentencias"}
+    assert (traza["id"], traza["metodo"], traza["ruta"]) == (traza_id, "GET", "/clientes")
+    assert traza["duracion_ms"] >= traza["sql_ms"] >= 0
+    assert traza["sentencias"]
+    for sentencia in traza["sentencias"]:
+        assert set(sentencia) == {"sql", "parametros", "duracion_ms", "filas", "pasos_vm"}
+        assert isinstance(sentencia["sql"], str) and isinstance(sentencia["parametros"], str)
+        assert isinstance(sentencia["filas"], int) and isinstance(sentencia["pasos_vm"], int)
+
+    assert cliente_http.get("/debug/sql", params={"traza_id": "no_existe"}).status_code == 404